@@ -0,0 +1,58 @@
+"""
+:GSDMM 聚类的回归校验与性能对比
+相同 random_state 下 MovieGroupProcess 与 NumpyMovieGroupProcess 的聚类标签、每簇词频必须完全一致
+运行: python -m benchmarks.bench_gsdmm [文档数...]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+from celery_task.utils.gsdmmCluster.cluster_extract import compute_V
+from celery_task.utils.gsdmmCluster.mgp import MovieGroupProcess
+from celery_task.utils.gsdmmCluster.mgp_numpy import NumpyMovieGroupProcess
+from celery_task.utils.gsdmmCluster.normalization import normalize_corpus
+
+DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "celery_task", "utils", "themeCluster", "data", "test_data2.txt",
+)
+
+
+def build_docs(size: int) -> list:
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    rand = random.Random(size)
+    # 转发评论较短，截取博文片段模拟
+    texts = [rand.choice(lines)[rand.randint(0, 40):][:rand.randint(10, 80)] for _ in range(size)]
+    documents, _ = normalize_corpus(pd.DataFrame({"fulltext": texts}))
+    return [text.split() for text in documents]
+
+
+def run(cls, docs, seed):
+    # 参数与 cluster_extract 中一致
+    model = cls(K=6, alpha=0.01, beta=0.02, n_iters=60, random_state=seed)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # 屏蔽每轮迭代的打印
+        labels = model.fit(docs, compute_V(docs))
+    return labels, model.cluster_word_distribution, time.perf_counter() - start
+
+
+def bench(size: int, seed: int = 0):
+    docs = build_docs(size)
+    labels, distribution, python_cost = run(MovieGroupProcess, docs, seed)
+    np_labels, np_distribution, numpy_cost = run(NumpyMovieGroupProcess, docs, seed)
+    assert labels == np_labels, "聚类标签不一致"
+    assert distribution == np_distribution, "每簇词频不一致"
+    print("{:>6} docs  python {:7.2f}s  numpy {:6.2f}s  x{:.1f}".format(
+        size, python_cost, numpy_cost, python_cost / numpy_cost))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 5000]
+    for n in sizes:
+        bench(n)
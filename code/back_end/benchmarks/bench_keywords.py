@@ -0,0 +1,54 @@
+"""
+:博文关键词提取的性能对比
+逐条构造 MyCloud(...).GetKeyWord() 与批量接口 MyCloud.keywords_for_many 的耗时，并校验两者结果一致
+运行: python -m benchmarks.bench_keywords
+"""
+import os
+import time
+
+from celery_task.utils.gsdmmCluster.normalization import token_cache
+from celery_task.utils.my_cloud import MyCloud
+
+DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "celery_task", "utils", "themeCluster", "data", "test_data2.txt",
+)
+
+
+def load_texts(size: int) -> list:
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    # 与爬虫中的处理一致，文本末尾追加空格
+    return [lines[i % len(lines)] + " " for i in range(size)]
+
+
+def per_weibo(texts: list) -> list:
+    return [MyCloud(text.split(" ")).GetKeyWord() for text in texts]
+
+
+def batch(texts: list) -> list:
+    return MyCloud.keywords_for_many(texts)
+
+
+def bench(size: int):
+    texts = load_texts(size)
+    # 两种方式都在冷缓存下计时
+    token_cache.clear()
+    start = time.perf_counter()
+    expected = per_weibo(texts)
+    per_weibo_cost = time.perf_counter() - start
+
+    token_cache.clear()
+    start = time.perf_counter()
+    result = batch(texts)
+    batch_cost = time.perf_counter() - start
+
+    assert result == expected, "批量接口与逐条提取结果不一致"
+    print("{:>6} texts  per-weibo {:8.2f}s  batch {:8.2f}s  x{:.1f}".format(
+        size, per_weibo_cost, batch_cost, per_weibo_cost / batch_cost))
+
+
+if __name__ == "__main__":
+    MyCloud([""]).GetKeyWord()  # 预热jieba词典
+    for n in (1000, 10000):
+        bench(n)
@@ -0,0 +1,94 @@
+"""
+:LeaderRank 关键节点计算的性能对比
+legacy 为改造前的字典实现（原地逐点更新，相邻两轮比值都在 0.9~1.1 之间即停止，最多 100 轮）；
+稀疏实现迭代到 L1 收敛，得分数值不同，这里校验收敛后的不动点残差并报告两者前 10 名的重合数
+运行: python -m benchmarks.bench_leader_rank [节点数...]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from celery_task.tag_comment_task.myRank import build_rank_matrix, leader_rank, startRank
+
+
+def legacy_start_rank(database_dict, redatabase_dict, account):
+    ground_node = "G"
+    degree_dic, undirected = dict(), dict()
+    for i in account:
+        temp_account_list = []
+        if i in database_dict.keys():
+            temp_account_list.extend(database_dict[i])
+        if i in redatabase_dict.keys():
+            temp_account_list.extend(redatabase_dict[i])
+        temp = list(set(tuple(temp_account_list)))
+        temp.append(ground_node)
+        undirected[i] = temp
+        degree_dic[i] = len(temp)
+    degree_dic[ground_node] = len(account)
+    undirected[ground_node] = account
+    temp_account = account[:] + [ground_node]
+    temp = {i: 1 for i in account}
+    temp[ground_node] = 0
+    for _ in range(100):
+        temp1 = list(temp.values())
+        for i in temp_account:
+            temp[i] = sum(temp[j] / degree_dic[j] for j in undirected[i])
+        temp2 = list(temp.values())
+        counter = 0
+        for a, b in zip(temp1, temp2):
+            try:
+                if 0.9 <= a / b <= 1.1:
+                    counter += 1
+            except ZeroDivisionError:
+                pass
+        if counter == len(temp1):
+            break
+    return sorted(temp.items(), key=lambda kv: (kv[1], kv[0]), reverse=True)[0:10]
+
+
+def build_cascade(size: int):
+    """
+    模拟转发树：大部分转发挂在已有的热门节点下（优先连接），其余随机挂载
+    :return: (edges, 节点列表)，edges 与 process.load_tree_graph 返回的结构相同
+    """
+    rand = random.Random(size)
+    names = ["user{}".format(i) for i in range(size)]
+    edges = {}
+    weighted = [0]
+    for i in range(1, size):
+        parent = rand.choice(weighted) if rand.random() < 0.7 else rand.randrange(i)
+        edges.setdefault(names[parent], {})[names[i]] = {}
+        weighted.extend((parent, i))
+    account = names[:]
+    rand.shuffle(account)
+    return edges, account
+
+
+def bench(size: int):
+    edges, account = build_cascade(size)
+
+    start = time.perf_counter()
+    result = startRank(edges, {}, account)
+    sparse_cost = time.perf_counter() - start
+
+    names, matrix = build_rank_matrix(edges, {}, account)
+    scores = leader_rank(matrix)
+    residual = np.abs(matrix @ scores * (scores.sum() / (matrix @ scores).sum()) - scores).sum() / scores.sum()
+    assert residual < 1e-8, "幂迭代没有收敛"
+
+    start = time.perf_counter()
+    expected = legacy_start_rank(edges, {}, account)
+    legacy_cost = time.perf_counter() - start
+
+    overlap = len({name for name, _ in result} & {name for name, _ in expected})
+    print("{:>7} nodes  legacy {:6.2f}s  sparse {:6.2f}s  top10 overlap {:>2}  top3 {} / {}".format(
+        size, legacy_cost, sparse_cost, overlap,
+        [name for name, _ in expected[:3]], [name for name, _ in result[:3]]))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 50000, 500000]
+    for n in sizes:
+        bench(n)
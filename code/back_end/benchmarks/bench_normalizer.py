@@ -0,0 +1,102 @@
+"""
+:文本清洗的回归校验与性能对比
+legacy_* 是 TextNormalizer 之前的逐步替换实现（每次调用重新编译正则、逐条分词），
+要求 normalize_corpus / normalize_corpus_part / normalize_texts 的输出与之完全一致
+运行: python -m benchmarks.bench_normalizer
+"""
+import os
+import random
+import re
+import time
+
+import jieba
+import pandas as pd
+
+from celery_task.utils.gsdmmCluster.normalization import (
+    Traditional2Simplified, normalize_corpus, normalize_corpus_part, normalize_texts, stopword_list, text_normalizer,
+    token_cache,
+)
+
+DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "celery_task", "utils", "themeCluster", "data", "test_data2.txt",
+)
+
+# 覆盖各条清洗规则及其先后顺序的片段
+PIECES = [
+    "https://t.cn/A6abc?x=1&y=2", "@用户_a", "@abc_1", "RT @abc:", "😀", "@😀abc", "htt😀ps://t.cn",
+    "微RT博", "微博", "RT", "&amp;", "&amp", "發展", "臺灣", "“引号”", "，", "。", " ", "\t", "abc", "123",
+]
+
+
+def legacy_clean(item, remove_weibo):
+    url_pattern = re.compile(r'https://[a-zA-Z0-9.?/&=:]*', re.S)
+    name_pattern = re.compile(r'RT @[a-z,A-Z,0-9,_]+:|@[a-z,A-Z,0-9,_]+')
+    dd = Traditional2Simplified(item)
+    dd = url_pattern.sub("", dd)
+    dd = re.compile(u'[\U00010000-\U0010ffff]').sub('', dd)
+    dd = name_pattern.sub("", dd)
+    dd = re.compile(u'[^0-9a-zA-Z一-龥.，,。“”]+', re.UNICODE).sub(' ', dd)
+    dd = dd.replace('&amp', '')
+    dd = dd.replace('RT', '')
+    if remove_weibo:
+        dd = dd.replace('微博', '')
+    return dd.strip()
+
+
+def legacy_tokens(text):
+    tokens = [token.strip() for token in jieba.lcut(text) if len(token.strip()) > 0]
+    return [token for token in tokens if token not in stopword_list]
+
+
+def legacy_normalize_corpus(twitter_data):
+    fulltext = [legacy_clean(item, False) for item in twitter_data['fulltext']]
+    return [" ".join(legacy_tokens(text)) for text in fulltext], fulltext
+
+
+def legacy_normalize_corpus_part(texts):
+    fulltext = [dd for dd in (legacy_clean(item, True) for item in texts) if len(dd) != 0]
+    return [" ".join(legacy_tokens(text)).split(' ') for text in fulltext]
+
+
+def legacy_normalize_texts(texts):
+    return [legacy_tokens(legacy_clean(item, True)) for item in texts]
+
+
+def build_corpus(size: int) -> list:
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    rand = random.Random(size)
+    texts = []
+    for _ in range(size):
+        parts = [rand.choice(PIECES) for _ in range(rand.randint(0, 6))]
+        parts.insert(rand.randint(0, len(parts)), rand.choice(lines)[:rand.randint(0, 120)])
+        texts.append("".join(parts))
+    return texts
+
+
+def bench(name, legacy, current, texts):
+    start = time.perf_counter()
+    expected = legacy(texts)
+    legacy_cost = time.perf_counter() - start
+
+    token_cache.clear()  # 冷缓存下比较，缓存命中的收益见 bench_token_cache
+    start = time.perf_counter()
+    result = current(texts)
+    current_cost = time.perf_counter() - start
+
+    assert expected == result, "{} 输出不一致".format(name)
+    print("{:>22} {:>6} texts  legacy {:6.2f}s  normalizer {:6.2f}s  x{:.2f}".format(
+        name, len(texts), legacy_cost, current_cost, legacy_cost / current_cost))
+
+
+if __name__ == "__main__":
+    jieba.initialize()
+    for size in (1000, 10000):
+        corpus = build_corpus(size)
+        # 只比较清洗部分，分词耗时在两边相同
+        bench("clean", lambda texts: [legacy_clean(item, True) for item in texts],
+              lambda texts: [text_normalizer.clean(item) for item in texts], corpus)
+        bench("normalize_corpus", legacy_normalize_corpus, normalize_corpus, pd.DataFrame({"fulltext": corpus}))
+        bench("normalize_corpus_part", legacy_normalize_corpus_part, normalize_corpus_part, corpus)
+        bench("normalize_texts", legacy_normalize_texts, normalize_texts, corpus)
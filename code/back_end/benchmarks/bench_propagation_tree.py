@@ -0,0 +1,117 @@
+"""
+:传播树构建的回归校验与性能对比
+legacy 为改造前 get_path_tree_part 的建树逻辑（逐层 strip + __contains__ 查找，每 500 条把整棵树重新序列化写入），
+要求 MyTree.get_tree 的结果（包括子节点顺序）与之完全一致；写库开销用 bson 编码模拟
+运行: python -m benchmarks.bench_propagation_tree [转发数...]
+"""
+import copy
+import random
+import sys
+import time
+
+import bson
+
+from celery_task.tag_comment_task.process import CHECKPOINT_INTERVAL, MyTree
+
+ROOT = {"user_id": "1", "user_name": "博主", "content": "原微博", "children": {}}
+
+
+def legacy_append_point_to_tree(tree, path, end_node):
+    now_position = tree
+    index = 0
+    while index < len(path):
+        if now_position["children"].__contains__(path[index]["user_name"].strip()):
+            now_position = now_position["children"][path[index]["user_name"].strip()]
+            index += 1
+        else:
+            now_position["children"][path[index]["user_name"].strip()] = {
+                "user_id": 0,
+                "user_name": path[index]["user_name"].strip(),
+                "content": path[index]["content"],
+                "children": {},
+            }
+    if now_position["children"].__contains__(end_node["user_name"].strip()):
+        now_position["children"][end_node["user_name"].strip()]["user_id"] = end_node["user_id"]
+    else:
+        now_position["children"][end_node["user_name"].strip()] = {
+            "user_id": end_node["user_id"],
+            "user_name": end_node["user_name"].strip(),
+            "content": end_node["content"],
+            "children": {},
+        }
+    return tree
+
+
+def legacy_build(docs):
+    tree = copy.deepcopy(ROOT)
+    written = 0
+    for index, path in enumerate(copy.deepcopy(docs)):
+        path["repost"].reverse()
+        end_node = {
+            "user_id": path.get("user_id"),
+            "user_name": path.get("user_name"),
+            "content": path.get("content"),
+            "children": {},
+        }
+        legacy_append_point_to_tree(tree, path["repost"], end_node)
+        if (index + 1) % 500 == 0:
+            written += len(bson.encode({"data": tree}))
+    written += len(bson.encode({"data": tree}))
+    return tree, written
+
+
+def build(docs):
+    my_tree = MyTree(copy.deepcopy(ROOT))
+    written = 0
+    for count, path in enumerate(docs, 1):
+        my_tree.add_path(path.get("repost"), path.get("user_name"), path.get("user_id"), path.get("content"))
+        if count % CHECKPOINT_INTERVAL == 0:
+            written += len(bson.encode({"progress": {"current": count, "nodes": len(my_tree)}}))
+    tree = my_tree.get_tree()
+    written += len(bson.encode({"data": tree}))
+    return tree, written
+
+
+def build_docs(size: int) -> list:
+    """
+    模拟转发：每条转发挂在已有的某条转发路径下（偏向热门路径），用户名带随机空白
+    """
+    rand = random.Random(size)
+    users = ["用户{}".format(i) for i in range(max(size // 2, 1))]
+    chains = [[]]
+    docs = []
+    for i in range(size):
+        chain = rand.choice(chains[-50:]) if rand.random() < 0.5 else rand.choice(chains)
+        name = rand.choice(users)
+        docs.append({
+            "repost": [dict(item) for item in reversed(chain)],
+            "user_id": str(i),
+            "user_name": name + rand.choice(["", " ", "\n"]),
+            "content": "转发内容{}".format(i),
+        })
+        if len(chain) < 30:
+            chains.append(chain + [{"user_name": name, "content": "转发内容{}".format(i), "page_url": ""}])
+    return docs
+
+
+def bench(size: int):
+    docs = build_docs(size)
+
+    start = time.perf_counter()
+    tree, written = build(docs)
+    new_cost = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected, legacy_written = legacy_build(docs)
+    legacy_cost = time.perf_counter() - start
+    assert tree == expected, "传播树结构不一致"
+    assert repr(tree) == repr(expected), "子节点顺序不一致"
+
+    print("{:>7} reposts  legacy {:6.2f}s {:>8.1f}MB written  new {:6.2f}s {:>6.1f}MB written".format(
+        size, legacy_cost, legacy_written / 2 ** 20, new_cost, written / 2 ** 20))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    for n in sizes:
+        bench(n)
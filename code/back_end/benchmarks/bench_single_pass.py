@@ -0,0 +1,92 @@
+"""
+:SinglePass 聚类的回归校验与性能对比
+reference 为稠密矩阵 + sklearn cosine_similarity 的均值中心实现，要求与稀疏增量实现的聚类结果完全一致；
+legacy 为改造前的实现（todense().tolist()，每篇文本重建中心矩阵，中心取簇内第一篇文本），只用于对比耗时
+运行: python -m benchmarks.bench_single_pass [文本数...]
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from celery_task.utils.themeCluster.Single_Pass.single_pass_cluster import SinglePassCluster
+
+DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "celery_task", "utils", "themeCluster", "data", "test_data2.txt",
+)
+SIMI_THRESHOLD = 0.5
+
+
+def build_blogs(size: int) -> list:
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    rand = random.Random(size)
+    return [
+        {"user_id": str(rand.randint(0, size // 3)), "text": rand.choice(lines)[rand.randint(0, 20):]}
+        for _ in range(size)
+    ]
+
+
+def reference(tfidf, thr) -> dict:
+    dense = tfidf.toarray()
+    sums, counts, clusters = [], [], {}
+    for idx, vec in enumerate(dense):
+        if sums:
+            centers = np.array(sums) / np.array(counts)[:, None]
+            simi = cosine_similarity(vec[None, :], centers)[0]
+            max_idx = int(np.argmax(simi))
+            if simi[max_idx] >= thr:
+                sums[max_idx] = sums[max_idx] + vec
+                counts[max_idx] += 1
+                clusters[max_idx].append(idx)
+                continue
+        clusters[len(sums)] = [idx]
+        sums.append(vec.copy())
+        counts.append(1)
+    return clusters
+
+
+def legacy(tfidf, thr) -> dict:
+    centers, clusters = [], {}
+    for idx, vec in enumerate(tfidf.todense().tolist()):
+        if centers:
+            simi = cosine_similarity(np.array([vec]), np.array(centers))
+            max_idx = np.argmax(simi, axis=1)[0]
+            if simi[0][max_idx] >= thr:
+                clusters[max_idx].append(idx)
+                continue
+        centers.append(vec)
+        clusters[len(clusters)] = [idx]
+    return clusters
+
+
+def bench(size: int):
+    blogs = build_blogs(size)
+    model = SinglePassCluster(blog_data=blogs, tag_task_id="bench", user_list=[], simi_threshold=SIMI_THRESHOLD)
+    tfidf = model.get_tfidf(model.cut_sentences())
+
+    start = time.perf_counter()
+    result = model.cluster()
+    sparse_cost = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = reference(tfidf, SIMI_THRESHOLD)
+    reference_cost = time.perf_counter() - start
+    assert result == expected, "稀疏增量实现与稠密参考实现的聚类结果不一致"
+
+    start = time.perf_counter()
+    legacy(tfidf, SIMI_THRESHOLD)
+    legacy_cost = time.perf_counter() - start
+
+    print("{:>6} texts {:>5} clusters  legacy {:7.2f}s  dense-mean {:7.2f}s  sparse {:6.3f}s".format(
+        size, len(result), legacy_cost, reference_cost, sparse_cost))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 3000]
+    for n in sizes:
+        bench(n)
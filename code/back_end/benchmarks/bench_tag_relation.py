@@ -0,0 +1,121 @@
+"""
+:话题人物关系网构建的回归校验与性能对比
+legacy_relation_graph 为改造前 tag_relation 中的构建逻辑（reduce 去重、逐个发布者扫描全部微博、列表查重与线性查找），
+要求 build_relation_graph 输出的 nodes_list、links_list 与之完全一致；legacy 是平方复杂度，只在较小规模上运行
+运行: python -m benchmarks.bench_tag_relation [微博数...]
+"""
+import copy
+import random
+import sys
+import time
+from functools import reduce
+
+from celery_task.tag_task.tag_relaton_task import build_relation_graph
+
+LEGACY_LIMIT = 20000
+
+
+def legacy_relation_graph(weibo_data: dict, user_mark_data: dict):
+    node_list = list()
+    link_list = list()
+    weibo_list_data = weibo_data.get("data", [])
+    if not isinstance(weibo_list_data, list):
+        weibo_list_data = []
+    weibo_list = reduce(lambda x, y: x if y in x else x + [y], [[], ] + weibo_list_data)
+    screen_name_set = set(i["screen_name"] for i in weibo_list if "screen_name" in i)
+    relation_data = list()
+    for screen_name in screen_name_set:
+        at_users_list = list()
+        user_id = 0
+        hot_count = 0
+        for weibo in weibo_list:
+            if weibo.get("screen_name") == screen_name:
+                at_users = weibo.get("at_users", [])
+                if at_users:
+                    at_users_list.extend(at_users)
+                hot_count += int(weibo.get("hot_count", 0))
+                user_id = weibo.get("user_id", 0)
+        relation_data.append(
+            {"screen_name": screen_name, "user_id": user_id, "at_users": at_users_list, "hot_count": hot_count}
+        )
+    for data in relation_data:
+        category = -1
+        user_mark_list = user_mark_data.get("data", []) if user_mark_data else []
+        if isinstance(user_mark_list, list):
+            for user_mark in user_mark_list:
+                if user_mark and user_mark.get("user_id") == data.get("user_id"):
+                    category = user_mark.get("category", -1)
+                    break
+        node = {"category": category, "name": data["screen_name"], "userId": data["user_id"],
+                "value": int(data["hot_count"])}
+        node_list.append(node)
+        at_users = data.get("at_users", [])
+        if isinstance(at_users, list) and len(at_users) > 0:
+            for i in at_users:
+                if not i or not isinstance(i, str):
+                    continue
+                link = {"source": data["screen_name"], "target": i, "weight": at_users.count(i)}
+                if link not in link_list:
+                    link_list.append(link)
+                if i not in screen_name_set:
+                    node = {"category": -1, "name": i, "userId": None, "value": int(data["hot_count"])}
+                    node_list.append(node)
+                    screen_name_set.add(i)
+                else:
+                    for node_item in node_list:
+                        if node_item["name"] == i:
+                            node_item["value"] += int(data["hot_count"])
+                            break
+    return node_list, link_list
+
+
+def build_data(size: int):
+    rand = random.Random(size)
+    users = ["用户{}".format(i) for i in range(max(size // 5, 1))]
+    outsiders = ["路人{}".format(i) for i in range(max(size // 10, 1))]
+    weibos = []
+    for i in range(size):
+        if weibos and rand.random() < 0.1:
+            weibos.append(copy.deepcopy(rand.choice(weibos)))  # 重复抓取到的同一条微博
+            continue
+        name_id = rand.randrange(len(users))
+        at_users = [rand.choice(users + outsiders) for _ in range(rand.randint(0, 3))]
+        if rand.random() < 0.05:
+            at_users.append(rand.choice(["", None, 3]))
+        weibo = {
+            "weibo_id": "W{}".format(i),
+            "screen_name": users[name_id],
+            "user_id": str(name_id),
+            "at_users": at_users,
+            "hot_count": rand.choice([rand.randint(0, 500), str(rand.randint(0, 500))]),
+        }
+        weibos.append(weibo)
+    marks = [{"user_id": str(i), "category": rand.randint(0, 8)} for i in range(0, len(users), 2)]
+    marks.append(None)
+    return {"data": weibos}, {"data": marks, "categories": 9}
+
+
+def bench(size: int):
+    weibo_data, user_mark_data = build_data(size)
+
+    start = time.perf_counter()
+    nodes, links = build_relation_graph(weibo_data, user_mark_data)
+    indexed_cost = time.perf_counter() - start
+
+    legacy_text = "     -"
+    if size <= LEGACY_LIMIT:
+        start = time.perf_counter()
+        expected_nodes, expected_links = legacy_relation_graph(weibo_data, user_mark_data)
+        legacy_cost = time.perf_counter() - start
+        assert nodes == expected_nodes, "nodes_list 不一致"
+        assert links == expected_links, "links_list 不一致"
+        legacy_text = "{:6.2f}s".format(legacy_cost)
+
+    print("{:>7} weibos {:>6} nodes {:>6} links  legacy {}  indexed {:6.3f}s".format(
+        size, len(nodes), len(links), legacy_text, indexed_cost))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    for n in sizes:
+        bench(n)
@@ -0,0 +1,67 @@
+"""
+:分词缓存在一次话题任务中的收益
+模拟同一批博文依次经过：爬虫关键词提取、词云、按用户分组的词云（SinglePass 中的用户标签），
+比较每个阶段都清空缓存（相当于没有跨阶段共享）与共享缓存两种情况，要求结果一致
+运行: python -m benchmarks.bench_token_cache
+"""
+import os
+import random
+import time
+
+from celery_task.utils.gsdmmCluster.normalization import token_cache
+from celery_task.utils.my_cloud import MyCloud
+
+DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "celery_task", "utils", "themeCluster", "data", "test_data2.txt",
+)
+
+
+def load_texts(size: int) -> list:
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    rand = random.Random(size)
+    # 话题下有大量转发，文本重复较多
+    return [rand.choice(lines) + " " for _ in range(size)]
+
+
+def run_stages(texts: list, share: bool) -> list:
+    groups = [texts[i::10] for i in range(10)]
+    stages = [
+        lambda: MyCloud.keywords_for_many(texts),
+        lambda: MyCloud(texts).GetWordCloud(),
+        lambda: [MyCloud(group).GetWordCloud() for group in groups],
+    ]
+    results = []
+    for stage in stages:
+        if not share:
+            token_cache.clear()
+        results.append(stage())
+    return results
+
+
+def bench(size: int):
+    texts = load_texts(size)
+
+    token_cache.clear()
+    start = time.perf_counter()
+    expected = run_stages(texts, share=False)
+    isolated_cost = time.perf_counter() - start
+
+    token_cache.clear()
+    start = time.perf_counter()
+    result = run_stages(texts, share=True)
+    shared_cost = time.perf_counter() - start
+
+    assert result == expected, "共享缓存后结果不一致"
+    stats = token_cache.stats()
+    print("{:>6} texts  per-stage {:6.2f}s  shared {:6.2f}s  x{:.1f}  hits {} misses {}".format(
+        size, isolated_cost, shared_cost, isolated_cost / shared_cost,
+        stats["local_hits"] + stats["redis_hits"], stats["misses"]))
+
+
+if __name__ == "__main__":
+    MyCloud([""]).GetKeyWord()  # 预热jieba词典
+    token_cache.redis_enabled = False  # 只测进程内缓存
+    for n in (1000, 10000):
+        bench(n)
@@ -0,0 +1,51 @@
+"""
+:繁体转简体的回归校验与性能对比
+在回归语料上比较 langconv 的 Converter('zh-hans') 与 SimplifiedConverter，要求输出逐字一致
+语料包括：测试博文、将测试博文转为繁体后的文本、由 zh2Hans 词条随机拼接的文本
+运行: python -m benchmarks.bench_zh_converter
+"""
+import os
+import random
+import time
+
+from celery_task.utils.gsdmmCluster.langconv import Converter
+from celery_task.utils.gsdmmCluster.zh_converter import simplified_converter
+from celery_task.utils.gsdmmCluster.zh_wiki import zh2Hans
+
+DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "celery_task", "utils", "themeCluster", "data", "test_data2.txt",
+)
+
+
+def build_corpus() -> dict:
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        plain = [line.rstrip("\n") for line in f]
+    traditional = [Converter("zh-hant").convert(line) for line in plain]
+    rand = random.Random(0)
+    words = list(zh2Hans.keys()) + ["中", "国", " ", "a"]
+    mixed = [
+        "".join(rand.choice(words) for _ in range(rand.randint(0, 40)))
+        for _ in range(20000)
+    ]
+    return {"plain": plain, "traditional": traditional, "mixed": mixed}
+
+
+def bench(name: str, texts: list):
+    start = time.perf_counter()
+    expected = [Converter("zh-hans").convert(text) for text in texts]
+    langconv_cost = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = simplified_converter.convert_many(texts)
+    converter_cost = time.perf_counter() - start
+
+    for text, left, right in zip(texts, expected, result):
+        assert left == right, "转换结果不一致: {!r} -> {!r} / {!r}".format(text, left, right)
+    print("{:>12} {:>6} texts  langconv {:6.2f}s  compiled {:6.3f}s  x{:.1f}".format(
+        name, len(texts), langconv_cost, converter_cost, langconv_cost / converter_cost))
+
+
+if __name__ == "__main__":
+    for corpus_name, corpus in build_corpus().items():
+        bench(corpus_name, corpus)
@@ -6,7 +6,11 @@
 from .obj import (
     mongo_conf,
     celery_conf,
-    es_conf
+    es_conf,
+    token_cache_conf,
+    cookie_provider_conf,
+    rate_limit_conf,
+    user_profile_conf
 )
 import logging
 from jsonformatter import JsonFormatter
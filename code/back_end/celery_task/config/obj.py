@@ -6,9 +6,17 @@
 from .task_config_class import (
     MongoConfig,
     CeleryConfig,
-    ElasticSearchConfig
+    ElasticSearchConfig,
+    TokenCacheConfig,
+    CookieProviderConfig,
+    RateLimitConfig,
+    UserProfileConfig
 )
 
 mongo_conf = MongoConfig()
 celery_conf = CeleryConfig()
 es_conf = ElasticSearchConfig()
+token_cache_conf = TokenCacheConfig()
+cookie_provider_conf = CookieProviderConfig()
+rate_limit_conf = RateLimitConfig()
+user_profile_conf = UserProfileConfig()
@@ -26,6 +26,68 @@ class CeleryConfig(BaseSettings):
         return f"redis://{redis_host}:{redis_port}/1"
 
 
+class TokenCacheConfig(BaseSettings):
+    """
+    分词缓存的相关配置
+    """
+
+    # 进程内 LRU 缓存的最大条数
+    LOCAL_SIZE: int = int(os.getenv("TOKEN_CACHE_LOCAL_SIZE", "100000"))
+    # 是否启用 Redis 二级缓存，供多个 worker 共享分词结果
+    REDIS_ENABLED: bool = os.getenv("TOKEN_CACHE_REDIS", "1") == "1"
+    # Redis 中缓存的过期时间（秒）
+    REDIS_TTL: int = int(os.getenv("TOKEN_CACHE_TTL", str(3 * 24 * 3600)))
+
+    @property
+    def REDIS_URL(self):
+        redis_host = os.getenv("REDIS_HOST", "127.0.0.1")
+        redis_port = os.getenv("REDIS_PORT", "6379")
+        return f"redis://{redis_host}:{redis_port}/2"
+
+
+class CookieProviderConfig(BaseSettings):
+    """
+    爬虫 Cookie 缓存的相关配置
+    """
+
+    # 检查配置文件修改时间与 Redis 中账号版本号的最小间隔（秒），间隔内的请求不做任何 I/O
+    CHECK_INTERVAL: float = float(os.getenv("COOKIE_CHECK_INTERVAL", "10"))
+    # 是否通过 Redis 接收 account_update 接口下发的账号
+    REDIS_ENABLED: bool = os.getenv("COOKIE_REDIS", "1") == "1"
+
+    @property
+    def REDIS_URL(self):
+        redis_host = os.getenv("REDIS_HOST", "127.0.0.1")
+        redis_port = os.getenv("REDIS_PORT", "6379")
+        return f"redis://{redis_host}:{redis_port}/2"
+
+
+class RateLimitConfig(BaseSettings):
+    """
+    跨 worker 共享限流器的相关配置
+    """
+
+    # 是否通过 Redis 在所有 worker 之间共享限流状态，关闭或 Redis 不可用时退化为进程内限流
+    REDIS_ENABLED: bool = os.getenv("RATE_LIMIT_REDIS", "1") == "1"
+
+    @property
+    def REDIS_URL(self):
+        redis_host = os.getenv("REDIS_HOST", "127.0.0.1")
+        redis_port = os.getenv("REDIS_PORT", "6379")
+        return f"redis://{redis_host}:{redis_port}/2"
+
+
+class UserProfileConfig(BaseSettings):
+    """
+    用户资料缓存的相关配置
+    """
+
+    # 查询成功的用户资料缓存时间（秒）
+    TTL: int = int(os.getenv("USER_PROFILE_TTL", str(7 * 24 * 3600)))
+    # 查询失败（所有数据源都没有返回）的缓存时间（秒），期间不再重复查询该用户
+    NEGATIVE_TTL: int = int(os.getenv("USER_PROFILE_NEGATIVE_TTL", str(30 * 60)))
+
+
 class MongoConfig(BaseSettings):
     """
     Mongo的相关配置
@@ -46,17 +108,23 @@ class MongoConfig(BaseSettings):
     RETWEET: str = "tag_weibo_task"
     CLOUD: str = "tag_word_cloud"
     USER: str = "tag_user"
+    # 跨任务共享的用户资料缓存，键为 user_id
+    USER_PROFILE: str = "user_profile"
     WEIBO: str = "weibo"  # 微博数据collection
 
     # 评论任务数据库名称
     COMMENT_TASK = "comment_task"
     COMMENT_REPOSTS = "comment_reposts"
+    # 转发爬取进度（页完成位图与游标）
+    COMMENT_REPOST_CRAWL = "comment_repost_crawl"
     COMMENT_CLOUD = "comment_cloud"
     COMMENT_CLUSTER = "comment_cluster"
     COMMENT_NODE = "comment_node"
     COMMENT_TENDENCY = "comment_tendency"
     COMMENT_TOPIC = "comment_topic"
     COMMENT_TREE = "comment_tree"
+    # 传播树节点，每个节点一个文档
+    COMMENT_TREE_NODE = "comment_tree_node"
 
 
 class ElasticSearchConfig(BaseSettings):
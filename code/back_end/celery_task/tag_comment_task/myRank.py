@@ -1,88 +1,89 @@
-def LeaderRank(LR_dic, undirected, degree_dic, temp_account):
-    temp_number = 0
-    for i in temp_account:
-        for j in undirected[i]:
-            temp_number += LR_dic[j] / degree_dic[j]
-        LR_dic[i] = temp_number
-        temp_number = 0
-    return LR_dic
-
-
-def proTask(database_dict, redatabase_dict, account):
-    ground_node = "G"
-    degree_dic = dict()
-    undirected = dict()
-    temp_account_list = []
-    for i in account:
-        if i in database_dict.keys():
-            for j in database_dict[i]:
-                temp_account_list.append(j)
-
-        if i in redatabase_dict.keys():
-            for j in redatabase_dict[i]:
-                temp_account_list.append(j)
-
-        temp = list(set(tuple(temp_account_list)))
-        temp.append(ground_node)
-        undirected[i] = temp
-        degree_dic[i] = len(temp)
-        temp_account_list = []
-
-    degree_dic[ground_node] = len(account)
-
-    undirected[ground_node] = account
-
-    temp_account = account[:]
-
-    temp_account.append(ground_node)
-
-    LR_dic = dict()
-    # 节点赋值
-    for i in account:
-        LR_dic[i] = 1
-
-    LR_dic[ground_node] = 0
-
-    return LR_dic, undirected, degree_dic, temp_account
-
-
-def startRank(database_dict, redatabase_dict, account):
-    LR_dic, undirected, degree_dic, temp_account = proTask(database_dict, redatabase_dict, account)
-    temp = LR_dic
-    for i in range(100):
-
-        temp1 = list(temp.values())
-
-        temp = LeaderRank(temp, undirected, degree_dic, temp_account)
-
-        counter = 0
-
-        temp2 = list(temp.values())
-
-        for i in range(len(temp1)):
-            try:
-
-                if 0.9 <= temp1[i] / temp2[i] <= 1.1:
-                    counter += 1
-            except:
-                pass
-        if counter == len(temp1):
+"""
+:转发关系网的 LeaderRank 关键节点计算
+图的定义与原来的字典实现相同：每个账号与其转发者（database_dict / redatabase_dict 中的邻居）以及背景节点 G 相连，
+G 与所有账号相连；账号 i 的得分为 sum(LR[j] / degree[j])，j 取 i 的邻居。
+邻接矩阵只构建一次，用 scipy.sparse 矩阵乘向量迭代到 L1 收敛
+"""
+import numpy as np
+from scipy import sparse
+
+GROUND_NODE = "G"
+
+
+def build_rank_matrix(database_dict, redatabase_dict, account):
+    """
+    构建 LeaderRank 的转移矩阵 M，M[i, j] = 1 / degree[j]（j 为 i 的邻居），最后一行/列为背景节点 G
+    :param database_dict: {账号: 邻居集合（可迭代）}
+    :param redatabase_dict: {账号: 邻居集合（可迭代）}
+    :param account: 账号列表
+    :return: (节点名列表, csr 矩阵)
+    """
+    ground = len(account)
+    index = {name: i for i, name in enumerate(account)}
+    degree = np.empty(ground + 1)
+    rows, cols = [], []
+    for i, name in enumerate(account):
+        neighbours = set(database_dict.get(name, ()))
+        neighbours.update(redatabase_dict.get(name, ()))
+        cols.extend(index[j] for j in neighbours)
+        cols.append(ground)
+        rows.extend([i] * (len(neighbours) + 1))
+        degree[i] = len(neighbours) + 1
+    degree[ground] = ground
+    # G 与所有账号相连
+    rows = np.concatenate([np.asarray(rows, dtype=np.int64), np.full(ground, ground, dtype=np.int64)])
+    cols = np.concatenate([np.asarray(cols, dtype=np.int64), np.arange(ground, dtype=np.int64)])
+    matrix = sparse.csr_matrix((1.0 / degree[cols], (rows, cols)), shape=(ground + 1, ground + 1))
+    return list(account) + [GROUND_NODE], matrix
+
+
+def leader_rank(matrix, tol=1e-9, max_iter=1000):
+    """
+    幂迭代求得分向量，初值为账号 1、G 为 0；每轮把总分缩放回初始总分，L1 变化量小于 tol * 总分时停止
+    :param matrix: build_rank_matrix 返回的矩阵
+    :return: 得分向量，最后一个元素为 G
+    """
+    scores = np.ones(matrix.shape[0])
+    scores[-1] = 0
+    total = scores.sum()
+    if total == 0:
+        return scores
+    for _ in range(max_iter):
+        new_scores = matrix @ scores
+        new_total = new_scores.sum()
+        if new_total == 0:
             break
-    # print(sorted(list(temp.values()), reverse=True))
-    return sorted(temp.items(), key=lambda kv: (kv[1], kv[0]), reverse=True)[0:10]
-    #
-    # f = open(r'LR', 'w')
-    # f.write(str(temp))
-    # f.close()
-
-if __name__=='__main__':
+        new_scores *= total / new_total
+        delta = np.abs(new_scores - scores).sum()
+        scores = new_scores
+        if delta < tol * total:
+            break
+    return scores
+
+
+def top_k(names, scores, k=10):
+    """
+    按 (得分, 节点名) 降序取前 k 个；先用 argpartition 取出候选，再对候选排序。
+    得分保留 9 位小数参与排序，数值误差不会打乱同分节点按名字的顺序
+    :return: [(节点名, 得分), ]
+    """
+    k = min(k, len(names))
+    if k == 0:
+        return []
+    rounded = np.round(scores, 9)
+    threshold = rounded[np.argpartition(-rounded, k - 1)[k - 1]]
+    candidates = np.flatnonzero(rounded >= threshold)
+    ranked = sorted(candidates.tolist(), key=lambda i: (rounded[i], names[i]), reverse=True)[:k]
+    return [(names[i], float(scores[i])) for i in ranked]
+
+
+def startRank(database_dict, redatabase_dict, account, k=10):
+    """
+    兼容原接口：返回得分最高的 k 个节点（包含 G），格式为 [(节点名, 得分), ]
+    """
+    names, matrix = build_rank_matrix(database_dict, redatabase_dict, account)
+    return top_k(names, leader_rank(matrix), k)
+
+
+if __name__ == '__main__':
     pass
-
-
-
-
-
-
-
-
-
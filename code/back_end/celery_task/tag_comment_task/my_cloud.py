@@ -2,7 +2,9 @@
 import jieba
 import pymongo
 from celery_task.utils.tfidfCluster.langconv import *
-from celery_task.utils.gsdmmCluster.normalization import normalize_corpus_part
+from celery_task.utils.gsdmmCluster.normalization import text_normalizer
+from celery_task.utils.gsdmmCluster.zh_converter import simplified_converter
+from celery_task.utils.lexicon import ADVERTISEMENT_WORDS, hit_stopwords
 from celery_task.config import mongo_conf
 from celery_task.utils import mongo_client
 
@@ -13,7 +15,7 @@ def Traditional2Simplified(sentence):
     :param sentence: 待转换的句子
     :return: 将句子中繁体字转换为简体字之后的句子
     '''
-    sentence = Converter('zh-hans').convert(sentence)
+    sentence = simplified_converter.convert(sentence)
     return sentence
 
 
@@ -28,7 +30,7 @@ def Sent2Word(sentence):
     Returns:
         words: A tokenized word list.
     """
-    global stop_words
+    stop_words = hit_stopwords()
 
     words = jieba.cut(sentence)
     words = [w for w in words if w not in stop_words]
@@ -38,7 +40,7 @@ def Sent2Word(sentence):
 
 def Match(content):
     content_comment = []
-    advertisement = ["王者荣耀", "券后", "售价", '¥', "￥", '下单', '转发微博', '转发', '微博']
+    advertisement = ADVERTISEMENT_WORDS
     words = []
     for k in range(0, len(content)):
         judge = []
@@ -80,6 +82,17 @@ def getRepostSent(tag_comment_task_id):
     return sent
 
 
+def iterRepostSent(tag_comment_task_id):
+    """
+    以游标方式逐条读取转发内容，只取 content 字段
+    :param tag_comment_task_id: 评论任务id
+    :return: 生成器
+    """
+    my_query = {"tag_comment_task_id": tag_comment_task_id}
+    for item in mongo_client.db[mongo_conf.COMMENT_REPOSTS].find(my_query, {"content": 1, "_id": 0}):
+        yield item['content']
+
+
 def countWords(sent_words):
     words_dict = dict()
     for words in sent_words:
@@ -106,12 +119,10 @@ def reshapeDict(words_dict):
 
 
 def preContent(tag_comment_task_id=None, doc_id=None):
-    print("回复读取")
-    content = getRepostSent(tag_comment_task_id)
-
-    print("分词")
+    print("回复读取 + 分词")
+    content = iterRepostSent(tag_comment_task_id)
     # sent_words_a = Match(content)
-    sent_words_b = normalize_corpus_part(content)
+    sent_words_b = (words for _, words in text_normalizer.normalize_stream(content))
 
     print("统计")
     # words_dict_a = countWords(sent_words_a)
@@ -15,6 +15,7 @@ MONGO_DB = "test"
 # col_tree = mydb[mongo_conf.COMMENT_TREE]
 col_repost = mongo_client.db[mongo_conf.COMMENT_REPOSTS]
 col_tree = mongo_client.db[mongo_conf.COMMENT_TREE]
+col_tree_node = mongo_client.db[mongo_conf.COMMENT_TREE_NODE]
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/69.0.3497.92 Safari/537.36",
@@ -24,6 +25,12 @@ HEADERS = {
 
 
 class MyTree:
+    """
+    传播树构建：节点以父指针数组保存，(父节点, 用户名) -> 节点 的索引保证每层查找 O(1)，
+    一条转发路径只需遍历一次；嵌套的树结构只在 get_tree 时生成。
+    节点编号按创建顺序递增，子节点的编号总是大于父节点
+    """
+
     def __init__(self, root_node):
         """
         :param root_node: 传播树根节点
@@ -32,66 +39,139 @@ class MyTree:
          "content": "",
          "children": {}}
         """
-        self.tree = root_node
+        self.root = root_node
+        # 用户名只 strip 一次，原始用户名 -> 用户名编号
+        self._name_ids = {}
+        self.names = []
+        # 节点 0 为根节点
+        self.parent = [-1]
+        self.depth = [0]
+        self.name_id = [-1]
+        self.user_id = [root_node.get("user_id")]
+        self.content = [root_node.get("content")]
+        self._child_index = {}
+
+    def __len__(self):
+        return len(self.parent)
+
+    def intern_name(self, user_name):
+        """
+        :param user_name: 原始用户名
+        :return: 去掉首尾空白后的用户名编号
+        """
+        name_id = self._name_ids.get(user_name)
+        if name_id is None:
+            name = (user_name or "").strip()
+            name_id = self._name_ids.get(name)
+            if name_id is None:
+                name_id = len(self.names)
+                self.names.append(name)
+                self._name_ids[name] = name_id
+            self._name_ids[user_name] = name_id
+        return name_id
+
+    def _child(self, parent, user_name, content, user_id=0):
+        key = (parent, self.intern_name(user_name))
+        node = self._child_index.get(key)
+        if node is None:
+            node = len(self.parent)
+            self._child_index[key] = node
+            self.parent.append(parent)
+            self.depth.append(self.depth[parent] + 1)
+            self.name_id.append(key[1])
+            self.user_id.append(user_id)
+            self.content.append(content)
+        return node
+
+    def add_path(self, repost, user_name, user_id, content):
+        """
+        插入一条转发路径
+        :param repost: 转发链，顺序与爬虫存储的一致（离根节点最远的在前）
+        :param user_name: 末端节点用户名
+        :param user_id: 末端节点用户id
+        :param content: 末端节点转发内容
+        :return: 末端节点编号
+        """
+        node = 0
+        for item in reversed(repost or ()):
+            node = self._child(node, item.get("user_name"), item.get("content"))
+        node = self._child(node, user_name, content, user_id)
+        # 末端节点已存在时只更新用户id
+        self.user_id[node] = user_id
+        return node
 
     def append_point_to_tree(self, path, end_node):
         """
         将一条路径组织为树，路径为节点的列表
-        :param path: 路径
+        :param path: 路径（离根节点最近的在前）
         :param end_node: 末端节点
-        :return:
+        :return: 末端节点编号
         """
-        now_position = self.tree
-        index = 0
-        while index < len(path):
-            if now_position["children"].__contains__(path[index]["user_name"].strip()):
-                now_position = now_position["children"][
-                    path[index]["user_name"].strip()
-                ]
-                index += 1
-
-            else:
-                # 创建新节点
-                now_position["children"][path[index]["user_name"].strip()] = {
-                    "user_id": 0,
-                    "user_name": path[index]["user_name"].strip(),
-                    "content": path[index]["content"],
-                    "children": {},
-                }
-
-        # 添加end节点信息
-        if now_position["children"].__contains__(end_node["user_name"].strip()):
-            now_position["children"][end_node["user_name"].strip()]["user_id"] = (
-                end_node["user_id"]
-            )
-            index += 1
-
-        else:
-            # 创建新节点
-            now_position["children"][end_node["user_name"].strip()] = {
-                "user_id": end_node["user_id"],
-                "user_name": end_node["user_name"].strip(),
-                "content": end_node["content"],
-                "children": {},
-            }
-        return self.tree
+        return self.add_path(path[::-1], end_node["user_name"], end_node["user_id"], end_node["content"])
 
     # 多条路径一次性插入到树中
     def insert_list_to_tree(self, paths):
         for path in paths:
-            path["repost"].reverse()
-            print(path)
-            print(path["repost"])
-            end_node = {
-                "user_id": path["user_id"],
-                "user_name": path["user_name"].strip(),
-                "content": path["content"],
+            self.add_path(path["repost"], path["user_name"], path["user_id"], path["content"])
+
+    def get_tree(self):
+        """
+        生成嵌套结构的传播树，子节点顺序与插入顺序一致
+        :return: 根节点
+        """
+        tree = dict(self.root, children={})
+        nodes = [tree]
+        for node in range(1, len(self.parent)):
+            name = self.names[self.name_id[node]]
+            item = {
+                "user_id": self.user_id[node],
+                "user_name": name,
+                "content": self.content[node],
                 "children": {},
             }
-            self.append_point_to_tree(path["repost"], end_node)
+            nodes.append(item)
+            nodes[self.parent[node]]["children"][name] = item
+        return tree
 
-    def get_tree(self):
-        return self.tree
+    def subtree_stats(self):
+        """
+        逆序遍历一次统计每个节点的子树规模（不含自身，与 statisticsRepost 的统计口径一致）与直接子节点数
+        :return: (子树规模列表, 子节点数列表)
+        """
+        sizes = [0] * len(self.parent)
+        child_counts = [0] * len(self.parent)
+        for node in range(len(self.parent) - 1, 0, -1):
+            parent = self.parent[node]
+            sizes[parent] += sizes[node] + 1
+            child_counts[parent] += 1
+        return sizes, child_counts
+
+    def to_documents(self, tag_comment_task_id):
+        """
+        生成节点文档，path 为根节点到该节点的编号路径，如 "0/3/17"
+        :param tag_comment_task_id: 评论任务id
+        :return: 节点文档生成器
+        """
+        sizes, child_counts = self.subtree_stats()
+        paths = ["0"]
+        for node in range(len(self.parent)):
+            if node:
+                paths.append(paths[self.parent[node]] + "/" + str(node))
+                user_name = self.names[self.name_id[node]]
+            else:
+                user_name = (self.root.get("user_name") or "").strip()
+            yield {
+                "tag_comment_task_id": tag_comment_task_id,
+                "node_id": node,
+                "parent_id": self.parent[node],
+                "depth": self.depth[node],
+                "path": paths[node],
+                "subtree_size": sizes[node],
+                "child_count": child_counts[node],
+                "user_id": self.user_id[node],
+                "user_name": user_name,
+                "content": self.content[node],
+            }
 
 
 def get_root_node(tag_comment_task_id="1629963031KukLkmL4i"):
@@ -118,107 +198,133 @@ def get_root_node(tag_comment_task_id="1629963031KukLkmL4i"):
 
 
 def init_tree_doc(task_id):
-    return col_tree.insert({"tag_comment_task_id": task_id, "data": {}})
+    return col_tree.insert({"tag_comment_task_id": task_id})
 
 
-@celeryapp.task(bind=True)
-def get_path_tree(self, task_id, doc_id):
-    my_tree = MyTree(get_root_node(task_id))
-    myquery = {"task_id": task_id}
-    mydoc = col_repost.find(myquery)
-    for index, path in enumerate(mydoc):
-        path["repost"].reverse()
-        end_node = {
-            "user_id": path["user_id"],
-            "user_name": path["user_name"].strip(),
-            "content": path["content"],
-            "children": {},
-        }
-        my_tree.append_point_to_tree(path["repost"], end_node)
-        self.update_state(
-            state="PROGRESS",
-            meta={"current": index + 1, "total": mydoc.count(), "task_id": task_id},
-        )
-        if (index + 1) % 500 == 0:
-            col_tree.update_one(
-                {"_id": ObjectId(doc_id)}, {"$set": {"data": my_tree.get_tree()}}
-            )
-    col_tree.update_one(
-        {"_id": ObjectId(doc_id)}, {"$set": {"data": my_tree.get_tree()}}
+# 转发路径中建树需要的字段
+REPOST_PROJECTION = {"repost": 1, "user_id": 1, "user_name": 1, "content": 1, "_id": 0}
+CURSOR_BATCH_SIZE = 1000
+CHECKPOINT_INTERVAL = 500
+NODE_BATCH_SIZE = 1000
+
+
+def ensure_tree_node_indexes():
+    """
+    传播树节点集合的索引，create_index 可重复调用
+    """
+    col_tree_node.create_index(
+        [("tag_comment_task_id", pymongo.ASCENDING), ("node_id", pymongo.ASCENDING)], unique=True
     )
-    # with open("./data1.json", "w", encoding="utf-8") as f:
-    #     json.dump(my_tree.get_tree(), f, ensure_ascii=False)
+    col_tree_node.create_index([("tag_comment_task_id", pymongo.ASCENDING), ("parent_id", pymongo.ASCENDING)])
+    col_tree_node.create_index([("tag_comment_task_id", pymongo.ASCENDING), ("depth", pymongo.ASCENDING)])
+    col_tree_node.create_index([("tag_comment_task_id", pymongo.ASCENDING), ("path", pymongo.ASCENDING)])
 
 
-def get_path_tree_part(tag_comment_task_id, doc_id):
+def save_tree_nodes(my_tree, tag_comment_task_id):
+    """
+    以每个节点一个文档的形式保存传播树，先清除该任务已有的节点
+    :param my_tree: MyTree
+    :param tag_comment_task_id: 评论任务id
+    """
+    ensure_tree_node_indexes()
+    col_tree_node.delete_many({"tag_comment_task_id": tag_comment_task_id})
+    batch = []
+    for doc in my_tree.to_documents(tag_comment_task_id):
+        batch.append(doc)
+        if len(batch) >= NODE_BATCH_SIZE:
+            col_tree_node.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        col_tree_node.insert_many(batch, ordered=False)
+
+
+def build_path_tree(tag_comment_task_id, query, doc_id, on_progress=None):
+    """
+    按查询条件流式读取转发路径并构建传播树；构建过程中每 CHECKPOINT_INTERVAL 条只写入进度，
+    最后把节点写入 comment_tree_node，comment_tree 文档只保存概要信息
+    :param tag_comment_task_id: 评论任务id
+    :param query: comment_reposts 查询条件
+    :param doc_id: comment_tree 文档id
+    :param on_progress: 进度回调 on_progress(已处理条数)
+    :return: MyTree
+    """
     my_tree = MyTree(get_root_node(tag_comment_task_id))
-    myquery = {"tag_comment_task_id": tag_comment_task_id}
-    mydoc = col_repost.find(myquery)
-    for index, path in enumerate(mydoc):
-        path["repost"].reverse()
-        end_node = {
-            "user_id": path.get("user_id"),
-            "user_name": path.get("user_name".strip()),
-            "content": path.get("content"),
-            "children": {},
-        }
-        my_tree.append_point_to_tree(path["repost"], end_node)
-        if (index + 1) % 500 == 0:
+    cursor = col_repost.find(query, REPOST_PROJECTION, batch_size=CURSOR_BATCH_SIZE)
+    count = 0
+    for path in cursor:
+        my_tree.add_path(path.get("repost"), path.get("user_name"), path.get("user_id"), path.get("content"))
+        count += 1
+        if count % CHECKPOINT_INTERVAL == 0:
             col_tree.update_one(
-                {"_id": ObjectId(doc_id)}, {"$set": {"data": my_tree.get_tree()}}
+                {"_id": ObjectId(doc_id)},
+                {"$set": {"progress": {"current": count, "nodes": len(my_tree)}}},
             )
+            if on_progress:
+                on_progress(count)
+    save_tree_nodes(my_tree, tag_comment_task_id)
     col_tree.update_one(
-        {"_id": ObjectId(doc_id)}, {"$set": {"data": my_tree.get_tree()}}
+        {"_id": ObjectId(doc_id)},
+        {
+            "$set": {
+                "progress": {"current": count, "nodes": len(my_tree)},
+                "node_count": len(my_tree),
+                "max_depth": max(my_tree.depth),
+            },
+            # 旧版本把整棵树嵌套保存在 data 字段中
+            "$unset": {"data": ""},
+        },
     )
+    return my_tree
 
 
-# 转换tree数据结构
-def editJson(item):
-    children_list = [i for i in item["children"].values()]
-    item["children"] = children_list
-    item["name"] = item.pop("user_name")
-    item["value"] = item.pop("content")
-    item.pop("user_id")
-    for i in item["children"]:
-        editJson(i)
-
-
-def get_tree_data(task_id):
-    try:
-        data = col_tree.find_one({"tag_comment_task_id": task_id})
-        if data:
-            editJson(data["data"])
-            return {
-                "tag_comment_task_id": data["tag_comment_task_id"],
-                "data": data["data"],
-            }
-    except Exception as e:
-        return {"error": str(e)}
+def load_tree_graph(tag_comment_task_id):
+    """
+    读取传播树节点，生成 LeaderRank 需要的数据；同名节点的转发数取其中最大的子树规模
+    :param tag_comment_task_id: 评论任务id
+    :return: (节点名集合, {父节点名: {子节点名: {}}}, {节点名: 转发数})
+    """
+    names = {}
+    nodes = set()
+    edges = {}
+    total = {}
+    cursor = col_tree_node.find(
+        {"tag_comment_task_id": tag_comment_task_id},
+        {"_id": 0, "node_id": 1, "parent_id": 1, "user_name": 1, "subtree_size": 1},
+        batch_size=CURSOR_BATCH_SIZE,
+    ).sort("node_id", pymongo.ASCENDING)
+    for doc in cursor:
+        name = doc["user_name"]
+        names[doc["node_id"]] = name
+        nodes.add(name)
+        total[name] = max(total.get(name, 0), doc["subtree_size"])
+        parent = names.get(doc["parent_id"])
+        if parent is not None:
+            edges.setdefault(parent, {})[name] = {}
+    return nodes, edges, total
 
 
-# 转换tree数据结构-->leader rank 数据结构
-def editJson4Graph(item, nodes, edges):
-    nodes.add(item["user_name"].strip())
-    if item["children"]:
-        edges[item["user_name"].strip()] = {}
-        children_list = [i for i in item["children"].values()]
+@celeryapp.task(bind=True)
+def get_path_tree(self, task_id, doc_id):
+    myquery = {"task_id": task_id}
+    total = col_repost.count_documents(myquery)
 
-        for i in children_list:
-            editJson4Graph(i, nodes, edges)
-            i.pop("children")
-            edges[item["user_name"].strip()][i["user_name"].strip()] = i
+    def on_progress(current):
+        self.update_state(
+            state="PROGRESS",
+            meta={"current": current, "total": total, "task_id": task_id},
+        )
 
+    build_path_tree(task_id, myquery, doc_id, on_progress)
+    # with open("./data1.json", "w", encoding="utf-8") as f:
+    #     json.dump(my_tree.get_tree(), f, ensure_ascii=False)
 
-def node(task_id):
-    try:
-        nodes = set()
-        edges = {}
-        data = col_tree.find_one({"tag_comment_task_id": task_id})
-        if data:
-            editJson4Graph(data["data"], nodes, edges)
-            # return {'task_id': data['task_id'], 'data': data['data']}
-    except Exception as e:
-        return {"error": str(e)}
+
+def get_path_tree_part(tag_comment_task_id, doc_id):
+    build_path_tree(
+        tag_comment_task_id,
+        {"tag_comment_task_id": tag_comment_task_id},
+        doc_id,
+    )
 
 
 if __name__ == "__main__":
@@ -237,4 +343,3 @@ if __name__ == "__main__":
     # with open("../data1.json", "w", encoding="utf-8") as f:
     #     json.dump(my_tree.get_tree(), f)
     test = get_root_node()
-    node("1622465660KhQes4VMs")
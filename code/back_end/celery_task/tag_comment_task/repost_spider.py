@@ -6,87 +6,78 @@
 import requests
 import re
 import datetime
-import random
+import hashlib
 import logging
 import sys
 import os
+import queue
+import threading
+from bson import Binary
 from lxml import etree
+from pymongo import ASCENDING, UpdateOne
 from celery_task import celeryapp
 import time
 
 from celery_task.config import mongo_conf
 from celery_task.utils import mongo_client
+from celery_task.utils.cookie_provider import cookie_provider
+from celery_task.utils.rate_limit import TokenBucket
 
 # 添加配置模块路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', '..'))
 try:
-    from config import get_mobile_cookies, get_user_agent, get_delay_range, get_repost_max_pages, get_page_size
+    from config import get_delay_range, get_repost_max_pages, get_page_size
     USE_UNIFIED_CONFIG = True
 except ImportError:
     USE_UNIFIED_CONFIG = False
 
+# 加载任务配置
+try:
+    from config.config_class import TaskConfig
+    task_config = TaskConfig()
+    REPOST_ACCOUNT_RATE = task_config.REPOST_ACCOUNT_RATE
+    REPOST_ACCOUNT_BURST = task_config.REPOST_ACCOUNT_BURST
+except ImportError:
+    REPOST_ACCOUNT_RATE = 0.18
+    REPOST_ACCOUNT_BURST = 1
+
 logger = logging.getLogger()
 
 BASE_DOMAIN = "https://weibo.cn"
 
 
+def _get_mobile_cookies():
+    """
+    全部移动端 Cookie，由 cookie_provider 缓存，配置变化时才重新读取
+    """
+    return cookie_provider.cookies()
+
+
 def _get_mobile_cookie():
     """
-    从统一配置文件或 account.json 动态读取移动端 Cookie
+    按轮询顺序取一个移动端 Cookie
     """
-    # 优先使用统一配置
-    if USE_UNIFIED_CONFIG:
-        try:
-            cookies = get_mobile_cookies()
-            if cookies and len(cookies) > 0:
-                logger.info("成功从统一配置文件加载 Cookie")
-                return cookies[0]
-        except Exception as e:
-            logger.warning(f"从统一配置加载 Cookie 失败: {e}")
-    
-    # 回退到 account.json
-    import json
-    possible_paths = [
-        os.path.join(os.path.dirname(__file__), '..', '..', '..', 'weibo_crawler', 'account', 'account.json'),
-        '/home/song/code/graduation/Topic_and_user_profile_analysis_system/code/weibo_crawler/account/account.json',
-        'account/account.json',
-        '../weibo_crawler/account/account.json',
-    ]
-    
-    for path in possible_paths:
-        try:
-            abs_path = os.path.abspath(path)
-            if os.path.exists(abs_path):
-                with open(abs_path, 'r', encoding='utf-8') as f:
-                    account_data = json.load(f)
-                    cookies = account_data.get('cookies_mobile', account_data.get('cookies', []))
-                    if cookies and len(cookies) > 0:
-                        logger.info(f"成功从 {abs_path} 加载 Cookie")
-                        return cookies[0]
-        except Exception as e:
-            logger.warning(f"从 {path} 加载 Cookie 失败: {e}")
-            continue
-    
-    logger.error("无法加载 Cookie，所有路径都失败了")
-    return ""
+    return cookie_provider.next_cookie()
 
 
 def _get_user_agent():
     """获取 User-Agent"""
-    if USE_UNIFIED_CONFIG:
-        try:
-            return get_user_agent()
-        except:
-            pass
-    return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    return cookie_provider.user_agent()
 
 
-def _get_headers():
-    """获取带有最新 Cookie 的请求头"""
-    return {
-        "User-Agent": _get_user_agent(),
-        "Cookie": _get_mobile_cookie(),
-    }
+def _get_headers(cookie=None):
+    """
+    获取带有最新 Cookie 的请求头
+    :param cookie: 指定账号的 Cookie，为 None 时按轮询顺序取一个账号
+    """
+    return cookie_provider.headers(cookie)
+
+
+def _get_account_headers():
+    """
+    每个移动端账号一份请求头，没有配置账号时返回一份空 Cookie 的请求头
+    """
+    return [_get_headers(cookie) for cookie in _get_mobile_cookies()] or [_get_headers("")]
 
 
 def _get_delay():
@@ -212,18 +203,17 @@ def get_repost_list(repo_node, pre_content):
     return repost_list
 
 
-def spider(tag_task_id: str, weibo_id="K7okwxcKa", page=93, tag_comment_task_id=9999):
+def spider(tag_task_id: str, weibo_id="K7okwxcKa", page=93, tag_comment_task_id=9999, headers=None):
     """
     爬取微博评论函数
     :param tag_task_id: 话题任务id
     :param tag_comment_task_id: 评论任务id
     :param weibo_id:微博id
     :param page: 起始页数
-    :param task_id: 任务id
-    :return:
+    :param headers: 请求头，为 None 时动态获取最新的 Cookie
+    :return: 该页的转发列表（该页没有转发时为空列表）；请求失败或不是转发页（如登录页）时为 None
     """
-    # 每次请求时动态获取最新的 Cookie
-    current_headers = _get_headers()
+    current_headers = headers or _get_headers()
     try:
         response = requests.get(
             "{domain}/repost/{weibo_id}?page={page}".format(
@@ -234,23 +224,23 @@ def spider(tag_task_id: str, weibo_id="K7okwxcKa", page=93, tag_comment_task_id=
         )
     except Exception as e:
         logger.warning(f"Request failed for weibo_id {weibo_id} page {page}: {e}")
-        return []
+        return None
 
     # 检查response.text是否为None或空，避免TypeError
     if response.text is None or not response.text.strip():
         logger.warning(f"Empty response for weibo_id {weibo_id} page {page}")
-        return []
+        return None
 
     try:
         tree_node = etree.HTML(response.text)
     except Exception as e:
         logger.warning(f"HTML parsing failed for weibo_id {weibo_id} page {page}: {e}")
-        return []
+        return None
 
     # 检查tree_node是否为None，避免AttributeError
     if tree_node is None:
         logger.warning(f"HTML parsing returned None for weibo_id {weibo_id} page {page}")
-        return []
+        return None
     repo_nodes = tree_node.xpath('//div[@class="c" and not(contains(@id,"M_"))]')
     repost_items = []
     for repo_node in repo_nodes:
@@ -304,6 +294,10 @@ def spider(tag_task_id: str, weibo_id="K7okwxcKa", page=93, tag_comment_task_id=
                 f.write("\n")
             raise e
     if len(repost_items) == 0:
+        # 转发页中总有原微博的 div#M_xxx，没有时说明拿到的是登录/验证页等，不能当作没有转发的页
+        if not tree_node.xpath('//div[@class="c" and starts-with(@id,"M_")]'):
+            logger.warning(f"Not a repost page for weibo_id {weibo_id} page {page}")
+            return None
         # 请求下来的页面可能没有转发
         # with open("./log/page.log", "a+", encoding="utf-8") as f:
         #     f.write(response.text)
@@ -312,21 +306,135 @@ def spider(tag_task_id: str, weibo_id="K7okwxcKa", page=93, tag_comment_task_id=
     return repost_items
 
 
-# todo 从当前节点开始而不是从根节点开始；若从根节点开始可能有重复爬取与分析的可能
-@celeryapp.task(bind=True)
-def spider_list(self, tag_task_id: str, weibo_id="K7okwxcKa", tag_comment_task_id=9999):
-    # 动态获取最新的 Cookie
-    current_headers = _get_headers()
+def repost_key(repost_item):
+    """
+    转发的自然键：同一条微博下同一用户的同一转发内容视为同一条转发。
+    created_at 由"x分钟前"等相对时间换算而来，重新爬取时会变化，不参与计算
+    :param repost_item: spider 解析出的转发
+    :return: 16 字节 blake2b 的十六进制串
+    """
+    raw = "\x00".join(
+        str(repost_item.get(key, "")) for key in ("weibo_id", "user_id", "pre_content")
+    )
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def ensure_repost_indexes():
+    """
+    转发与爬取进度集合的索引；PC端评论等没有 repost_key 的数据不受唯一约束影响
+    """
+    mongo_client.db[mongo_conf.COMMENT_REPOSTS].create_index(
+        [("tag_comment_task_id", ASCENDING), ("repost_key", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"repost_key": {"$exists": True}},
+    )
+    mongo_client.db[mongo_conf.COMMENT_REPOST_CRAWL].create_index(
+        [("weibo_id", ASCENDING), ("tag_comment_task_id", ASCENDING)], unique=True
+    )
+
+
+def save_reposts(repost_items):
+    """
+    以自然键无序批量 upsert 一页转发，重复爬取同一页或页内容错位时不会产生重复数据
+    :param repost_items: 转发列表
+    :return: 新插入的条数
+    """
+    operations = []
+    for item in repost_items:
+        item["repost_key"] = repost_key(item)
+        operations.append(
+            UpdateOne(
+                {"tag_comment_task_id": item["tag_comment_task_id"], "repost_key": item["repost_key"]},
+                {"$set": item},
+                upsert=True,
+            )
+        )
+    if not operations:
+        return 0
+    result = mongo_client.db[mongo_conf.COMMENT_REPOSTS].bulk_write(operations, ordered=False)
+    return result.upserted_count
+
+
+class RepostCrawlState:
+    """
+    一条微博在一个评论任务下的转发爬取进度：总页数、页完成位图（第 n 页对应第 n-1 位）
+    与游标（最小的未完成页码）；任务重试或重新执行时只爬取未完成的页
+    """
+
+    def __init__(self, weibo_id, tag_comment_task_id):
+        self.query = {"weibo_id": weibo_id, "tag_comment_task_id": tag_comment_task_id}
+        self.collection = mongo_client.db[mongo_conf.COMMENT_REPOST_CRAWL]
+        doc = self.collection.find_one(self.query) or {}
+        self.all_page = doc.get("all_page")
+        self.bitmap = bytearray(doc.get("done_pages") or b"")
+
+    def start(self, all_page):
+        """
+        记录总页数；已有进度时沿用原来的总页数，保证位图与页码对应
+        :param all_page: 本次获取的总页数
+        :return: 总页数
+        """
+        if not self.all_page:
+            self.all_page = all_page
+        size = (self.all_page + 7) // 8
+        if len(self.bitmap) < size:
+            self.bitmap.extend(bytes(size - len(self.bitmap)))
+        self._save()
+        return self.all_page
+
+    def is_done(self, page):
+        index = page - 1
+        return index // 8 < len(self.bitmap) and bool(self.bitmap[index // 8] & (1 << (index % 8)))
+
+    def pending_pages(self):
+        return [page for page in range(1, self.all_page + 1) if not self.is_done(page)]
+
+    def done_count(self):
+        return sum(bin(byte).count("1") for byte in self.bitmap)
+
+    def cursor(self):
+        pending = self.pending_pages()
+        return pending[0] if pending else self.all_page + 1
+
+    def mark_done(self, page):
+        index = page - 1
+        self.bitmap[index // 8] |= 1 << (index % 8)
+        self._save()
+
+    def _save(self):
+        cursor = self.cursor()
+        self.collection.update_one(
+            self.query,
+            {
+                "$set": {
+                    "all_page": self.all_page,
+                    "done_pages": Binary(bytes(self.bitmap)),
+                    "cursor": cursor,
+                    "done_count": self.done_count(),
+                    "finished": cursor > self.all_page,
+                    "update_time": int(time.time()),
+                }
+            },
+            upsert=True,
+        )
+
+
+def get_repost_page_count(weibo_id, headers):
+    """
+    请求转发第一页获取总页数，超过 300 页时按原规则截断
+    :return: 总页数，请求失败时返回 None
+    """
     response = requests.get(
         "{domain}/repost/{weibo_id}?page=1".format(
             domain=BASE_DOMAIN, weibo_id=weibo_id
         ),
-        headers=current_headers,
+        headers=headers,
+        timeout=30,
     )
     # 检查response.text是否为None
     if not response.text:
         logger.warning(f"Empty response for weibo_id {weibo_id} in spider_list")
-        return
+        return None
     all_page = re.search(r"/>&nbsp;1/(\d+)页</div>", response.text)
     if all_page:
         all_page = all_page.group(1)
@@ -335,45 +443,115 @@ def spider_list(self, tag_task_id: str, weibo_id="K7okwxcKa", tag_comment_task_i
             all_page = 300 + all_page // 300
     else:
         all_page = 10
-    page_data = list()
-    for page_num in range(1, all_page + 1):
-        print(f"{page_num}/{all_page}")
-        time.sleep(random.uniform(1, 10))
+    return all_page
+
+
+def crawl_pages_by_account(pages, account_headers, buckets, fetch, on_page):
+    """
+    多账号并发爬取：每个账号一个线程，从共享队列中领取页码，请求前先从该账号的令牌桶取令牌，
+    因此单个账号的请求频率不超过令牌桶速率；较快的账号会自动多领页码
+    :param pages: 页码列表
+    :param account_headers: 每个账号的请求头
+    :param buckets: 每个账号的令牌桶，与 account_headers 一一对应
+    :param fetch: fetch(page, headers) -> 该页结果
+    :param on_page: on_page(page, result) 在调用线程中按完成顺序处理每页结果，请求出错的页 result 为 None
+    :return:
+    """
+    page_queue = queue.Queue()
+    for page in pages:
+        page_queue.put(page)
+    result_queue = queue.Queue()
+    stop = threading.Event()
+
+    def worker(headers, bucket):
+        while not stop.is_set():
+            try:
+                page = page_queue.get_nowait()
+            except queue.Empty:
+                return
+            bucket.acquire()
+            try:
+                result = fetch(page, headers)
+            except Exception as e:
+                logger.error("repost page {} error {}".format(page, str(e)))
+                result = None
+            result_queue.put((page, result))
+
+    threads = [
+        threading.Thread(target=worker, args=(headers, bucket), daemon=True)
+        for headers, bucket in zip(account_headers, buckets)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(len(pages)):
+            page, result = result_queue.get()
+            on_page(page, result)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+@celeryapp.task(bind=True)
+def spider_list(self, tag_task_id: str, weibo_id="K7okwxcKa", tag_comment_task_id=9999):
+    """
+    爬取一条微博的全部转发页；页面分摊给配置中的所有移动端账号并发爬取，
+    每个账号按 REPOST_ACCOUNT_RATE 限速，每页爬完即 upsert 写入数据库并记入进度位图。
+    任务重试或重新执行时从进度位图恢复，只爬取未完成的页；请求或解析失败的页不计为完成，下次会重新请求
+    """
+    ensure_repost_indexes()
+    state = RepostCrawlState(weibo_id, tag_comment_task_id)
+    account_headers = _get_account_headers()
+    buckets = [TokenBucket(REPOST_ACCOUNT_RATE, REPOST_ACCOUNT_BURST) for _ in account_headers]
+    all_page = state.all_page
+    if not all_page:
+        buckets[0].acquire()
+        all_page = get_repost_page_count(weibo_id, account_headers[0])
+        if not all_page:
+            return
+    all_page = state.start(all_page)
+    pages = state.pending_pages()
+    if not pages:
+        print(f"转发共 {all_page} 页，已全部爬取")
+        return
+    print(f"转发共 {all_page} 页，从第 {pages[0]} 页开始爬取剩余 {len(pages)} 页，使用 {len(account_headers)} 个账号")
+
+    def fetch(page_num, headers):
+        return spider(
+            tag_task_id=tag_task_id,
+            weibo_id=weibo_id,
+            page=page_num,
+            tag_comment_task_id=tag_comment_task_id,
+            headers=headers,
+        )
+
+    def on_page(page_num, result):
         try:
-            result = spider(
-                tag_task_id=tag_task_id,
-                weibo_id=weibo_id,
-                page=page_num,
-                tag_comment_task_id=tag_comment_task_id,
-            )
-            if result:
-                page_data.extend(result)
-            if page_num % 10 == 0 or page_num == all_page:
-                mongo_client.db[mongo_conf.COMMENT_REPOSTS].insert_many(page_data)
-                page_data.clear()
-                print("save")
+            # 请求或解析失败（None）的页不计为完成；正常解析但没有转发的页同样计为完成
+            if result is not None:
+                if result:
+                    save_reposts(result)
+                state.mark_done(page_num)
+            finished = state.done_count()
+            print(f"{page_num}: {finished}/{all_page}")
             self.update_state(
                 state="PROGRESS",
                 meta={
-                    "current": page_num,
+                    "current": finished,
                     "total": all_page,
                     "task": weibo_id,
                     "task_id": tag_comment_task_id,
                 },
             )
-        except TypeError as e:
-            logger.error(
-                "spider task error weibo_id {} task_id {} TypeError {}".format(
-                    weibo_id, tag_comment_task_id, str(e)
-                )
-            )
         except Exception as e:
             logger.error(
                 "spider task error weibo_id {} task_id {} error {}".format(
                     weibo_id, tag_comment_task_id, str(e)
                 )
             )
-            continue
+
+    crawl_pages_by_account(pages, account_headers, buckets, fetch, on_page)
 
 
 def spider_list_part(tag_task_id: str, weibo_id="K7okwxcKa", tag_comment_task_id=9999):
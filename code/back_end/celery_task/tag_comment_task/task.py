@@ -14,7 +14,7 @@ from celery_task.utils import mongo_client
 from config import weibo_conf
 
 from celery_task import celeryapp
-from celery_task.tag_comment_task.process import get_path_tree_part
+from celery_task.tag_comment_task.process import get_path_tree_part, load_tree_graph
 from celery_task.utils.gsdmmCluster.cluster_extract import cluster_extract
 from celery_task.tag_comment_task.my_cloud import preContent
 from celery_task.tag_comment_task.myRank import startRank
@@ -473,6 +473,8 @@ def deleteTask(tag_comment_task_id):
     myquery = {"tag_comment_task_id": tag_comment_task_id}
     mydb.delete_one(myquery)
     mongo_client.db[mongo_conf.COMMENT_TREE].delete_one(myquery)
+    mongo_client.db[mongo_conf.COMMENT_TREE_NODE].delete_many(myquery)
+    mongo_client.db[mongo_conf.COMMENT_REPOST_CRAWL].delete_many(myquery)
     mongo_client.db[mongo_conf.COMMENT_CLUSTER].delete_one(myquery)
 
 
@@ -593,17 +595,6 @@ def getPostById(tag_comment_task_id=None):
     return result
 
 
-# 统计关键节点
-def statisticsRepost(item, total):
-    children_list = [i for i in item["children"].values()]
-    total[item["user_name"].strip()] = len(children_list)
-    for i in children_list:
-        total[item["user_name"].strip()] = total[
-            item["user_name"].strip()
-        ] + statisticsRepost(i, total)
-    return total[item["user_name"].strip()]
-
-
 # 获取获取关键节点
 def getKeyNode(tag_comment_task_id):
     item = mongo_client.db[mongo_conf.COMMENT_NODE].find_one(
@@ -612,33 +603,13 @@ def getKeyNode(tag_comment_task_id):
     return item["data"]
 
 
-# 转换tree数据结构-->leader rank 数据结构
-def editJson4Graph(item, nodes, edges):
-    nodes.add(item["user_name"].strip())
-    if item["children"]:
-        edges[item["user_name"].strip()] = {}
-        children_list = [i for i in item["children"].values()]
-
-        for i in children_list:
-            editJson4Graph(i, nodes, edges)
-            i.pop("children")
-            edges[item["user_name"].strip()][i["user_name"].strip()] = i
-
-
 # leader rank计算
 def node(tag_comment_task_id):
     try:
-        nodes = set()
-        edges = {}
         re_edges = {}
-        data = mongo_client.db[mongo_conf.COMMENT_TREE].find_one(
-            {"tag_comment_task_id": tag_comment_task_id}
-        )
-        if data:
-            total = {}
-            statisticsRepost(data["data"], total)
-
-            editJson4Graph(data["data"], nodes, edges)
+        # 各节点的转发数（子树规模）在建树时已经统计好
+        nodes, edges, total = load_tree_graph(tag_comment_task_id)
+        if nodes:
             # 去除G节点和根节点
             result_sorted = startRank(edges, re_edges, list(nodes))[2:]
             result_list = []
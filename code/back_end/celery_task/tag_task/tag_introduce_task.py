@@ -7,6 +7,7 @@
 from celery_task.config import mongo_conf
 from celery_task.utils import mongo_client
 from celery_task.utils.gopup_utils import user
+from celery_task.utils.user_profile_cache import user_profile_cache
 import requests
 import json
 from config import weibo_conf
@@ -46,9 +47,21 @@ def introduce(tag_data: dict, tag_task_id: str):
 
 def get_user_data(user_id) -> json:
     """
-    获取user详细信息，优先使用weibo_curl，失败则用gopup兜底
+    获取user详细信息，先查用户资料缓存，未命中时再实时查询
     :param user_id:微博user_id
-    :return:
+    :return: 用户信息，都失败（或命中负缓存）时与 gopup 失败的返回格式相同
+    """
+    user_data = user_profile_cache.lookup(user_id, fetch_user_data)
+    if user_data is None:
+        return {"user_id": user_id, "error": "用户信息获取失败"}
+    return user_data
+
+
+def fetch_user_data(user_id) -> json:
+    """
+    实时获取user详细信息，优先使用weibo_curl，失败则用gopup兜底
+    :param user_id:微博user_id
+    :return: 用户信息，都失败时返回None
     """
     # 第一步：尝试从weibo_curl API获取
     try:
@@ -65,7 +78,8 @@ def get_user_data(user_id) -> json:
 
     # 第二步：使用gopup兜底获取
     try:
-        return user(user_id)
+        gopup_result = user(user_id)
+        return gopup_result if gopup_result and "error" not in gopup_result else None
     except Exception as gopup_e:
         print(f"错误: gopup获取用户{user_id}也失败: {gopup_e}")
         return None
@@ -4,19 +4,54 @@
 * @date 2021/7/22 16:25
 """
 
-from functools import reduce
+from collections import Counter
 
 from celery_task.utils import mongo_client
 from celery_task.config import mongo_conf
 
 
-def tag_relation(weibo_data: dict, tag_task_id: str, user_mark_data: dict):
+def _dedupe_weibo(weibo_list_data: list) -> list:
     """
-    处理话题人物关系网的函数
+    去除完全相同的微博并保持首次出现的顺序。
+    完全相同的两条微博 weibo_id 必然相同，因此按 weibo_id 分桶，只在桶内逐条比较
+    :param weibo_list_data: 微博列表
+    :return: 去重后的微博列表
+    """
+    buckets = dict()  # {weibo_id: [微博, ]}
+    weibo_list = list()
+    for weibo in weibo_list_data:
+        bucket = buckets.setdefault(weibo.get("weibo_id"), [])
+        if weibo not in bucket:
+            bucket.append(weibo)
+            weibo_list.append(weibo)
+    return weibo_list
+
+
+def _group_by_screen_name(weibo_list: list) -> dict:
+    """
+    一次遍历按发布者汇总 @用户、热度和 user_id（取该发布者最后一条微博的 user_id）
+    :return: {screen_name: {"at_users": [], "hot_count": int, "user_id": }}
+    """
+    groups = dict()
+    for weibo in weibo_list:
+        group = groups.get(weibo.get("screen_name"))
+        if group is None:
+            group = groups[weibo.get("screen_name")] = {"at_users": [], "hot_count": 0, "user_id": 0}
+        # 使用默认空列表避免NoneType错误
+        at_users = weibo.get("at_users", [])
+        if at_users:
+            group["at_users"].extend(at_users)
+        group["hot_count"] += int(weibo.get("hot_count", 0))
+        group["user_id"] = weibo.get("user_id", 0)
+    return groups
+
+
+def build_relation_graph(weibo_data: dict, user_mark_data: dict):
+    """
+    构建话题人物关系网
+    :param weibo_data: 微博数据
     :param user_mark_data: 用户分类数据
-    :param weibo_data:微博数据
-    :param tag_task_id:话题任务
-    :return:
+    :return: (node_list, link_list)
     """
     node_list = list()
     link_list = list()
@@ -24,64 +59,57 @@ def tag_relation(weibo_data: dict, tag_task_id: str, user_mark_data: dict):
     weibo_list_data = weibo_data.get("data", [])
     if not isinstance(weibo_list_data, list):
         weibo_list_data = []
-    weibo_list = reduce(
-        lambda x, y: x if y in x else x + [y],
-        [
-            [],
-        ]
-        + weibo_list_data,
-    )
+    weibo_list = _dedupe_weibo(weibo_list_data)
     screen_name_set = set(i["screen_name"] for i in weibo_list if "screen_name" in i)
+    groups = _group_by_screen_name(weibo_list)
     relation_data = list()
     for screen_name in screen_name_set:
-        at_users_list = list()
-        user_id = 0
-        hot_count = 0
-        for weibo in weibo_list:
-            if weibo.get("screen_name") == screen_name:
-                # 使用默认空列表避免NoneType错误
-                at_users = weibo.get("at_users", [])
-                if at_users:
-                    at_users_list.extend(at_users)
-                hot_count += int(weibo.get("hot_count", 0))
-                user_id = weibo.get("user_id", 0)
+        group = groups[screen_name]
         relation_data.append(
             {
                 "screen_name": screen_name,
-                "user_id": user_id,
-                "at_users": at_users_list,
-                "hot_count": hot_count,
+                "user_id": group["user_id"],
+                "at_users": group["at_users"],
+                "hot_count": group["hot_count"],
             }
         )
+
+    # 检查user_mark_data和data字段是否存在；user_id -> 第一条匹配的用户分类
+    user_mark_list = user_mark_data.get("data", []) if user_mark_data else []
+    category_index = dict()
+    if isinstance(user_mark_list, list):
+        for user_mark in user_mark_list:
+            if user_mark:
+                category_index.setdefault(user_mark.get("user_id"), user_mark.get("category", -1))
+
+    node_index = dict()  # {name: node}，只包含已经加入 node_list 的节点
+    link_set = set()  # 已加入 link_list 的 (source, target)
     for data in relation_data:
-        category = -1
-        # 检查user_mark_data和data字段是否存在
-        user_mark_list = user_mark_data.get("data", []) if user_mark_data else []
-        if isinstance(user_mark_list, list):
-            for user_mark in user_mark_list:
-                if user_mark and user_mark.get("user_id") == data.get("user_id"):
-                    category = user_mark.get("category", -1)
-                    break
         node = {
-            "category": category,
+            "category": category_index.get(data.get("user_id"), -1),
             "name": data["screen_name"],
             "userId": data["user_id"],
             "value": int(data["hot_count"]),
         }
         node_list.append(node)
+        node_index.setdefault(node["name"], node)
         # 检查at_users是否存在且不为空
         at_users = data.get("at_users", [])
         if isinstance(at_users, list) and len(at_users) > 0:
+            at_count = Counter(i for i in at_users if isinstance(i, str))
             for i in at_users:
                 if not i or not isinstance(i, str):
                     continue
-                link = {
-                    "source": data["screen_name"],
-                    "target": i,
-                    "weight": at_users.count(i),
-                }
-                if link not in link_list:
-                    link_list.append(link)
+                # 同一 source 的 weight 固定，(source, target) 即可唯一确定一条边
+                if (data["screen_name"], i) not in link_set:
+                    link_set.add((data["screen_name"], i))
+                    link_list.append(
+                        {
+                            "source": data["screen_name"],
+                            "target": i,
+                            "weight": at_count[i],
+                        }
+                    )
                 if i not in screen_name_set:
                     node = {
                         "category": -1,
@@ -90,12 +118,23 @@ def tag_relation(weibo_data: dict, tag_task_id: str, user_mark_data: dict):
                         "value": int(data["hot_count"]),
                     }
                     node_list.append(node)
+                    node_index.setdefault(i, node)
                     screen_name_set.add(i)
-                else:
-                    for node_item in node_list:
-                        if node_item["name"] == i:
-                            node_item["value"] += int(data["hot_count"])
-                            break
+                elif i in node_index:
+                    # 被@的发布者节点还没加入 node_list 时不累加，与原来的线性查找行为一致
+                    node_index[i]["value"] += int(data["hot_count"])
+    return node_list, link_list
+
+
+def tag_relation(weibo_data: dict, tag_task_id: str, user_mark_data: dict):
+    """
+    处理话题人物关系网的函数
+    :param user_mark_data: 用户分类数据
+    :param weibo_data:微博数据
+    :param tag_task_id:话题任务
+    :return:
+    """
+    node_list, link_list = build_relation_graph(weibo_data, user_mark_data)
     query_by_task_id = {"tag_task_id": tag_task_id}
     update = {
         "$set": {
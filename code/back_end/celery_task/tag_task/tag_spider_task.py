@@ -4,12 +4,16 @@
 * @date 2021/7/22 16:24
 """
 
+import asyncio
+import threading
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 from celery_task.utils import mongo_client
 from celery_task.utils.my_cloud import MyCloud
 from celery_task.config import mongo_conf
 from celery_task.utils.gopup_utils import user
+from celery_task.utils.rate_limit import AsyncRateLimiter
 from config import weibo_conf
 import time as time_module
 from datetime import datetime, timedelta
@@ -20,9 +24,13 @@ try:
     task_config = TaskConfig()
     MAX_USER_ANALYSIS = task_config.MAX_USER_ANALYSIS
     MAX_SPIDER_PAGES = task_config.MAX_SPIDER_PAGES
+    SPIDER_CONCURRENCY = task_config.SPIDER_CONCURRENCY
+    SPIDER_RATE_LIMIT = task_config.SPIDER_RATE_LIMIT
 except ImportError:
     MAX_USER_ANALYSIS = 30
     MAX_SPIDER_PAGES = 24
+    SPIDER_CONCURRENCY = 6
+    SPIDER_RATE_LIMIT = 4.0
 
 
 def convert_created_at_to_timestamp(created_at_str):
@@ -82,6 +90,108 @@ def convert_created_at_to_timestamp(created_at_str):
         return int(time_module.time() * 1000)
 
 
+def _search_url(tag: str, page: int) -> str:
+    return (
+        weibo_conf.BASEPATH
+        + "/weibo_curl/api/search_tweets?keyword={keyword}&cursor={cursor}&is_hot=1".format(
+            keyword=tag, cursor=page
+        )
+    )
+
+
+def fetch_page(session: requests.Session, tag: str, page: int):
+    """
+    请求一页搜索结果
+    :param session: requests会话
+    :param tag: 话题
+    :param page: 页码
+    :return: (状态, 响应字典) 状态为 ok / empty(空响应或无法解析) / error(网络异常)
+    """
+    url = _search_url(tag, page)
+    try:
+        response = session.get(url, timeout=30)
+        print(url)
+
+        # 检查响应是否为空
+        if not response.text or response.text.strip() == "":
+            print(f"警告: 搜索第{page}页返回空响应")
+            return "empty", None
+
+        try:
+            return "ok", json.loads(response.text)
+        except json.JSONDecodeError as je:
+            print(f"警告: 搜索第{page}页JSON解析失败: {je}")
+            return "empty", None
+    except requests.exceptions.Timeout:
+        print(f"警告: 搜索第{page}页请求超时")
+    except requests.exceptions.RequestException as re:
+        print(f"警告: 搜索第{page}页网络错误: {re}")
+    except Exception as e:
+        print(f"警告: 搜索第{page}页发生异常: {e}")
+    return "error", None
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    session.trust_env = False
+    return session
+
+
+def crawl_pages(tag: str, handle_page):
+    """
+    逐页串行爬取搜索结果
+    :param tag: 话题
+    :param handle_page: 按页码顺序处理每页结果的回调，返回False时停止爬取
+    :return:
+    """
+    session = _new_session()
+    for page in range(1, MAX_SPIDER_PAGES + 1, 1):
+        status, weibo_dict = fetch_page(session, tag, page)
+        if handle_page(page, status, weibo_dict) is False:
+            break
+
+
+async def crawl_pages_async(tag: str, handle_page,
+                            concurrency: int = SPIDER_CONCURRENCY,
+                            rate: float = SPIDER_RATE_LIMIT):
+    """
+    并发爬取搜索结果，并发数与每秒请求数均受限；
+    结果仍按页码顺序交给handle_page，停止后取消尚未开始的请求
+    :param tag: 话题
+    :param handle_page: 同 crawl_pages
+    :param concurrency: 最大并发请求数
+    :param rate: 每秒请求数上限
+    :return:
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = AsyncRateLimiter(rate)
+    local = threading.local()
+
+    def fetch_in_thread(page):
+        # requests.Session 不保证线程安全，每个线程各用一个
+        if not hasattr(local, "session"):
+            local.session = _new_session()
+        return fetch_page(local.session, tag, page)
+
+    async def fetch(page):
+        async with semaphore:
+            await limiter.acquire()
+            return await loop.run_in_executor(executor, fetch_in_thread, page)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        tasks = [asyncio.ensure_future(fetch(page)) for page in range(1, MAX_SPIDER_PAGES + 1)]
+        try:
+            for page, task in enumerate(tasks, 1):
+                status, weibo_dict = await task
+                if handle_page(page, status, weibo_dict) is False:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
 def spider(tag: str, tag_task_id: str):
     """
     tag微博数据的爬取与储存
@@ -91,93 +201,73 @@ def spider(tag: str, tag_task_id: str):
     """
     result_data_list = list()
     user_set = set()
-    false_count = 0  # 无效请求次数
-    empty_response_count = 0  # 空响应次数
-    session = requests.Session()
-    session.trust_env = False
-    for i in range(1, MAX_SPIDER_PAGES + 1, 1):
-        if false_count >= 5:
-            break  # 无效请求大于等于5时,认为无法得到相关数据，停止请求
-        if empty_response_count >= 3:
+    counter = {
+        "false_count": 0,  # 无效请求次数
+        "empty_response_count": 0,  # 空响应次数
+    }
+
+    def handle_page(page, status, weibo_dict):
+        if counter["false_count"] >= 5:
+            return False  # 无效请求大于等于5时,认为无法得到相关数据，停止请求
+        if counter["empty_response_count"] >= 3:
             print(
-                f"警告: 连续{empty_response_count}次空响应，可能Cookie已失效，停止爬取"
+                f"警告: 连续{counter['empty_response_count']}次空响应，可能Cookie已失效，停止爬取"
             )
-            break
-        url = (
-            weibo_conf.BASEPATH
-            + "/weibo_curl/api/search_tweets?keyword={keyword}&cursor={cursor}&is_hot=1".format(
-                keyword=tag, cursor=i
-            )
-        )
-        try:
-            response = session.get(url, timeout=30)
-            print(url)
-            print("false_count: %s" % false_count)
+            return False
+        print("false_count: %s" % counter["false_count"])
+        if status == "empty":
+            counter["empty_response_count"] += 1
+            counter["false_count"] += 1
+            return True
+        if status == "error":
+            counter["false_count"] += 1
+            return True
+        # 重置空响应计数
+        counter["empty_response_count"] = 0
 
-            # 检查响应是否为空
-            if not response.text or response.text.strip() == "":
-                print(f"警告: 搜索第{i}页返回空响应")
-                empty_response_count += 1
-                false_count += 1
-                continue
+        if weibo_dict.get("error_code") != 0:
+            counter["false_count"] += 1
+            return True
+        counter["false_count"] = 0
+        weibo_list = weibo_dict.get("data", {}).get("result", [])
+        if not weibo_list:
+            print(f"搜索第{page}页没有结果，停止爬取")
+            return False
+        for weibo in weibo_list:
+            weibo["text"] = weibo["text"] + " "
+        # 整页博文一次性提取关键词
+        text_tokens = MyCloud.keywords_for_many([weibo["text"] for weibo in weibo_list])
+        for weibo, text_token in zip(weibo_list, text_tokens):
+            weibo["tid"] = weibo["weibo_id"]
+            weibo["text_token"] = text_token
+            weibo["retweet_count"] = weibo.pop("reposts_count")
+            weibo["favorite_count"] = weibo.pop("attitudes_count")
+            weibo["comment_count"] = weibo.pop("comments_count")
+            weibo["tweet_type"] = "article"
+            weibo["data_source"] = "weibo"
+            weibo["hot_count"] = (
+                int(weibo["retweet_count"])
+                + int(weibo["favorite_count"])
+                + int(weibo["comment_count"])
+            )
 
-            try:
-                weibo_dict = json.loads(response.text)
-            except json.JSONDecodeError as je:
-                print(f"警告: 搜索第{i}页JSON解析失败: {je}")
-                empty_response_count += 1
-                false_count += 1
-                continue
-
-            # 重置空响应计数
-            empty_response_count = 0
-
-        except requests.exceptions.Timeout:
-            print(f"警告: 搜索第{i}页请求超时")
-            false_count += 1
-            continue
-        except requests.exceptions.RequestException as re:
-            print(f"警告: 搜索第{i}页网络错误: {re}")
-            false_count += 1
-            continue
-        except Exception as e:
-            print(f"警告: 搜索第{i}页发生异常: {e}")
-            false_count += 1
-            continue
-
-        if weibo_dict.get("error_code") == 0:
-            false_count = 0
-            weibo_list = weibo_dict.get("data", {}).get("result", [])
-            new_weibo_list = list()
-            for weibo in weibo_list:
-                weibo["text"] = weibo["text"] + " "
-                weibo["tid"] = weibo["weibo_id"]
-                weibo["text_token"] = MyCloud(weibo["text"].split(" ")).GetKeyWord()
-                weibo["retweet_count"] = weibo.pop("reposts_count")
-                weibo["favorite_count"] = weibo.pop("attitudes_count")
-                weibo["comment_count"] = weibo.pop("comments_count")
-                weibo["tweet_type"] = "article"
-                weibo["data_source"] = "weibo"
-                weibo["hot_count"] = (
-                    int(weibo["retweet_count"])
-                    + int(weibo["favorite_count"])
-                    + int(weibo["comment_count"])
+            # 添加 create_time 字段（转换created_at）
+            if "created_at" in weibo:
+                weibo["create_time"] = convert_created_at_to_timestamp(
+                    weibo.get("created_at")
                 )
+            elif "create_time" not in weibo:
+                # 如果没有时间信息，使用当前时间
+                weibo["create_time"] = int(time_module.time() * 1000)
 
-                # 添加 create_time 字段（转换created_at）
-                if "created_at" in weibo:
-                    weibo["create_time"] = convert_created_at_to_timestamp(
-                        weibo.get("created_at")
-                    )
-                elif "create_time" not in weibo:
-                    # 如果没有时间信息，使用当前时间
-                    weibo["create_time"] = int(time_module.time() * 1000)
-
-                user_set.add(weibo["user_id"])
-                new_weibo_list.append(weibo)
-            result_data_list.extend(new_weibo_list)
-        else:
-            false_count += 1
+            user_set.add(weibo["user_id"])
+            result_data_list.append(weibo)
+        return True
+
+    if SPIDER_CONCURRENCY > 1:
+        asyncio.run(crawl_pages_async(tag, handle_page))
+    else:
+        crawl_pages(tag, handle_page)
     result_data_list.sort(key=lambda x: int(x["hot_count"]), reverse=True)
     result_data_dict = dict()
     result_data_dict["data"] = result_data_list
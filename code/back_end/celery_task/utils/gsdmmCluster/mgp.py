@@ -1,10 +1,30 @@
-from numpy.random import multinomial
+from numpy.random import default_rng
 from numpy import log, exp
 from numpy import argmax
 import json
 
+
+def sample_label(rng, p):
+    '''
+    Draw one label from probability vector p using a single uniform from rng.
+    Same semantics as the index returned by multinomial(1, p): the last label takes
+    whatever mass is left, so an all-zero vector always yields the last label.
+    :param rng: numpy.random.Generator
+    :param p: sequence of probabilities
+    :return: int
+    '''
+    u = rng.random()
+    acc = 0.0
+    last = len(p) - 1
+    for label in range(last):
+        acc += p[label]
+        if u < acc:
+            return label
+    return last
+
+
 class MovieGroupProcess:
-    def __init__(self, K=8, alpha=0.1, beta=0.1, n_iters=2500):
+    def __init__(self, K=8, alpha=0.1, beta=0.1, n_iters=2500, random_state=None):
         '''
         A MovieGroupProcess is a conceptual model introduced by Yin and Wang 2014 to
         describe their Gibbs sampling algorithm for a Dirichlet Mixture Model for the
@@ -29,11 +49,13 @@ class MovieGroupProcess:
             that students desire to sit with students of similar interests. A high beta means they are less
             concerned with affinity and are more influenced by the popularity of a table
         :param n_iters:
+        :param random_state: int seed or numpy.random.Generator, None for a fresh random seed
         '''
         self.K = K
         self.alpha = alpha
         self.beta = beta
         self.n_iters = n_iters
+        self.rng = default_rng(random_state)
 
         # slots for computed variables
         self.number_docs = None
@@ -64,8 +86,7 @@ class MovieGroupProcess:
         mgp.cluster_word_distribution = cluster_word_distribution
         return mgp
 
-    @staticmethod
-    def _sample(p):
+    def _sample(self, p):
         '''
         Sample with probability vector p from a multinomial distribution#采集来自多项分布的概率向量为p的样本
         :param p: list
@@ -73,7 +94,7 @@ class MovieGroupProcess:
         :return: int
             index of randomly selected output
         '''
-        return [i for i, entry in enumerate(multinomial(1, p)) if entry != 0][0]
+        return sample_label(self.rng, p)
 
     def fit(self, docs, vocab_size):
         '''
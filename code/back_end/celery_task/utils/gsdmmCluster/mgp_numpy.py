@@ -0,0 +1,206 @@
+import numpy as np
+from numpy.random import default_rng
+
+try:
+    from .mgp import sample_label
+except Exception as e:
+    from mgp import sample_label
+
+
+class NumpyMovieGroupProcess:
+    def __init__(self, K=8, alpha=0.1, beta=0.1, n_iters=2500, random_state=None):
+        '''
+        numpy implementation of MovieGroupProcess (see mgp.py for the model description).
+
+        Tokens are mapped to integer ids and the per-cluster word counts n_z_w are kept as a
+        dense K x V matrix. Scoring a document is a handful of vector operations over the K
+        labels instead of a Python loop over labels and words, and the log terms come from
+        tables built once per fit. Random draws are taken from a seeded numpy Generator in
+        exactly the same order as MovieGroupProcess, so both return the same labels for the
+        same random_state.
+
+        :param K: int
+            Upper bound on the number of possible clusters
+        :param alpha: float between 0 and 1
+        :param beta: float between 0 and 1
+        :param n_iters: int
+        :param random_state: int seed or numpy.random.Generator, None for a fresh random seed
+        '''
+        self.K = K
+        self.alpha = alpha
+        self.beta = beta
+        self.n_iters = n_iters
+        self.rng = default_rng(random_state)
+
+        # slots for computed variables
+        self.number_docs = None
+        self.vocab_size = None
+        self.word_index = {}  # {词语: 词语id}
+        self.cluster_doc_count = np.zeros(K, dtype=np.int64)  # 每簇的文章数m_z
+        self.cluster_word_count = np.zeros(K, dtype=np.int64)  # 每簇的单词数n_z
+        self.cluster_word_matrix = np.zeros((K, 0), dtype=np.int64)  # 每簇每个词的出现次数n_z_w
+        self.cluster_word_distribution = [{} for _ in range(K)]  # 与 MovieGroupProcess 相同格式的 n_z_w
+
+    def _encode(self, docs):
+        '''
+        Map tokens to integer ids, extending the vocabulary with unseen tokens
+        :param docs: list of list of str
+        :return: list of int arrays
+        '''
+        word_index = self.word_index
+        encoded = []
+        for doc in docs:
+            ids = np.empty(len(doc), dtype=np.int64)
+            for j, word in enumerate(doc):
+                word_id = word_index.get(word)
+                if word_id is None:
+                    word_id = word_index[word] = len(word_index)
+                ids[j] = word_id
+            encoded.append(ids)
+        return encoded
+
+    def _build_log_tables(self, total_words, max_word_count, max_doc_size):
+        '''
+        lN1 - lD1 for every possible cluster size m, lN2 terms log(n + beta) for every possible
+        count n, and the cumulative sums C[n] = sum(log(m + V*beta) for m < n), so that
+        sum(log(n_z + V*beta + j - 1) for j in 1..L) == C[n_z + L] - C[n_z].
+        The cumulative sums are kept in extended precision to avoid cancellation.
+        '''
+        D, K, alpha = self.number_docs, self.K, self.alpha
+        self._log_doc = np.log(np.arange(D + 1, dtype=np.float64) + alpha) - np.log(D - 1 + K * alpha)
+        self._log_word = np.log(np.arange(max_word_count + 1, dtype=np.float64) + self.beta)
+        terms = np.log(np.arange(total_words + max_doc_size + 1, dtype=np.float64) + self.vocab_size * self.beta)
+        self._log_cum = np.zeros(len(terms) + 1, dtype=np.longdouble)
+        np.cumsum(terms, dtype=np.longdouble, out=self._log_cum[1:])
+
+    def _score_ids(self, ids):
+        '''
+        Formula (3) of Yin and Wang 2014 for all K labels at once, see MovieGroupProcess.score
+        :param ids: int array of the doc's word ids
+        :return: list[float], length K probability vector
+        '''
+        n_z = self.cluster_word_count
+        lN1_lD1 = self._log_doc[self.cluster_doc_count]
+        lN2 = self._log_word[self.cluster_word_matrix[:, ids]].sum(axis=1)
+        lD2 = (self._log_cum[n_z + len(ids)] - self._log_cum[n_z]).astype(np.float64)
+        p = np.exp(lN1_lD1 + lN2 - lD2).tolist()
+
+        # normalize the probability vector, K is small so plain Python is cheaper here
+        pnorm = sum(p)
+        pnorm = pnorm if pnorm > 0 else 1
+        return [pp / pnorm for pp in p]
+
+    def fit(self, docs, vocab_size):
+        '''
+        Cluster the input documents
+        :param docs: list of list
+            list of lists containing the token stream of each document
+        :param vocab_size: total vocabulary size
+        :return: list of length len(doc)
+            cluster label for each document
+        '''
+        K, n_iters = self.K, self.n_iters
+        rng = self.rng
+
+        D = len(docs)
+        self.number_docs = D
+        self.vocab_size = vocab_size
+
+        doc_ids = self._encode(docs)
+        V_ids = len(self.word_index)
+        # 每篇文章去重后的词语id与次数，用于整体加减 n_z_w
+        doc_words = [np.unique(ids, return_counts=True) for ids in doc_ids]
+        doc_sizes = [len(ids) for ids in doc_ids]
+
+        total_words = sum(doc_sizes)
+        word_freq = np.bincount(np.concatenate(doc_ids), minlength=V_ids) if total_words else np.zeros(1, np.int64)
+        self._build_log_tables(total_words, int(word_freq.max()), max(doc_sizes, default=0))
+
+        m_z = self.cluster_doc_count = np.zeros(K, dtype=np.int64)
+        n_z = self.cluster_word_count = np.zeros(K, dtype=np.int64)
+        n_z_w = self.cluster_word_matrix = np.zeros((K, V_ids), dtype=np.int64)
+        d_z = [None for _ in range(D)]
+
+        # initialize the clusters类别初始化
+        uniform = [1.0 / K for _ in range(K)]
+        for i in range(D):
+            z = sample_label(rng, uniform)
+            d_z[i] = z
+            m_z[z] += 1
+            n_z[z] += doc_sizes[i]
+            words, counts = doc_words[i]
+            n_z_w[z, words] += counts
+
+        cluster_count = K
+        for _iter in range(n_iters):
+            total_transfers = 0
+
+            for i in range(D):
+                z_old = d_z[i]
+                # 与 MovieGroupProcess 一致：簇0中的文章不参与重新采样
+                if z_old == 0:
+                    continue
+
+                words, counts = doc_words[i]
+                m_z[z_old] -= 1
+                n_z[z_old] -= doc_sizes[i]
+                n_z_w[z_old, words] -= counts
+
+                z_new = sample_label(rng, self._score_ids(doc_ids[i]))
+
+                if z_new != z_old:
+                    total_transfers += 1
+
+                d_z[i] = z_new
+                m_z[z_new] += 1
+                n_z[z_new] += doc_sizes[i]
+                n_z_w[z_new, words] += counts
+
+            cluster_count_new = int((m_z > 0).sum())
+            print("In stage %d: transferred %d clusters with %d clusters populated" % (
+                _iter, total_transfers, cluster_count_new))
+            if total_transfers == 0 and cluster_count_new == cluster_count and _iter > 25:
+                print("Converged.  Breaking out.")
+                break
+            cluster_count = cluster_count_new
+
+        index_word = list(self.word_index)
+        self.cluster_word_distribution = [
+            {index_word[w]: int(n_z_w[z, w]) for w in np.flatnonzero(n_z_w[z])}
+            for z in range(K)
+        ]
+        return d_z
+
+    def score(self, doc):
+        '''
+        Score a document, tokens never seen during fit count as zero occurrences
+        :param doc: list[str]: The doc token stream
+        :return: list[float]: A length K probability vector
+        '''
+        alpha, beta, K, V, D = self.alpha, self.beta, self.K, self.vocab_size, self.number_docs
+        m_z, n_z = self.cluster_doc_count, self.cluster_word_count
+
+        counts = np.zeros((K, len(doc)), dtype=np.int64)
+        for j, word in enumerate(doc):
+            word_id = self.word_index.get(word)
+            if word_id is not None:
+                counts[:, j] = self.cluster_word_matrix[:, word_id]
+
+        lD1 = np.log(D - 1 + K * alpha)
+        lN1 = np.log(m_z + alpha)
+        lN2 = np.log(counts + beta).sum(axis=1)
+        lD2 = np.log(n_z[:, None] + V * beta + np.arange(len(doc))).sum(axis=1)
+        p = np.exp(lN1 - lD1 + lN2 - lD2)
+
+        pnorm = p.sum()
+        pnorm = pnorm if pnorm > 0 else 1
+        return (p / pnorm).tolist()
+
+    def choose_best_label(self, doc):
+        '''
+        Choose the highest probability label for the input document
+        :param doc: list[str]: The doc token stream
+        :return:
+        '''
+        p = self.score(doc)
+        return int(np.argmax(p)), max(p)
@@ -1,28 +1,42 @@
 # -*- coding:utf-8 -*-
 import re
-import os
 import string
 import jieba
 
 try:
     from .langconv import *
+    from .zh_converter import simplified_converter
+    from ..lexicon import gsdmm_stopwords, pornography_words
+    from ..token_cache import get_token_cache, text_digest
 except Exception as e:
     from langconv import *
+    from zh_converter import simplified_converter
+    from celery_task.utils.lexicon import gsdmm_stopwords, pornography_words
+    from celery_task.utils.token_cache import get_token_cache, text_digest
+
+
+# 以下正则在导入时编译一次，所有清洗函数共用
+_FOREIGN_PATTERN = re.compile(u'[^0-9a-zA-Z\u4e00-\u9fa5.，,。“”]+', re.UNICODE)  # 中文和英文以外的字符
+try:
+    _EMOJI_PATTERN = re.compile(u'[\U00010000-\U0010ffff]')  # 表情
+except re.error:
+    _EMOJI_PATTERN = re.compile(u'[\uD800-\uDBFF][\uDC00-\uDFFF]')
+_URL_PATTERN = re.compile(r'https://[a-zA-Z0-9.?/&=:]*', re.S)  # 网址
+_NAME_PATTERN = re.compile(r'RT @[a-z,A-Z,0-9,_]+:|@[a-z,A-Z,0-9,_]+')  # @微博名
+# 网址只由ASCII字符组成，表情只含辅助平面字符，两者的匹配互不重叠，
+# 合并成一次扫描与先去网址、再去表情的结果相同。
+# @微博名不能并入：去掉表情后 "@😀abc" 会变成新的 "@abc"，必须在表情之后单独扫描
+_URL_EMOJI_PATTERN = re.compile(_URL_PATTERN.pattern + '|' + _EMOJI_PATTERN.pattern, re.S)
 
 
 # 去除中文和英文以外的字符,去除其他国字符
 def cleantxt(raw):
-    fil = re.compile(u'[^0-9a-zA-Z\u4e00-\u9fa5.，,。“”]+', re.UNICODE)
-    return fil.sub(' ', raw)
+    return _FOREIGN_PATTERN.sub(' ', raw)
 
 
 def filter_emoji(desstr, restr=''):
     # 过滤表情
-    try:
-        co = re.compile(u'[\U00010000-\U0010ffff]')
-    except re.error:
-        co = re.compile(u'[\uD800-\uDBFF][\uDC00-\uDFFF]')
-    return co.sub(restr, desstr)
+    return _EMOJI_PATTERN.sub(restr, desstr)
 
 
 def Traditional2Simplified(sentence):
@@ -31,24 +45,13 @@ def Traditional2Simplified(sentence):
     :param sentence: 待转换的句子
     :return: 将句子中繁体字转换为简体字之后的句子
     '''
-    sentence = Converter('zh-hans').convert(sentence)
+    sentence = simplified_converter.convert(sentence)
     return sentence
 
 
-# 加载停用词
-stopword_list = set()
-with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stopwords.txt'), encoding="utf8") as f:
-    for line in f:
-        item = line.strip()
-        stopword_list.add(item)
-stopword_list.add("转发")
-
-# 加载色情词
-pron_list = set()
-with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pronography.txt'), encoding="utf8") as f:
-    for line in f:
-        item = line.strip()
-        pron_list.add(item)
+# 停用词与色情词由词表注册表统一加载
+stopword_list = gsdmm_stopwords() | {"转发"}
+pron_list = pornography_words()
 
 
 def tokenize_text(text):
@@ -73,79 +76,134 @@ def remove_stopwords(text):
     return filtered_tokens
 
 
-def normalize_corpus(twitter_data):
-    # 清洗数据
-    fulltext = []
-    pron_pttn = r"|".join(pron_list)  # 色情词
-    url_pattern = re.compile(r'https://[a-zA-Z0-9.?/&=:]*', re.S)  # 过滤网址
-    name_pattern = re.compile(r'RT @[a-z,A-Z,0-9,_]+:|@[a-z,A-Z,0-9,_]+')  # 过滤 @微博名
-    for item in twitter_data['fulltext']:
-        dd = Traditional2Simplified(item)  # 将繁体字转化为中文
-        dd = url_pattern.sub("", dd)  # 去除推文后面的链接
-        dd = filter_emoji(dd)  # 去除表情
-        dd = name_pattern.sub("", dd)
-        dd = cleantxt(dd)  # 去除外文
-        dd = dd.replace('&amp', '')
-        dd = dd.replace('RT', '')
-        dd = dd.strip()  # 去除空格
-        # isfind=re.search(pron_pttn,dd)#查找色情词汇
-        # if isfind is not None:
-        #     dd="情色"+dd
-        fulltext.append(dd)
-
-    # 去停用词
-    normalized_corpus = []
-
-    for text in fulltext:
-        #         isfind=re.search(pron_pttn, text)#查找色情词汇
-        noStopWords = remove_stopwords(text)
+# 清洗后的文本不含换行符，且jieba总是在换行处切分，拼接后一次分词与逐条分词结果相同
+_BATCH_SEPARATOR = "\n"
+
+# 分词缓存的命名空间带上停用词表的指纹，停用词表变化后不会读到旧结果
+token_cache = get_token_cache("normalize-" + text_digest("\n".join(sorted(stopword_list)))[:12])
+
+
+def _tokenize_batch(cleaned_texts):
+    """
+    对非空的已清洗文本分词并去停用词，整批只调用一次jieba
+    :param cleaned_texts: 非空文本列表
+    :return: 与输入一一对应的词语列表
+    """
+    words = [[] for _ in cleaned_texts]
+    if not cleaned_texts:
+        return words
+
+    position = 0
+    current = words[position]
+    for token in jieba.cut(_BATCH_SEPARATOR.join(cleaned_texts)):
+        if token == _BATCH_SEPARATOR:
+            position += 1
+            current = words[position]
+            continue
+        token = token.strip()
+        if token and token not in stopword_list:
+            current.append(token)
+    return words
 
-        text = " ".join(noStopWords)
-        #         if isfind is not None:
-        #             text+=" 色情"
-        normalized_corpus.append(text)
 
-    return normalized_corpus, fulltext
+class TextNormalizer(object):
+    """
+    文本清洗 + 分词 + 去停用词。
+    清洗顺序与原来逐步替换的实现一致：繁转简 -> 网址和表情 -> @微博名 -> 外文 -> 删除指定词 -> 去首尾空格。
+    原来的 replace('&amp', '') 放在去外文之后，此时 '&' 已被替换成空格，永远匹配不到，因此省去
+    """
+
+    def __init__(self, remove_words=('RT', '微博'), batch_size=512):
+        """
+        :param remove_words: 去外文之后依次删除的词，顺序有意义（删除 'RT' 可能拼出新的 '微博'）
+        :param batch_size: 流式处理时每批交给jieba的文本条数
+        """
+        self.remove_words = tuple(remove_words)
+        self.batch_size = batch_size
+
+    def clean(self, text):
+        """
+        :param text: 原始文本
+        :return: 清洗后的文本
+        """
+        dd = Traditional2Simplified(text)  # 将繁体字转化为中文
+        dd = _URL_EMOJI_PATTERN.sub("", dd)  # 去除链接和表情
+        dd = _NAME_PATTERN.sub("", dd)
+        dd = _FOREIGN_PATTERN.sub(' ', dd)  # 去除外文
+        for word in self.remove_words:
+            dd = dd.replace(word, '')
+        return dd.strip()  # 去除空格
+
+    def tokenize_many(self, cleaned_texts):
+        """
+        对已清洗的文本分词并去停用词；结果按文本哈希缓存，未命中的文本去重后整批只调用一次jieba
+        :param cleaned_texts: clean 的结果列表
+        :return: 与输入一一对应的词语列表，空文本对应空列表
+        """
+        words = [[] for _ in cleaned_texts]
+        non_empty = [index for index, dd in enumerate(cleaned_texts) if dd]
+        if not non_empty:
+            return words
+
+        cached = token_cache.tokenize_many([cleaned_texts[index] for index in non_empty], _tokenize_batch)
+        for index, tokens in zip(non_empty, cached):
+            words[index] = list(tokens)  # 缓存中的列表是共享的，返回副本
+        return words
+
+    def normalize_stream(self, iterable, skip_empty=True):
+        """
+        逐条产出清洗与分词结果，每次只在内存中保留一批文本，适合直接消费数据库游标
+        :param iterable: 原始文本的可迭代对象
+        :param skip_empty: 是否跳过清洗后为空的文本
+        :return: 生成器，元素为 (清洗后的文本, 词语列表)
+        """
+        batch = []
+        for item in iterable:
+            dd = self.clean(item)
+            if skip_empty and not dd:
+                continue
+            batch.append(dd)
+            if len(batch) >= self.batch_size:
+                yield from zip(batch, self.tokenize_many(batch))
+                batch = []
+        if batch:
+            yield from zip(batch, self.tokenize_many(batch))
+
+
+# normalize_corpus 不删除 '微博'，其余函数都删除
+corpus_normalizer = TextNormalizer(remove_words=('RT',))
+text_normalizer = TextNormalizer()
 
 
-def normalize_corpus_part(twitter_data):
-    # 清洗数据
+def normalize_corpus(twitter_data):
+    """
+    :param twitter_data: 含 fulltext 列的 DataFrame（或含 fulltext 键的字典）
+    :return: (以空格连接的分词结果, 清洗后的文本)，清洗后为空的文本也保留
+    """
     fulltext = []
-    pron_pttn = r"|".join(pron_list)  # 色情词
-    url_pattern = re.compile(r'https://[a-zA-Z0-9.?/&=:]*', re.S)  # 过滤网址
-    name_pattern = re.compile(r'RT @[a-z,A-Z,0-9,_]+:|@[a-z,A-Z,0-9,_]+')  # 过滤 @微博名
-    for item in twitter_data:
-        dd = Traditional2Simplified(item)  # 将繁体字转化为中文
-        dd = url_pattern.sub("", dd)  # 去除推文后面的链接
-        dd = filter_emoji(dd)  # 去除表情
-        dd = name_pattern.sub("", dd)
-        dd = cleantxt(dd)  # 去除外文
-        dd = dd.replace('&amp', '')
-        dd = dd.replace('RT', '')
-        dd = dd.replace('微博', '')
-        dd = dd.strip()  # 去除空格
-        # isfind=re.search(pron_pttn,dd)#查找色情词汇
-        # if isfind is not None:
-        #     dd="情色"+dd
-        if len(dd) != 0:
-            fulltext.append(dd)
-
-    # 去停用词
     normalized_corpus = []
+    for dd, words in corpus_normalizer.normalize_stream(twitter_data['fulltext'], skip_empty=False):
+        fulltext.append(dd)
+        normalized_corpus.append(" ".join(words))
+    return normalized_corpus, fulltext
 
-    for text in fulltext:
-        #         isfind=re.search(pron_pttn, text)#查找色情词汇
-        noStopWords = remove_stopwords(text)
-
-        text = " ".join(noStopWords)
-        #         if isfind is not None:
-        #             text+=" 色情"
-        normalized_corpus.append(text)
 
-    words = []
-    for i in normalized_corpus:
-        words.append(i.split(' '))
-    return words
+def normalize_corpus_part(twitter_data):
+    """
+    :param twitter_data: 原始文本列表
+    :return: 每条非空文本的词语列表（全部是停用词的文本对应 ['']）
+    """
+    return [words or [''] for _, words in text_normalizer.normalize_stream(twitter_data)]
+
+
+def normalize_texts(texts):
+    """
+    批量清洗、分词并去停用词，规则与 normalize_corpus_part 相同；
+    区别在于结果与输入一一对应（清洗后为空的文本对应空列表）
+    :param texts: 文本列表
+    :return: 每条文本的词语列表
+    """
+    return text_normalizer.tokenize_many([text_normalizer.clean(item) for item in texts])
 
 
 if __name__ == '__main__':
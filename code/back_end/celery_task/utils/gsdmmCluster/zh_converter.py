@@ -0,0 +1,70 @@
+# -*- coding:utf-8 -*-
+"""
+:繁体转简体转换器
+进程内只根据 zh_wiki 的 zh2Hans 表构建一次：
+    - 一般字符直接用 str.translate 逐字替换
+    - 可能构成多字词的位置（相邻两字是某个多字词的前缀）由预编译的正则定位，只在这些位置运行
+      langconv 状态机，状态机回到初始状态后立即回到 translate，因此输出与 Converter('zh-hans') 逐字一致
+"""
+import re
+
+try:
+    from .langconv import Converter, MAPS, START
+except ImportError:
+    from langconv import Converter, MAPS, START
+
+
+class SimplifiedConverter(object):
+    def __init__(self, to_encoding='zh-hans'):
+        self.to_encoding = to_encoding
+        convert_map = MAPS[to_encoding]
+        # 状态机只有在相邻两个字构成多字词的前缀时才会产生分支，其余字符逐字转换即可
+        two_char_prefixes = sorted(key for key in convert_map._map if len(key) == 2)
+        self._table = {ord(key): to_word or key
+                       for key, (_, _, to_word) in convert_map._map.items()
+                       if len(key) == 1}
+        self._prefix_pattern = re.compile(
+            '|'.join(re.escape(prefix) for prefix in two_char_prefixes)
+        ) if two_char_prefixes else None
+
+    def _convert_region(self, string, start, result):
+        """
+        从start开始运行langconv状态机，直到其回到初始状态
+        :return: 状态机回到初始状态后的下一个位置
+        """
+        converter = Converter(self.to_encoding)
+        for index in range(start, len(string)):
+            converter.feed(string[index])
+            machines = converter.machines
+            if len(machines) == 1 and machines[0].state == START:
+                result.append(converter.get_result())
+                return index + 1
+        converter.end()
+        result.append(converter.get_result())
+        return len(string)
+
+    def convert(self, string):
+        if self._prefix_pattern is None:
+            return string.translate(self._table)
+        result = []
+        position = 0
+        length = len(string)
+        while position < length:
+            match = self._prefix_pattern.search(string, position)
+            if match is None:
+                result.append(string[position:].translate(self._table))
+                break
+            result.append(string[position:match.start()].translate(self._table))
+            position = self._convert_region(string, match.start(), result)
+        return ''.join(result)
+
+    def convert_many(self, strings):
+        """
+        批量转换
+        :param strings: 字符串列表
+        :return: 转换后的字符串列表
+        """
+        return [self.convert(string) for string in strings]
+
+
+simplified_converter = SimplifiedConverter('zh-hans')
@@ -0,0 +1,60 @@
+"""
+:停用词、色情词、广告词等词表的进程级注册表
+每个词表文件在进程内只读取一次，以 frozenset 的形式在各个分析模块之间共享
+"""
+import os
+import threading
+
+_UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+_BACK_END_DIR = os.path.dirname(os.path.dirname(_UTILS_DIR))
+
+# 哈工大停用词表：词云、SinglePass 聚类使用
+HIT_STOPWORDS_PATH = os.path.join(_BACK_END_DIR, "dict", "哈工大停用词表.txt")
+# gsdmm 聚类与文本清洗使用的停用词表
+GSDMM_STOPWORDS_PATH = os.path.join(_UTILS_DIR, "gsdmmCluster", "stopwords.txt")
+# 色情词表
+PORNOGRAPHY_PATH = os.path.join(_UTILS_DIR, "gsdmmCluster", "pronography.txt")
+# themeCluster 示例脚本使用的停用词表
+THEME_STOPWORDS_PATH = os.path.join(_UTILS_DIR, "themeCluster", "data", "stop_words.txt")
+
+# 出现即判定为广告的词
+ADVERTISEMENT_WORDS = frozenset(["王者荣耀", "券后", "售价", '¥', "￥", '下单', '转发微博', '转发', '微博'])
+
+_word_sets = dict()  # {文件绝对路径: frozenset}
+_lock = threading.Lock()
+
+
+def load_word_set(path):
+    """
+    读取词表文件（每行一个词，去除首尾空白），同一文件只读取一次
+    :param path: 词表路径，相对路径按当前工作目录解析；为空时返回空集合
+    :return: frozenset
+    """
+    if not path:
+        return frozenset()
+    path = os.path.abspath(path)
+    words = _word_sets.get(path)
+    if words is None:
+        with _lock:
+            words = _word_sets.get(path)
+            if words is None:
+                with open(path, "r", encoding="utf-8") as f:
+                    words = frozenset(line.strip() for line in f)
+                _word_sets[path] = words
+    return words
+
+
+def hit_stopwords():
+    return load_word_set(HIT_STOPWORDS_PATH)
+
+
+def gsdmm_stopwords():
+    return load_word_set(GSDMM_STOPWORDS_PATH)
+
+
+def pornography_words():
+    return load_word_set(PORNOGRAPHY_PATH)
+
+
+def theme_stopwords():
+    return load_word_set(THEME_STOPWORDS_PATH)
@@ -6,22 +6,17 @@
 
 # -*- coding: utf-8 -*
 # from tfidfCluster.langconv import *        # 目前没有用到该算法
-from .gsdmmCluster.normalization import normalize_corpus_part
+from .gsdmmCluster.normalization import normalize_corpus_part, normalize_texts
+from collections import Counter
 import pymongo
-import os
+
+# 关键词数量，与 GetKeyWord 的截取规则一致
+KEY_WORD_COUNT = 31
 
 
 class MyCloud:
     def __init__(self, content: list):
         self.content = content
-        # 使用相对于项目根目录的路径
-        base_dir = os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        )
-        stopwords_path = os.path.join(base_dir, "dict", "哈工大停用词表.txt")
-        self.stop_words = [
-            w.strip() for w in open(stopwords_path, "r", encoding="UTF-8").readlines()
-        ]
         self.words_list = list()  # 分词表
         self.words_dict = dict()  # 词语和对应出现次数 字典
 
@@ -30,7 +25,8 @@ class MyCloud:
         对文本进行分词,并将分词列表中的 停用词去掉
         """
         self.words_list = normalize_corpus_part(self.content)
-        self.words_list = [w for w in self.words_list if w not in self.stop_words]
+        # 原实现用整条文本的分词列表与停用词表比较，从未去掉任何词；
+        # 按词过滤会改变已有任务的词云与关键词，这里保持原有结果
 
     def CountWords(self):
         """
@@ -83,15 +79,39 @@ class MyCloud:
         :return:
         """
         self.GenerateWordCloud()
-        key_word = str()
-        for i in range(0, len(self.words_list), 1):
-            if i < len(self.words_list):
-                key_word = key_word + self.words_list[i]["name"] + " "
-            else:
-                key_word = key_word + self.words_list[i]["name"]
-            if i >= 30:
-                break
-        return key_word
+        return self._join_key_word(self.words_list, KEY_WORD_COUNT)
+
+    @staticmethod
+    def _join_key_word(words_list: list, top_k: int) -> str:
+        return "".join(item["name"] + " " for item in words_list[:top_k])
+
+    @classmethod
+    def keywords_for_many(cls, texts: list, top_k: int = KEY_WORD_COUNT) -> list:
+        """
+        批量提取关键词，第i项与 MyCloud(texts[i].split(" ")).GetKeyWord() 的结果相同；
+        整批文本只清洗、分词一次，不再为每条文本构造 MyCloud
+        :param texts: 文本列表
+        :param top_k: 每条文本保留的关键词数
+        :return: 关键词字符串列表
+        """
+        parts_list = [text.split(" ") for text in texts]
+        part_words = normalize_texts([part for parts in parts_list for part in parts])
+        key_words = list()
+        offset = 0
+        for parts in parts_list:
+            words_dict = Counter()
+            for words in part_words[offset:offset + len(parts)]:
+                words_dict.update(words)
+            offset += len(parts)
+            # Counter 保留首次出现的顺序，稳定排序后与 ReshapeDict 的结果一致
+            words_list = [
+                {"name": word, "value": count}
+                for word, count in words_dict.items()
+                if len(word) >= 2
+            ]
+            words_list.sort(key=lambda i: i["value"], reverse=True)
+            key_words.append(cls._join_key_word(words_list, top_k))
+        return key_words
 
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+"""
+:请求限速工具
+"""
+import asyncio
+import logging
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger()
+
+
+class AsyncRateLimiter:
+    """
+    asyncio 下的匀速限流器，保证相邻两次放行的间隔不小于 1/rate 秒
+    """
+
+    def __init__(self, rate: float):
+        """
+        :param rate: 每秒允许的请求数，小于等于0时不限速
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_time = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        等待直到获得一次请求许可
+        :return:
+        """
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶：每秒补充 rate 个令牌，最多积累 capacity 个；
+    令牌不足时预约下一个令牌并阻塞等待，多个线程共用时总速率不超过 rate
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        :param rate: 每秒补充的令牌数，小于等于0时不限速
+        :param capacity: 桶容量，即允许的突发请求数
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._last_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        阻塞直到获得一个令牌
+        :return:
+        """
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_time) * self.rate)
+            self._last_time = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+# GCRA 预约：tat 为下一个令牌的理论到达时间（毫秒，取 Redis 服务器时间，所有 worker 共用同一个时钟）；
+# 每次调用都预约一个令牌并返回需要等待的毫秒数，突发量为 capacity
+_RESERVE_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local wait = tat - (capacity - 1) * interval - now
+if wait < 0 then wait = 0 end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now + interval))
+return wait
+"""
+
+
+# Redis 出错后改用进程内限流的时长（秒），之后重新尝试 Redis
+REDIS_RETRY_INTERVAL = 30
+
+
+class RedisRateLimiter:
+    """
+    多个进程共享的令牌桶，状态保存在 Redis 的同一个键中，所有 Celery worker 的总速率不超过 rate；
+    未配置 Redis 时使用进程内的 TokenBucket；Redis 出错后的 REDIS_RETRY_INTERVAL 秒内暂时使用进程内限流，之后重新使用 Redis
+    """
+
+    def __init__(self, key: str, rate: float, capacity: int = 1, redis_url: str = None):
+        """
+        :param key: 限流状态在 Redis 中的键，共用同一个键的限流器共享额度
+        :param rate: 每秒补充的令牌数，小于等于0时不限速
+        :param capacity: 桶容量，即允许的突发请求数
+        :param redis_url: Redis 地址，为 None 时只在进程内限流
+        """
+        self.key = key
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._local = TokenBucket(rate, self.capacity)
+        self._script = None
+        self._redis_disabled_until = 0.0  # Redis 出错后暂停使用到这个时间
+        if redis_url and redis is not None:
+            client = redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+            self._script = client.register_script(_RESERVE_SCRIPT)
+
+    def _reserve(self):
+        """
+        :return: 需要等待的秒数，Redis 不可用时返回 None
+        """
+        if self._script is None or time.monotonic() < self._redis_disabled_until:
+            return None
+        interval = 1000.0 / self.rate
+        try:
+            wait = self._script(keys=[self.key], args=[interval, self.capacity])
+        except redis.RedisError as e:
+            logger.warning(f"Redis 限流不可用，{REDIS_RETRY_INTERVAL} 秒内改为进程内限流: {e}")
+            self._redis_disabled_until = time.monotonic() + REDIS_RETRY_INTERVAL
+            return None
+        return int(wait) / 1000.0
+
+    def acquire(self):
+        """
+        阻塞直到获得一个令牌
+        :return:
+        """
+        if self.rate <= 0:
+            return
+        wait = self._reserve()
+        if wait is None:
+            self._local.acquire()
+        elif wait > 0:
+            time.sleep(wait)
@@ -12,13 +12,13 @@
 
 import codecs
 import json
-import os
 import numpy
 import pandas as pd
 import jieba
 import pickle
 import re
 from .langconv import *
+from ..lexicon import ADVERTISEMENT_WORDS, hit_stopwords
 
 
 def Traditional2Simplified(sentence):
@@ -73,17 +73,7 @@ def Match(comment, content):
         ]
     """
     content_comment = []
-    advertisement = [
-        "王者荣耀",
-        "券后",
-        "售价",
-        "¥",
-        "￥",
-        "下单",
-        "转发微博",
-        "转发",
-        "微博",
-    ]
+    advertisement = ADVERTISEMENT_WORDS
 
     for k in range(0, len(content)):
         judge = []
@@ -137,17 +127,8 @@ def Match(comment, content):
 def preContent():
     print("停用词读取")
     global stop_words
-    # 使用项目中的停用词表路径
-    base_dir = os.path.dirname(
-        os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        )
-    )
-    stopwords_path = os.path.join(base_dir, "dict", "哈工大停用词表.txt")
-    stop_words = [
-        w.strip() for w in open(stopwords_path, "r", encoding="UTF-8").readlines()
-    ]
-    stop_words.extend(
+    # 在共享的哈工大停用词表上补充本场景的停用词
+    stop_words = hit_stopwords() | frozenset(
         [
             "\n",
             "\t",
@@ -163,10 +144,9 @@ def preContent():
             "王者",
             "荣耀",
         ]
+        + [chr(i) for i in range(128000, 128722 + 1)]
+        + ["A股"]
     )
-    for i in range(128000, 128722 + 1):
-        stop_words.extend(chr(i))
-    stop_words.extend(["A股"])
 
     print("comment读取")
     f = codecs.open("./Agu_comment.json", "r", "UTF-8-sig")
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import jieba
+from celery_task.utils.lexicon import load_word_set
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.feature_extraction.text import TfidfTransformer
 from sklearn.cluster import KMeans
@@ -18,11 +19,7 @@ class KmeansClustering():
         :param stopwords:
         :return:
         """
-        if stopwords:
-            with open(stopwords, 'r', encoding='utf-8') as f:
-                return [line.strip() for line in f]
-        else:
-            return []
+        return load_word_set(stopwords)
 
     def preprocess_data(self, corpus_path):
         """
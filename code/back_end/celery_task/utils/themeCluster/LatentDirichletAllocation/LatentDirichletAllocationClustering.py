@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import jieba
+from celery_task.utils.lexicon import load_word_set
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
 
@@ -16,8 +17,7 @@ def print_top_words(model, feature_names, n_top_words):
 
 class LDAClustering():
     def load_stopwords(self, stopwords_path):
-        with open(stopwords_path, 'r', encoding='utf-8') as f:
-            return [line.strip() for line in f]
+        return load_word_set(stopwords_path)
 
     def cut_words(self, sentence):
         return ' '.join(jieba.lcut(sentence))
@@ -34,7 +34,7 @@ class LDAClustering():
 
         stopwords = self.load_stopwords(stopwords_path)
 
-        self.cntVector = CountVectorizer(stop_words=stopwords)
+        self.cntVector = CountVectorizer(stop_words=list(stopwords))
 
         cntTf = self.cntVector.fit_transform(corpus)
 
@@ -1,13 +1,13 @@
 # -*- coding: UTF-8 -*-
 
-import os
 import sys
 import jieba
 import json
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from celery_task.utils.my_cloud import MyCloud
+from celery_task.utils.lexicon import hit_stopwords, load_word_set
+from celery_task.utils.token_cache import get_token_cache
 from celery_task.config import mongo_conf
 from celery_task.utils import mongo_client
 
@@ -28,88 +28,138 @@ class SinglePassCluster:
         self.origin_data_list = blog_data
         self.tag_task_id = tag_task_id
         self.user_list = user_list
-        # 如果没有提供路径，使用项目中的默认路径
-        if stopWords_path is None:
-            base_dir = os.path.dirname(
-                os.path.dirname(
-                    os.path.dirname(
-                        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                    )
-                )
-            )
-            stopWords_path = os.path.join(base_dir, "dict", "哈工大停用词表.txt")
+        # 如果没有提供路径，使用项目中默认的哈工大停用词表
         self.stopwords = self.load_stopwords(stopWords_path)
         if isinstance(my_stopwords, list):
-            self.stopwords += my_stopwords
+            self.stopwords = self.stopwords | frozenset(my_stopwords)
+        # TfidfVectorizer 只接受 list 形式的停用词
         self.tfidf = TfidfVectorizer(
-            stop_words=self.stopwords, max_df=max_df, max_features=max_features
+            stop_words=list(self.stopwords), max_df=max_df, max_features=max_features
         )
         self.simi_thr = simi_threshold
-        self.cluster_center_vec = []  # [cluster_center_vec, ]
+        # 簇中心只保存各簇向量之和的非零项，按词语倒排：{词语列: {簇序号: 该簇在此列上的和}}，
+        # 内存与所有文本的非零元素个数同阶；余弦相似度与向量长度无关，和向量与均值向量（簇中心）的相似度相同
+        self.term_clusters = {}
+        self.center_norm2 = np.zeros(0)  # 各簇向量和的模长平方，容量按需倍增
+        self.center_count = 0  # 当前簇数
         self.idx_2_text = {}  # {文本id: text, }
         self.cluster_2_idx = {}  # {cluster_id: [text_id, ]}
         self.res_path = res_save_path  # save self.cluster_2_idx
         self.tags = list()
 
     def load_stopwords(self, path):
-        stopwords = []
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                stopwords.append(line.strip())
-        return stopwords
+        if path is None:
+            return hit_stopwords()
+        return load_word_set(path)
 
     def cut_sentences(self):
         texts = list()
         for data in self.origin_data_list:
             texts.append(data["text"])
-        texts_cut = [" ".join(jieba.lcut(t)) for t in texts]
+        # 原文分词结果按文本哈希缓存，重复的博文只分词一次
+        words_list = get_token_cache("lcut").tokenize_many(
+            texts, lambda ts: [jieba.lcut(t) for t in ts]
+        )
+        texts_cut = [" ".join(words) for words in words_list]
         self.idx_2_text = {idx: text for idx, text in enumerate(texts)}
         return texts_cut
 
     def get_tfidf(self, texts_cut):
-        tfidf = self.tfidf.fit_transform(texts_cut)
-        return tfidf.todense().tolist()
+        # 保持稀疏矩阵，内存只与非零元素个数有关
+        return self.tfidf.fit_transform(texts_cut).tocsr()
 
-    def cosion_simi(self, vec):
-        simi = cosine_similarity(np.array([vec]), np.array(self.cluster_center_vec))
-        max_idx = np.argmax(simi, axis=1)[0]
-        max_val = simi[0][max_idx]
-        return max_val, max_idx
+    def init_centers(self, capacity=16):
+        self.term_clusters = {}
+        self.center_norm2 = np.zeros(capacity)
+        self.center_count = 0
 
-    def single_pass(self):
+    def add_center(self, indices, data):
+        """
+        以一篇文本新建簇
+        :param indices: 文本稀疏向量的非零列
+        :param data: 对应的值
+        :return: 新簇的序号
+        """
+        capacity = len(self.center_norm2)
+        if self.center_count == capacity:
+            self.center_norm2 = np.concatenate([self.center_norm2, np.zeros(capacity)])
+        cluster_id = self.center_count
+        for term, value in zip(indices.tolist(), data.tolist()):
+            self.term_clusters.setdefault(term, {})[cluster_id] = value
+        self.center_norm2[cluster_id] = data @ data
+        self.center_count += 1
+        return cluster_id
+
+    def update_center(self, cluster_id, indices, data, dot):
+        """
+        把文本加入簇，增量更新簇的向量和
+        :param dot: 文本向量与该簇向量和的内积（cosion_simi 已算出）
+        """
+        for term, value in zip(indices.tolist(), data.tolist()):
+            clusters = self.term_clusters.setdefault(term, {})
+            clusters[cluster_id] = clusters.get(cluster_id, 0.0) + value
+        self.center_norm2[cluster_id] += 2 * dot + data @ data
+
+    def cosion_simi(self, indices, data):
+        """
+        文本与所有簇中心的余弦相似度，只访问文本非零列的倒排项
+        :return: (最大相似度, 对应簇序号, 与各簇向量和的内积)
+        """
+        n = self.center_count
+        dots = np.zeros(n)
+        for term, value in zip(indices.tolist(), data.tolist()):
+            clusters = self.term_clusters.get(term)
+            if clusters:
+                ids = np.fromiter(clusters.keys(), dtype=np.intp, count=len(clusters))
+                sums = np.fromiter(clusters.values(), dtype=float, count=len(clusters))
+                dots[ids] += value * sums
+        denom = np.sqrt(data @ data) * np.sqrt(self.center_norm2[:n])
+        simi = np.divide(dots, denom, out=np.zeros(n), where=denom > 0)
+        max_idx = int(np.argmax(simi))
+        return simi[max_idx], max_idx, dots
+
+    def cluster(self):
+        """
+        单遍聚类，文本与最相似簇中心的相似度不低于阈值时并入该簇（簇中心取簇内向量均值），否则新建簇
+        :return: {cluster_id: [text_id, ]}
+        """
         texts_cut = self.cut_sentences()
         tfidf = self.get_tfidf(texts_cut)
-        # print(len(tfidf), len(tfidf[0]))
+        self.init_centers()
 
         # 开始遍历
-        for idx, vec in enumerate(tfidf):
+        for idx in range(tfidf.shape[0]):
+            start, end = tfidf.indptr[idx], tfidf.indptr[idx + 1]
+            indices, data = tfidf.indices[start:end], tfidf.data[start:end]
             # 初始化，没有中心生成
-            if not self.cluster_center_vec:
-                self.cluster_center_vec.append(vec)
-                self.cluster_2_idx[0] = [idx]
+            if self.center_count == 0:
+                self.cluster_2_idx[self.add_center(indices, data)] = [idx]
             # 存在簇
             else:
-                max_simi, max_idx = self.cosion_simi(vec)
+                max_simi, max_idx, dots = self.cosion_simi(indices, data)
                 if max_simi >= self.simi_thr:
+                    self.update_center(max_idx, indices, data, dots[max_idx])
                     self.cluster_2_idx[max_idx].append(idx)
                 else:
-                    self.cluster_center_vec.append(vec)
-                    self.cluster_2_idx[len(self.cluster_2_idx)] = [idx]
+                    self.cluster_2_idx[self.add_center(indices, data)] = [idx]
+        return self.cluster_2_idx
+
+    def single_pass(self):
+        self.cluster()
+
+        # user_id -> 在 user_list 中的下标
+        user_index = dict()
+        for index, user in enumerate(self.user_list):
+            user_index.setdefault(user.get("user_id"), []).append(index)
         for key in self.cluster_2_idx.keys():
             index = self.cluster_2_idx[key]
             cluster_text = [self.origin_data_list[i].get("text") for i in index]
-            user_id_list = [self.origin_data_list[i].get("user_id") for i in index]
+            user_id_list = {self.origin_data_list[i].get("user_id") for i in index}
             tags = MyCloud(cluster_text).GetWordCloud()
-            hit = 0
-            for user_index in range(len(self.user_list)):
-                if self.user_list[user_index].get("user_id") in user_id_list:
-                    self.user_list[user_index]["marks"] = (
-                        tags[0:10] if len(tags) > 10 else tags
-                    )
-                    self.user_list[user_index]["category"] = key
-                    hit += 1
-                if hit >= len(user_id_list):
-                    break
+            for user_id in user_id_list:
+                for i in user_index.get(user_id, ()):
+                    self.user_list[i]["marks"] = tags[0:10]
+                    self.user_list[i]["category"] = key
         update = {"data": self.user_list, "categories": len(self.cluster_2_idx)}
         mongo_client.db[mongo_conf.USER].update_one(
             {"tag_task_id": self.tag_task_id}, {"$set": update}
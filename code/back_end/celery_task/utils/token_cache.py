@@ -0,0 +1,197 @@
+"""
+:分词结果缓存
+以文本内容的哈希为键缓存 jieba 分词结果，同一条文本在一次任务的多个阶段中只分词一次。
+一级缓存为进程内 LRU，二级缓存为 Redis（可关闭），供多个 celery worker 共享
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from celery_task.config import token_cache_conf
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+# Redis 出错后暂停使用 Redis 的时长（秒），之后重新尝试，避免每次分词都等待连接超时
+REDIS_RETRY_INTERVAL = 30
+
+
+def text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
+
+def _get_redis():
+    """
+    懒加载共享的 Redis 连接，未启用或不可用时返回 None
+    """
+    global _redis_client
+    if not token_cache_conf.REDIS_ENABLED or redis is None:
+        return None
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(
+                    token_cache_conf.REDIS_URL, socket_timeout=1, socket_connect_timeout=1
+                )
+    return _redis_client
+
+
+class TokenCache(object):
+    """
+    两级分词缓存，键为 命名空间 + 文本哈希，值为词语列表
+    """
+
+    def __init__(self, namespace: str, local_size: int = None, redis_ttl: int = None):
+        """
+        :param namespace: 命名空间，分词规则（词典、停用词）不同的结果必须使用不同的命名空间
+        :param local_size: 进程内 LRU 的最大条数
+        :param redis_ttl: Redis 中的过期时间（秒）
+        """
+        self.namespace = namespace
+        self.local_size = local_size if local_size is not None else token_cache_conf.LOCAL_SIZE
+        self.redis_ttl = redis_ttl if redis_ttl is not None else token_cache_conf.REDIS_TTL
+        self.redis_enabled = True  # 为 False 时只使用进程内缓存
+        self._redis_disabled_until = 0.0  # Redis 出错后暂停使用到这个时间
+        self._local = OrderedDict()  # {文本哈希: 词语列表}
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _redis_key(self, digest):
+        return "token_cache:{}:{}".format(self.namespace, digest)
+
+    def _redis(self):
+        if not self.redis_enabled or time.time() < self._redis_disabled_until:
+            return None
+        return _get_redis()
+
+    def _disable_redis(self, e):
+        # Redis 不可用时暂时只使用进程内缓存，不影响分词结果，REDIS_RETRY_INTERVAL 秒后重新尝试
+        print(f"分词缓存: Redis 不可用，{REDIS_RETRY_INTERVAL} 秒内仅使用进程内缓存: {e}")
+        self._redis_disabled_until = time.time() + REDIS_RETRY_INTERVAL
+
+    def _get_local(self, digests):
+        found = dict()
+        with self._lock:
+            for digest in digests:
+                tokens = self._local.get(digest)
+                if tokens is not None:
+                    self._local.move_to_end(digest)
+                    found[digest] = tokens
+        return found
+
+    def _set_local(self, items):
+        with self._lock:
+            for digest, tokens in items.items():
+                self._local[digest] = tokens
+                self._local.move_to_end(digest)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _get_redis_many(self, digests):
+        client = self._redis()
+        if client is None or not digests:
+            return dict()
+        try:
+            values = client.mget([self._redis_key(digest) for digest in digests])
+        except redis.RedisError as e:
+            self._disable_redis(e)
+            return dict()
+        return {
+            digest: json.loads(value)
+            for digest, value in zip(digests, values)
+            if value is not None
+        }
+
+    def _set_redis_many(self, items):
+        client = self._redis()
+        if client is None or not items:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for digest, tokens in items.items():
+                pipe.setex(self._redis_key(digest), self.redis_ttl, json.dumps(tokens, ensure_ascii=False))
+            pipe.execute()
+        except redis.RedisError as e:
+            self._disable_redis(e)
+
+    def tokenize_many(self, texts: list, tokenize) -> list:
+        """
+        批量取分词结果，缓存未命中的文本去重后一次性交给 tokenize 计算
+        :param texts: 文本列表
+        :param tokenize: 函数，输入文本列表，返回对应的词语列表
+        :return: 与 texts 一一对应的词语列表；同一文本的结果是同一个列表对象，调用方不应修改
+        """
+        digests = [text_digest(text) for text in texts]
+        unique = dict()  # {文本哈希: 文本}，保持首次出现的顺序
+        for digest, text in zip(digests, texts):
+            unique.setdefault(digest, text)
+
+        found = self._get_local(unique)
+        self.local_hits += len(found)
+        missing = [digest for digest in unique if digest not in found]
+
+        from_redis = self._get_redis_many(missing)
+        if from_redis:
+            self.redis_hits += len(from_redis)
+            self._set_local(from_redis)
+            found.update(from_redis)
+            missing = [digest for digest in missing if digest not in from_redis]
+
+        if missing:
+            self.misses += len(missing)
+            computed = dict(zip(missing, tokenize([unique[digest] for digest in missing])))
+            self._set_local(computed)
+            self._set_redis_many(computed)
+            found.update(computed)
+
+        return [found[digest] for digest in digests]
+
+    def stats(self) -> dict:
+        """
+        :return: 命中与未命中次数（按去重后的文本计）及当前进程内缓存大小
+        """
+        total = self.local_hits + self.redis_hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (total - self.misses) / total if total else 0.0,
+            "local_size": len(self._local),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.local_hits = self.redis_hits = self.misses = 0
+
+
+_caches = dict()  # {命名空间: TokenCache}
+
+
+def get_token_cache(namespace: str) -> TokenCache:
+    """
+    同一命名空间在进程内共享一个缓存实例
+    """
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = _caches.setdefault(namespace, TokenCache(namespace))
+    return cache
+
+
+def token_cache_stats() -> list:
+    """
+    :return: 所有分词缓存的命中统计
+    """
+    return [cache.stats() for cache in _caches.values()]
@@ -0,0 +1,158 @@
+"""
+:用户资料缓存
+同一批活跃账号会出现在不同话题中，用户资料以 user_id 为键存入 Mongo 的 user_profile 集合，在所有任务与 worker 之间共享。
+查询成功的结果缓存 TTL 秒，所有数据源都失败的用户缓存 NEGATIVE_TTL 秒（负缓存），到期由 TTL 索引自动清理
+"""
+import threading
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import PyMongoError
+
+from celery_task.config import mongo_conf, user_profile_conf
+from celery_task.utils import mongo_client
+
+
+class UserProfileCache(object):
+    """
+    跨任务的用户资料缓存，文档结构为
+    {_id: user_id, ok: 是否查询成功, profile: 用户资料或None, source: 数据来源, updated_at, expire_at}
+    """
+
+    def __init__(self, ttl: int = None, negative_ttl: int = None):
+        """
+        :param ttl: 查询成功的缓存时间（秒）
+        :param negative_ttl: 查询失败的缓存时间（秒），为0时不缓存失败
+        """
+        self.ttl = ttl if ttl is not None else user_profile_conf.TTL
+        self.negative_ttl = negative_ttl if negative_ttl is not None else user_profile_conf.NEGATIVE_TTL
+        self._lock = threading.Lock()
+        self._indexed = False
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def collection(self):
+        return mongo_client.db[mongo_conf.USER_PROFILE]
+
+    def _ensure_indexes(self):
+        if self._indexed:
+            return
+        self.collection.create_index([("expire_at", ASCENDING)], expireAfterSeconds=0)
+        self._indexed = True
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def get_many(self, user_ids: list) -> dict:
+        """
+        :param user_ids: 用户id列表
+        :return: {user_id: 用户资料或None}，None 表示命中负缓存；未命中（或已过期）的用户不在结果中
+        """
+        user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        if not user_ids:
+            return dict()
+        try:
+            docs = self.collection.find(
+                {"_id": {"$in": user_ids}, "expire_at": {"$gt": datetime.utcnow()}},
+                {"ok": 1, "profile": 1},
+            )
+            found = {doc["_id"]: doc.get("profile") if doc.get("ok") else None for doc in docs}
+        except PyMongoError as e:
+            print(f"用户资料缓存: 读取失败，直接查询: {e}")
+            self._count(errors=1, misses=len(user_ids))
+            return dict()
+        negative = sum(1 for profile in found.values() if profile is None)
+        self._count(hits=len(found) - negative, negative_hits=negative, misses=len(user_ids) - len(found))
+        return found
+
+    def put_many(self, profiles: dict, source: str = None):
+        """
+        写入查询结果
+        :param profiles: {user_id: 用户资料或None}，None 表示所有数据源都失败
+        :param source: 数据来源
+        """
+        now = datetime.utcnow()
+        operations = []
+        for user_id, profile in profiles.items():
+            ok = bool(profile)
+            ttl = self.ttl if ok else self.negative_ttl
+            if ttl <= 0:
+                continue
+            operations.append(UpdateOne(
+                {"_id": str(user_id)},
+                {"$set": {
+                    "ok": ok,
+                    "profile": profile if ok else None,
+                    "source": source,
+                    "updated_at": now,
+                    "expire_at": now + timedelta(seconds=ttl),
+                }},
+                upsert=True,
+            ))
+        if not operations:
+            return
+        try:
+            self._ensure_indexes()
+            self.collection.bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            print(f"用户资料缓存: 写入失败: {e}")
+            self._count(errors=1)
+
+    def lookup_many(self, user_ids: list, fetch, source: str = None) -> dict:
+        """
+        先查缓存，未命中的用户交给 fetch 一次性查询，结果（包括失败）写回缓存
+        :param user_ids: 用户id列表
+        :param fetch: 函数，输入未命中的用户id列表，返回 {user_id: 用户资料或None}
+        :param source: 数据来源
+        :return: {user_id: 用户资料或None}
+        """
+        user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        found = self.get_many(user_ids)
+        missing = [user_id for user_id in user_ids if user_id not in found]
+        if missing:
+            fetched = fetch(missing) or dict()
+            fetched = {user_id: fetched.get(user_id) for user_id in missing}
+            self.put_many(fetched, source)
+            found.update(fetched)
+        return {user_id: found.get(user_id) for user_id in user_ids}
+
+    def lookup(self, user_id, fetch, source: str = None):
+        """
+        查询单个用户
+        :param fetch: 函数，输入用户id，返回用户资料，失败时返回None
+        :return: 用户资料或None
+        """
+        return self.lookup_many(
+            [user_id], lambda missing: {missing[0]: fetch(missing[0])}, source
+        ).get(str(user_id))
+
+    def invalidate(self, user_ids: list):
+        """
+        删除指定用户的缓存
+        """
+        self.collection.delete_many({"_id": {"$in": [str(user_id) for user_id in user_ids]}})
+
+    def stats(self) -> dict:
+        """
+        :return: 当前进程的命中统计（按去重后的用户计）
+        """
+        total = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": (self.hits + self.negative_hits) / total if total else 0.0,
+        }
+
+    def clear_stats(self):
+        with self._lock:
+            self.hits = self.negative_hits = self.misses = self.errors = 0
+
+
+user_profile_cache = UserProfileCache()
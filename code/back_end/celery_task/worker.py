@@ -7,7 +7,7 @@ import time
 
 from celery_task import celeryapp
 from celery_task.tag_task.tag_spider_task import spider
-from celery import current_task
+from celery import current_task, chain, chord, group
 from celery_task.tag_task.tag_introduce_task import introduce
 from celery_task.tag_task.tag_word_cloud_task import word_cloud
 from celery_task.tag_task.tag_relaton_task import tag_relation
@@ -16,53 +16,152 @@ from celery_task.utils.update_task_status import update_task_status
 from celery_task.tag_comment_task.task import start_task
 from celery_task.tag_task.tag_user_analysis_task import user_analysis
 from celery_task.config import mongo_conf
+from celery_task.utils import mongo_client
+
+
+def _load_weibo_data(tag_task_id: str) -> dict:
+    """
+    各阶段任务从BLOG集合中读取爬虫结果，避免通过broker传递整份博文数据
+    :param tag_task_id: 话题任务id
+    :return: 爬虫阶段保存的博文数据
+    """
+    weibo_data = mongo_client.db[mongo_conf.BLOG].find_one(
+        {"tag_task_id": tag_task_id}, {"_id": 0}
+    )
+    return weibo_data or {"data": [], "tag_task_id": tag_task_id}
+
+
+def _run_stage(tag_task_id: str, stage_name: str, func, *args):
+    """
+    执行单个分析阶段，阶段内异常只记录日志，不影响其它并行阶段
+    :param tag_task_id: 话题任务id
+    :param stage_name: 阶段名称
+    :param func: 阶段函数
+    :param args: 阶段函数参数
+    :return: 阶段函数返回值，失败时返回None
+    """
+    import traceback
+
+    try:
+        print(f'[{tag_task_id}] 开始{stage_name}')
+        current_task.update_state(state='PROGRESS',
+                                  meta={'current': stage_name, 'task_id': tag_task_id})
+        update_task_status(stage_name, tag_task_id)
+        result = func(*args)
+        print(f'[{tag_task_id}] {stage_name}完成')
+        return result
+    except Exception as e:
+        print(f'[{tag_task_id}] {stage_name}失败: {e}')
+        traceback.print_exc()
+        return None
+
+
+@celeryapp.task()
+def introduce_stage(tag_task_id: str):
+    """构建话题基本信息"""
+    _run_stage(tag_task_id, "构建话题基本信息", introduce,
+               _load_weibo_data(tag_task_id), tag_task_id)
+
+
+@celeryapp.task()
+def word_cloud_stage(tag_task_id: str):
+    """构建词云"""
+    _run_stage(tag_task_id, "构建词云任务", word_cloud,
+               _load_weibo_data(tag_task_id), tag_task_id)
+
+
+@celeryapp.task()
+def hot_stage(tag_task_id: str, tag: str):
+    """挖掘热度数据，失败不影响任务完成"""
+    _run_stage(tag_task_id, "挖掘热度信息任务", hot_task, tag, tag_task_id)
+
+
+@celeryapp.task()
+def user_analysis_stage(tag_task_id: str, user_id_list: list) -> dict:
+    """
+    分析用户成分，结果作为转发关系阶段的输入
+    :return: 用户分类数据，失败时为空数据以确保后续任务可以继续
+    """
+    user_mark_data = _run_stage(tag_task_id, "分析用户成分任务", user_analysis,
+                                _load_weibo_data(tag_task_id), tag_task_id, user_id_list)
+    if user_mark_data:
+        print(f'[{tag_task_id}] 用户数量: {len(user_mark_data.get("data", []))}')
+        return user_mark_data
+    user_mark_data = {"data": [], "categories": 0}
+    try:
+        mongo_client.db[mongo_conf.USER].update_one(
+            {"tag_task_id": tag_task_id}, {"$set": user_mark_data}
+        )
+    except Exception:
+        pass
+    return user_mark_data
+
+
+@celeryapp.task()
+def tag_relation_stage(user_mark_data: dict, tag_task_id: str):
+    """构建转发关系，仅依赖用户成分阶段"""
+    if user_mark_data is None:
+        user_mark_data = {"data": [], "categories": 0}
+    _run_stage(tag_task_id, "构建转发关系任务", tag_relation,
+               _load_weibo_data(tag_task_id), tag_task_id, user_mark_data)
+
+
+@celeryapp.task()
+def finish_stage(tag_task_id: str):
+    """所有阶段结束后更新任务状态"""
+    print(f'[{tag_task_id}] 所有任务完成')
+    update_task_status('SUCCESS', tag_task_id)
+
+
+def build_stage_dag(tag_task_id: str, tag: str, user_id_list: list):
+    """
+    构建爬虫之后各分析阶段的依赖图:
+        introduce / word_cloud / hot 在爬虫结束后立即并行执行
+        user_analysis -> tag_relation 为唯一的依赖链
+    全部阶段结束后由chord回调标记任务完成
+    :param tag_task_id: 话题任务id
+    :param tag: 话题名
+    :param user_id_list: 待分析的用户id列表
+    :return: celery chord签名
+    """
+    return chord(
+        group(
+            introduce_stage.si(tag_task_id),
+            word_cloud_stage.si(tag_task_id),
+            hot_stage.si(tag_task_id, tag),
+            chain(
+                user_analysis_stage.si(tag_task_id, user_id_list),
+                tag_relation_stage.s(tag_task_id),
+            ),
+        ),
+        finish_stage.si(tag_task_id),
+    )
 
 
 @celeryapp.task()
 def task_schedule(tag_task_id: str, tag: str):
     """
-    任务管理函数
+    任务管理函数: 执行爬虫后以依赖图的形式并行分发各分析阶段
     :param tag_task_id: 话题任务id
     :param tag:话题名
-    :param task_id_dict:各个任务id组成的字典
     :return:
     """
     import traceback
-    
+
     try:
         print(f'[{tag_task_id}] 开始爬虫任务')
         current_task.update_state(state='PROGRESS',
                                   meta={'current': "爬虫任务", 'task_id': tag_task_id})
-        update_task_status(tag_task_id, 'PROGRESS')
+        update_task_status('PROGRESS', tag_task_id)
         weibo_data, weibo_post_list, user_id_list = spider(tag, tag_task_id)
         print(f'[{tag_task_id}] 爬虫任务完成，获取{len(weibo_post_list)}条博文，{len(user_id_list)}个用户')
     except Exception as e:
         print(f'[{tag_task_id}] 爬虫任务失败: {e}')
         traceback.print_exc()
-        update_task_status(tag_task_id, 'FAILURE')
+        update_task_status('FAILURE', tag_task_id)
         raise
 
-    try:
-        print(f'[{tag_task_id}] 开始构建话题基本信息任务')
-        current_task.update_state(state='PROGRESS',
-                                  meta={'current': "构建话题基本信息", 'task_id': tag_task_id})
-        introduce(weibo_data, tag_task_id)
-        print(f'[{tag_task_id}] 话题基本信息任务完成')
-    except Exception as e:
-        print(f'[{tag_task_id}] 话题基本信息任务失败: {e}')
-        traceback.print_exc()
-
-    try:
-        print(f'[{tag_task_id}] 开始构建词云任务')
-        current_task.update_state(state='PROGRESS',
-                                  meta={'current': "构建词云任务", 'task_id': tag_task_id})
-        word_cloud(weibo_data, tag_task_id)
-        print(f'[{tag_task_id}] 词云任务完成')
-    except Exception as e:
-        print(f'[{tag_task_id}] 词云任务失败: {e}')
-        traceback.print_exc()
-
-    # 开始爬取详细博文任务, 由于分析用户成分任务阻塞时间较长，故而在此处发布博文详细任务的提取
+    # 评论分析任务与话题分析阶段相互独立，直接异步发布
     try:
         print(f'[{tag_task_id}] 启动评论分析任务（异步）')
         start_comment_task.delay(weibo_post_list, tag_task_id)
@@ -71,58 +170,12 @@ def task_schedule(tag_task_id: str, tag: str):
         print(f'[{tag_task_id}] 启动评论分析任务失败: {e}')
         traceback.print_exc()
 
-    user_mark_data = None
-    try:
-        print(f'[{tag_task_id}] 分析用户成分任务')
-        current_task.update_state(state='PROGRESS',
-                                  meta={'current': '分析用户成分任务', 'task_id': tag_task_id})
-        user_mark_data = user_analysis(weibo_data, tag_task_id, user_id_list)
-        if user_mark_data:
-            print(f'[{tag_task_id}] 用户成分任务完成，用户数量: {len(user_mark_data.get("data", []))}')
-        else:
-            print(f'[{tag_task_id}] 用户成分任务完成，但返回数据为空')
-    except Exception as e:
-        print(f'[{tag_task_id}] 用户成分任务失败: {e}')
-        traceback.print_exc()
-        # 创建空的user_mark_data以确保后续任务可以继续
-        from celery_task.utils import mongo_client
-        from celery_task.config import mongo_conf
-        user_mark_data = {"data": [], "categories": 0}
-        try:
-            mongo_client.db[mongo_conf.USER].update_one(
-                {"tag_task_id": tag_task_id}, {"$set": user_mark_data}
-            )
-        except:
-            pass
-
-    try:
-        print(f'[{tag_task_id}] 开始构建转发关系任务')
-        current_task.update_state(state='PROGRESS',
-                                  meta={'current': "构建转发关系任务", 'task_id': tag_task_id})
-        if user_mark_data is None:
-            user_mark_data = {"data": [], "categories": 0}
-        tag_relation(weibo_data, tag_task_id, user_mark_data)
-        print(f'[{tag_task_id}] 转发关系任务完成')
-    except Exception as e:
-        print(f'[{tag_task_id}] 转发关系任务失败: {e}')
-        traceback.print_exc()
-
-    try:
-        print(f'[{tag_task_id}] 开始挖掘热度数据任务')
-        current_task.update_state(state='PROGRESS',
-                                  meta={'current': "挖掘热度信息任务", 'task_id': tag_task_id})
-        tag_name = weibo_data.get('tag', tag)
-        hot_task(tag_name, tag_task_id)
-        print(f'[{tag_task_id}] 热度数据任务完成')
-    except Exception as e:
-        print(f'[{tag_task_id}] 热度数据任务失败: {e}')
-        traceback.print_exc()
-        # 热度数据失败不影响任务完成
-
-    print(f'[{tag_task_id}] 所有任务完成')
-    current_task.update_state(state='SUCCESS',
-                              meta={'current': "完成", 'task_id': tag_task_id})
-    update_task_status(tag_task_id, 'SUCCESS')
+    dag_result = build_stage_dag(tag_task_id, weibo_data.get('tag', tag), user_id_list).apply_async()
+    # 记录回调任务id，任务状态以该回调为准
+    mongo_client.db[mongo_conf.TASK].update_one(
+        {"tag_task_id": tag_task_id}, {"$set": {"tag_dag_task_id": dag_result.id}}
+    )
+    print(f'[{tag_task_id}] 分析阶段已并行分发')
 
 
 @celeryapp.task()
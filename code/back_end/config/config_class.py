@@ -26,3 +26,17 @@ class TaskConfig(BaseSettings):
     MAX_USER_ANALYSIS: int = 30
     # 爬取微博的最大页数（每页约20条）
     MAX_SPIDER_PAGES: int = 24
+    # 爬取搜索页的并发数（小于等于1时逐页串行爬取）
+    SPIDER_CONCURRENCY: int = 6
+    # 爬取搜索页的请求速率上限（次/秒）
+    SPIDER_RATE_LIMIT: float = 4.0
+    # 爬取转发页时每个账号的请求速率（次/秒），默认与原来每页随机等待 1~10 秒的平均间隔一致
+    REPOST_ACCOUNT_RATE: float = 0.18
+    # 爬取转发页时每个账号允许的突发请求数
+    REPOST_ACCOUNT_BURST: int = 1
+    # 用户分析时同时查询的用户数（小于等于1时逐个查询，每个用户之后随机等待）
+    USER_ANALYSIS_CONCURRENCY: int = 4
+    # 每个账号每分钟允许查询的用户数，所有 worker 共享，默认与原来每个用户随机等待 5~10 秒的平均间隔一致
+    USER_LOOKUPS_PER_MINUTE: float = 8
+    # gopup 兜底查询的超时时间（秒）
+    GOPUP_TIMEOUT: float = 20
@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends
 from models.dto.restful_model import RESTfulModel
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from dependencise import get_mongo_db
-from service.comment_extract import get_tree_data, get_comment_task_id, getByTendencyId, getByCloudId,\
+from service.comment_extract import get_tree_data, get_subtree_data, get_comment_task_id, getByTendencyId, getByCloudId,\
     getTypeByClusterId, getKeyNode, getWeiboById
 from celery_task.tag_comment_task.task import getTaskList, refresh_task
 from celery_task.config import mongo_conf
@@ -34,6 +34,19 @@ async def get_tree(tag_task_id: str, weibo_id: str, mongo_db: AsyncIOMotorDataba
         return RESTfulModel(code=1, data=str(e))
 
 
+@comment_router.get('/tree/subtree', response_model=RESTfulModel,
+                    description='按需展开传播树：返回以 node_id 为根、向下 depth 层的子树，根节点 node_id 为 0',
+                    summary='传播树子树')
+async def get_subtree(tag_task_id: str, weibo_id: str, node_id: int = 0, depth: int = 2,
+                      mongo_db: AsyncIOMotorDatabase = Depends(get_mongo_db)):
+    comment_task_id = await get_comment_task_id(tag_task_id=tag_task_id, weibo_id=weibo_id, mongo=mongo_db)
+    try:
+        return RESTfulModel(code=0, data=await get_subtree_data(comment_task_id, mongo_db, node_id=node_id,
+                                                                depth=depth))
+    except Exception as e:
+        return RESTfulModel(code=1, data=str(e))
+
+
 @comment_router.get('/tendency', response_model=RESTfulModel,
                     description='获取微博热度趋势数据',
                     summary='热度数据')
@@ -192,6 +192,56 @@ async def getKeyNode(comment_task_id: str, mongo_db: AsyncIOMotorDatabase):
     return {"data": [], "comments": []}
 
 
+# 传播树节点返回给前端的字段
+TREE_NODE_PROJECTION = {
+    "_id": 0,
+    "node_id": 1,
+    "parent_id": 1,
+    "depth": 1,
+    "subtree_size": 1,
+    "child_count": 1,
+    "user_name": 1,
+    "content": 1,
+}
+
+
+def node2item(node: dict, max_depth: int = None):
+    """
+    节点文档转换为前端树结构的节点
+    :param node: comment_tree_node 文档
+    :param max_depth: 本次返回的最大深度，指定时标记该节点是否还有未返回的子节点
+    :return:
+    """
+    item = {
+        "id": node["node_id"],
+        "name": node["user_name"],
+        "value": node["content"],
+        "count": node["subtree_size"],
+        "children": [],
+    }
+    if max_depth is not None:
+        item["has_more"] = node["depth"] >= max_depth and node["child_count"] > 0
+    return item
+
+
+def assemble_tree(nodes: list, root_id: int = 0, max_depth: int = None):
+    """
+    以父节点id把节点组装为嵌套结构；nodes 按 node_id 升序，子节点顺序与建树时的插入顺序一致
+    :param nodes: comment_tree_node 文档列表
+    :param root_id: 根节点id
+    :param max_depth: 同 node2item
+    :return: 根节点
+    """
+    items = {}
+    for node in nodes:
+        item = node2item(node, max_depth)
+        items[node["node_id"]] = item
+        parent = items.get(node["parent_id"])
+        if parent is not None and node["node_id"] != root_id:
+            parent["children"].append(item)
+    return items.get(root_id)
+
+
 async def get_tree_data(comment_task_id: str, mongo_db: AsyncIOMotorDatabase):
     if not comment_task_id:
         return {"tag_comment_task_id": "", "data": None}
@@ -200,17 +250,55 @@ async def get_tree_data(comment_task_id: str, mongo_db: AsyncIOMotorDatabase):
         data = await mongo_db[mongo_conf.COMMENT_TREE].find_one(
             {"tag_comment_task_id": comment_task_id}
         )
-        if data and "data" in data:
+        # 旧版本的传播树整棵嵌套保存在 data 字段中；建树进行中或失败时为空，此时按节点读取
+        if data and data.get("data"):
             editJson(data["data"])
             return {
                 "tag_comment_task_id": data["tag_comment_task_id"],
                 "data": data["data"],
             }
-        return {"tag_comment_task_id": comment_task_id, "data": None}
+        nodes = await mongo_db[mongo_conf.COMMENT_TREE_NODE].find(
+            {"tag_comment_task_id": comment_task_id}, TREE_NODE_PROJECTION
+        ).sort("node_id", 1).to_list(length=None)
+        return {"tag_comment_task_id": comment_task_id, "data": assemble_tree(nodes)}
     except Exception as e:
         return {"error": str(e)}
 
 
+async def get_subtree_data(
+    comment_task_id: str, mongo_db: AsyncIOMotorDatabase, node_id: int = 0, depth: int = 2
+):
+    """
+    按需展开传播树：返回以 node_id 为根、向下 depth 层的子树；
+    最底层中还有子节点未返回的节点 has_more 为 True，可以该节点 id 继续展开
+    :param comment_task_id: 评论任务id
+    :param mongo_db: mongo数据库对象
+    :param node_id: 子树根节点id，根节点为 0
+    :param depth: 返回的层数
+    :return:
+    """
+    if not comment_task_id:
+        return {"tag_comment_task_id": "", "data": None}
+
+    collection = mongo_db[mongo_conf.COMMENT_TREE_NODE]
+    root = await collection.find_one(
+        {"tag_comment_task_id": comment_task_id, "node_id": node_id},
+        dict(TREE_NODE_PROJECTION, path=1),
+    )
+    if not root:
+        return {"tag_comment_task_id": comment_task_id, "data": None}
+    max_depth = root["depth"] + max(depth, 0)
+    query = {"tag_comment_task_id": comment_task_id, "depth": {"$gt": root["depth"], "$lte": max_depth}}
+    if node_id != 0:
+        # path 只包含数字和 "/"，前缀匹配可以使用索引
+        query["path"] = {"$regex": "^" + root["path"] + "/"}
+    nodes = await collection.find(query, TREE_NODE_PROJECTION).sort("node_id", 1).to_list(length=None)
+    return {
+        "tag_comment_task_id": comment_task_id,
+        "data": assemble_tree([root] + nodes, root_id=node_id, max_depth=max_depth),
+    }
+
+
 async def deleteTask(tag_task_id, mongo_db: AsyncIOMotorDatabase):
     result = mongo_db[mongo_conf.COMMENT_TASK].find({"tag_task_id": tag_task_id})
     comment_task_id_list = list()
@@ -227,8 +315,10 @@ async def deleteTask(tag_task_id, mongo_db: AsyncIOMotorDatabase):
         await mongo_db[mongo_conf.COMMENT_CLUSTER].delete_one(query)
         await mongo_db[mongo_conf.COMMENT_NODE].delete_one(query)
         await mongo_db[mongo_conf.COMMENT_REPOSTS].delete_many(query)
+        await mongo_db[mongo_conf.COMMENT_REPOST_CRAWL].delete_many(query)
         await mongo_db[mongo_conf.COMMENT_TENDENCY].delete_one(query)
         await mongo_db[mongo_conf.COMMENT_TREE].delete_one(query)
+        await mongo_db[mongo_conf.COMMENT_TREE_NODE].delete_many(query)
         # Linux不支持CTRL_C_EVENT，使用SIGTERM
         import platform
 
@@ -20,6 +20,16 @@ async def get_task_state(tag_task_id: str, mongo_db: AsyncIOMotorDatabase) -> st
     if tag_task_result['status'] != 'SUCCESS':
         if tag_task_result['status'] == 'FAILURE':
             return tag_task_result['status']
+        dag_task_id = tag_task_result.get('tag_dag_task_id')
+        if dag_task_id:
+            #   分析阶段已并行分发, 各阶段会把当前阶段写入status, 回调完成后置为SUCCESS
+            dag_task = celeryapp.AsyncResult(dag_task_id)
+            if dag_task.state == 'FAILURE':
+                await mongo_collection.update_one({'tag_task_id': tag_task_id},
+                                                  {'$set': {'status': dag_task.state}}
+                                                  )
+                return dag_task.state
+            return tag_task_result['status']
         celery_id = tag_task_result['tag_celery_task_id']
         task = celeryapp.AsyncResult(celery_id)
         if task.state == "PROGRESS":
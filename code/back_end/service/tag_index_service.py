@@ -23,8 +23,10 @@ async def get_tag_task_list(mongo_db: AsyncIOMotorDatabase) -> list:
                 {"tag_task_id": tag["tag_task_id"]}
             )
             if tag_base and "vital_user" in tag_base:
+                # 旧版本在用户信息获取失败时保存的 vital_user 为 None
+                vital_user = tag_base["vital_user"] if isinstance(tag_base["vital_user"], dict) else {}
                 user = User(
-                    **tag_base["vital_user"]
+                    **vital_user
                     # user_id=tag_base['vital_user']['user_id'],
                     #         head=tag_base['vital_user']['head'],
                     #         nickname=tag_base['vital_user']['nickname'],
@@ -147,6 +149,9 @@ async def delete_task_by_id(tag_task_id: str, mongo_db: AsyncIOMotorDatabase) ->
                 celeryapp.control.revoke(
                     task["tag_celery_task_id"], terminate=True, signal="SIGTERM"
                 )
+            if task.get("tag_dag_task_id"):
+                # 分析阶段并行分发后，撤销其回调以免删除后又被标记为完成
+                celeryapp.control.revoke(task["tag_dag_task_id"])
             await deleteTask(
                 tag_task_id=tag_task_id, mongo_db=mongo_db
             )  # 删除后台的二级任务:评论分析任务
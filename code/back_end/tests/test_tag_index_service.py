@@ -0,0 +1,63 @@
+"""
+:话题总览页：重要用户信息获取失败时任务列表仍能正常展示
+运行: cd code/back_end && python -m pytest tests
+"""
+import asyncio
+
+from celery_task.tag_task import tag_introduce_task
+from service import tag_index_service
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return [dict(doc) for doc in self.docs[:length]]
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query):
+        return FakeCursor(self.docs)
+
+    async def find_one(self, query):
+        for doc in self.docs:
+            if all(doc.get(key) == value for key, value in query.items()):
+                return dict(doc)
+        return None
+
+
+async def task_succeeded(tag_task_id, mongo_db):
+    return "SUCCESS"
+
+
+def test_failed_user_lookup_returns_dict(monkeypatch):
+    monkeypatch.setattr(tag_introduce_task.user_profile_cache, "lookup", lambda user_id, fetch: None)
+    vital_user = tag_introduce_task.get_user_data("1001")
+    assert isinstance(vital_user, dict)
+    assert vital_user["user_id"] == "1001"
+
+
+def test_task_list_renders_failed_vital_user(monkeypatch):
+    monkeypatch.setattr(tag_introduce_task.user_profile_cache, "lookup", lambda user_id, fetch: None)
+    monkeypatch.setattr(tag_index_service, "get_task_state", task_succeeded)
+    introduces = [
+        # 当前版本：获取失败时保存 get_user_data 的返回
+        {"tag_task_id": "t1", "tag": "话题1", "user_count": 1, "weibo_count": 1,
+         "vital_user": tag_introduce_task.get_user_data("1001")},
+        # 旧版本：获取失败时保存 None
+        {"tag_task_id": "t2", "tag": "话题2", "user_count": 2, "weibo_count": 3, "vital_user": None},
+    ]
+    mongo_db = {
+        "tag_task": FakeCollection([{"tag_task_id": "t1"}, {"tag_task_id": "t2"}]),
+        "tag_introduce": FakeCollection(introduces),
+    }
+
+    tag_list = asyncio.run(tag_index_service.get_tag_task_list(mongo_db))
+
+    assert [tag.tag_task_id for tag in tag_list] == ["t1", "t2"]
+    assert tag_list[0].vital_user.user_id == "1001"
+    assert tag_list[1].vital_user.user_id is None
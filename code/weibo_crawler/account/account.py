@@ -1,14 +1,23 @@
 """
 账号管理模块
-优先从统一配置文件读取 Cookie 和代理配置
+优先从统一配置文件读取 Cookie 和代理配置；
+账号池按各账号的成功率、剩余请求额度选择账号，被拦截的账号按指数退避暂停使用
 """
 
 from settings import LOGGING
+import settings
+from collections import deque
 import json
 import os
 import sys
+import time
 from urllib.parse import urlparse
 
+try:
+    import redis
+except ImportError:
+    redis = None
+
 # 添加配置模块路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
@@ -20,21 +29,109 @@ except ImportError:
     USE_UNIFIED_CONFIG = False
 
 
+# weibo_web_curl 返回的错误码中表示账号被拦截的部分：3 为 Cookie 失效/登录页/验证页/403，4 为 418（ip 被限制）
+BLOCK_ERROR_CODES = (3, 4)
+
+# 统计请求频率的时间窗口（秒）
+RATE_WINDOW = 60
+
+
 class Account:
-    """一个账号，包含cookie和proxy"""
+    """一个账号，包含cookie和proxy，以及调度用的健康状态"""
 
     def __init__(self, cookie, proxy):
         self.cookie = cookie
         self.proxy = proxy  # proxy[0]为proxy_host， proxy[1]为proxy_port
+        self.success_rate = 1.0  # 成功率（指数加权平均）
+        self.total = 0  # 累计请求数
+        self.failures = 0  # 累计失败数
+        self.blocks = 0  # 连续被拦截的次数，成功一次后清零
+        self.cooldown_until = 0.0  # 冷却结束的时间
+        self.last_error = None
+        self.last_error_time = None
+        self.last_used = 0.0
+        self._recent = deque()  # 最近 RATE_WINDOW 秒内的请求时间
 
     def __repr__(self):
         return "proxy: {}, cookie: {}".format(self.proxy, self.cookie)
 
+    def request_rate(self, now=None):
+        """
+        :return: 最近 RATE_WINDOW 秒内的请求数
+        """
+        now = time.time() if now is None else now
+        while self._recent and self._recent[0] <= now - RATE_WINDOW:
+            self._recent.popleft()
+        return len(self._recent)
+
+    def remaining_budget(self, now=None):
+        """
+        :return: 当前时间窗口内剩余的请求额度
+        """
+        return max(settings.ACCOUNT_REQUESTS_PER_MINUTE - self.request_rate(now), 0)
+
+    def cooling_down(self, now=None):
+        now = time.time() if now is None else now
+        return self.cooldown_until > now
+
+    def record_request(self, now=None):
+        """记录一次请求"""
+        now = time.time() if now is None else now
+        self.total += 1
+        self.last_used = now
+        self._recent.append(now)
+
+    def record_result(self, error_code, errmsg=None):
+        """
+        记录一次请求的结果，被拦截时进入冷却，冷却时长随连续被拦截的次数指数增长
+        :param error_code: weibo_web_curl 的错误码，0 为成功
+        :param errmsg: 错误信息
+        """
+        weight = settings.ACCOUNT_SUCCESS_RATE_WEIGHT
+        success = not error_code
+        self.success_rate = (1 - weight) * self.success_rate + weight * (1.0 if success else 0.0)
+        if success:
+            self.blocks = 0
+            return
+        now = time.time()
+        self.failures += 1
+        self.last_error = "{}: {}".format(error_code, errmsg) if errmsg else str(error_code)
+        self.last_error_time = now
+        if error_code in BLOCK_ERROR_CODES:
+            self.blocks += 1
+            cooldown = min(settings.ACCOUNT_COOLDOWN_BASE * 2 ** (self.blocks - 1), settings.ACCOUNT_COOLDOWN_MAX)
+            self.cooldown_until = now + cooldown
+            LOGGING.warning("账号被拦截（%s），冷却 %.0f 秒: proxy=%s, cookie=%s...",
+                            self.last_error, cooldown, self.proxy, (self.cookie or "")[:20])
+
+    def state(self, now=None):
+        """
+        :return: 账号的健康状态，Cookie 只保留前 20 个字符
+        """
+        now = time.time() if now is None else now
+        return {
+            "cookie": (self.cookie or "")[:20] + "...",
+            "proxy": self.proxy,
+            "status": "cooldown" if self.cooling_down(now) else "ok",
+            "cooldown_remaining": round(max(self.cooldown_until - now, 0), 1),
+            "success_rate": round(self.success_rate, 3),
+            "requests_last_minute": self.request_rate(now),
+            "remaining_budget": self.remaining_budget(now),
+            "total": self.total,
+            "failures": self.failures,
+            "consecutive_blocks": self.blocks,
+            "last_error": self.last_error,
+            "last_error_time": self.last_error_time,
+        }
+
 
 class AccountPool:
     """账号池，管理cookie和ip"""
 
-    def __init__(self, cookies, proxies):
+    def __init__(self, cookies, proxies, previous=None):
+        """
+        :param previous: 被替换的旧账号池，cookie 与 proxy 都没有变化的账号沿用其中的健康状态
+        """
         if not cookies or not proxies:
             raise ValueError
         if type(cookies) is not list or type(proxies) is not list:
@@ -42,8 +139,7 @@ class AccountPool:
 
         self.__cookies = cookies
         self.__proxies = proxies
-        self.accounts = list()
-        self.__count = 0
+        self.accounts = list(previous.accounts) if previous else list()
         self._compound_accounts()
 
     def __repr__(self):
@@ -55,11 +151,12 @@ class AccountPool:
         proxies_len = len(self.__proxies)
         max_len = max(cookies_len, proxies_len)
 
+        # cookie 与 proxy 都没有变化的账号保留原来的健康状态
+        old_accounts = {(acc.cookie, str(acc.proxy)): acc for acc in self.accounts}
         self.accounts.clear()
         for i in range(max_len):
-            account = Account(
-                self.__cookies[i % cookies_len], self.__proxies[i % proxies_len]
-            )
+            cookie, proxy = self.__cookies[i % cookies_len], self.__proxies[i % proxies_len]
+            account = old_accounts.pop((cookie, str(proxy)), None) or Account(cookie, proxy)
             self.accounts.append(account)
 
     def update(self, new_cookies=None, new_proxies=None):
@@ -74,7 +171,7 @@ class AccountPool:
         if new_cookies:  # 如果new_cookies不是None就进行更新
             self.__cookies = new_cookies
         if new_proxies:
-            self.accounts = new_proxies
+            self.__proxies = new_proxies
         # 将更新后的cookie和proxy进行配对复合成多个account
         self._compound_accounts()
 
@@ -108,13 +205,42 @@ class AccountPool:
                 )
             )
 
+    def fetch_account(self):
+        """
+        选择一个账号并记录这次请求：
+        不在冷却中的账号里，选 剩余请求额度 × 成功率 最高的，相同时选最久没有使用的（全部健康时等同于轮询）；
+        所有账号都在冷却时选冷却最早结束的，吞吐量下降但请求不会中断
+        :return: Account
+        """
+        now = time.time()
+        available = [acc for acc in self.accounts if not acc.cooling_down(now)]
+        if available:
+            account = max(
+                available,
+                key=lambda acc: (acc.remaining_budget(now) * acc.success_rate, -acc.last_used),
+            )
+        else:
+            account = min(self.accounts, key=lambda acc: acc.cooldown_until)
+        account.record_request(now)
+        return account
+
     def fetch(self):
         """获取一个账号的cookie和代理"""
-        self.__count += 1
-        self.__count = self.__count % len(self.accounts)
-        account = self.accounts[self.__count]
+        account = self.fetch_account()
         return account.cookie, account.proxy
 
+    def state(self):
+        """
+        :return: 账号池的状态，供 account_pool 接口展示
+        """
+        now = time.time()
+        accounts = [acc.state(now) for acc in self.accounts]
+        return {
+            "total": len(accounts),
+            "available": sum(1 for acc in accounts if acc["status"] == "ok"),
+            "accounts": accounts,
+        }
+
 
 def _load_from_unified_config():
     """从统一配置文件加载 Cookie 和代理"""
@@ -166,12 +292,12 @@ def _get_proxy_list(account_json: dict):
     return proxies if isinstance(proxies, list) else []
 
 
-def _build_pool(cookies: list, proxies: list):
+def _build_pool(cookies: list, proxies: list, previous=None):
     # AccountPool 原实现要求 cookies/proxies 都非空；这里做降级：若缺少则返回 None
     if not cookies or not proxies:
         return None
     try:
-        return AccountPool(cookies, proxies)
+        return AccountPool(cookies, proxies, previous)
     except Exception as e:
         LOGGING.error("init AccountPool failed: %s", e)
         return None
@@ -198,15 +324,31 @@ else:
 account_pool_mobile = _build_pool(_cookies_mobile, _proxies)
 
 
-def fetch_by_url(url: str):
+def fetch_account_by_url(url: str):
     """
-    获取移动端 cookie（统一使用移动端，兼容所有微博域名）
+    获取移动端账号（统一使用移动端，兼容所有微博域名）
+    :return: Account，请求结束后调用其 record_result 反馈结果
     """
     if account_pool_mobile:
-        return account_pool_mobile.fetch()
+        return account_pool_mobile.fetch_account()
     raise ValueError("No valid cookie/proxy config found")
 
 
+def fetch_by_url(url: str):
+    """
+    获取移动端 cookie（统一使用移动端，兼容所有微博域名）
+    """
+    account = fetch_account_by_url(url)
+    return account.cookie, account.proxy
+
+
+def pool_state():
+    """
+    :return: 当前账号池的状态，没有可用的账号池时为 None
+    """
+    return account_pool_mobile.state() if account_pool_mobile else None
+
+
 def update_pools(new_cookies_mobile=None, new_proxies=None):
     """
     运行时热更新账号池（供 account_update 接口调用）
@@ -221,7 +363,39 @@ def update_pools(new_cookies_mobile=None, new_proxies=None):
     if new_cookies_mobile is not None:
         if not isinstance(new_cookies_mobile, list):
             raise ValueError
-        account_pool_mobile = _build_pool(new_cookies_mobile, _proxies)
+        account_pool_mobile = _build_pool(new_cookies_mobile, _proxies, account_pool_mobile)
+
+
+# 与后端 celery_task/utils/cookie_provider.py 中的键一致
+COOKIES_KEY = "weibo:cookies_mobile"
+GENERATION_KEY = "weibo:cookie_generation"
+
+
+def publish_cookies(cookies_mobile):
+    """
+    把 account_update 接口更新的移动端 Cookie 写入 Redis 并递增版本号，
+    后端的 cookie_provider 检查到版本号变化后改用这份 Cookie；未安装 redis 或连接失败时只记录日志
+    :param cookies_mobile: Cookie 列表
+    :return: 是否写入成功
+    """
+    if redis is None:
+        return False
+    try:
+        client = redis.Redis(
+            host=os.getenv("REDIS_HOST", "127.0.0.1"),
+            port=int(os.getenv("REDIS_PORT", "6379")),
+            db=2,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+        )
+        pipe = client.pipeline()
+        pipe.set(COOKIES_KEY, json.dumps({"cookies": cookies_mobile, "time": time.time()}))
+        pipe.incr(GENERATION_KEY)
+        pipe.execute()
+        return True
+    except redis.RedisError as e:
+        LOGGING.warning("publish cookies failed: %s", e)
+        return False
 
 
 def reload_from_config():
@@ -243,5 +417,5 @@ def reload_from_config():
         _cookies_legacy = _get_cookie_list(account_json, "cookies")
         _cookies_mobile = _get_cookie_list(account_json, "cookies_mobile") or _cookies_legacy
     
-    account_pool_mobile = _build_pool(_cookies_mobile, _proxies)
+    account_pool_mobile = _build_pool(_cookies_mobile, _proxies, account_pool_mobile)
     return account_pool_mobile is not None
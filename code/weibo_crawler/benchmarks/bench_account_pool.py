@@ -0,0 +1,95 @@
+"""
+:账号调度对比：原来的轮询 vs 按健康状态调度
+模拟 10 分钟内每秒 1 个请求（虚拟时钟，不真正发请求），账号池中有 4 个账号：
+一个 Cookie 已失效（总是返回登录页，错误码 3），其余账号每分钟超过 30 次请求后被限制（418，错误码 4，限制 5 分钟）。
+每个请求最多尝试 RETRY_TIME 次，每次尝试重新选账号，统计最终成功的请求比例与被拦截的尝试次数
+运行: python -m benchmarks.bench_account_pool
+"""
+import logging
+
+import settings
+from account import account as account_module
+from account.account import AccountPool
+
+DEAD_COOKIE = "cookie-dead"
+LIMIT_PER_MINUTE = 30  # 模拟的服务端限制
+LIMIT_SECONDS = 300  # 超过限制后被封的时长
+
+
+class Clock:
+    """替换 account 模块中的 time，让调度使用虚拟时间"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+class Server:
+    """模拟微博服务端：按 cookie 统计请求频率，超过限制后返回 418"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.history = dict()
+        self.banned_until = dict()
+
+    def request(self, cookie):
+        now = self.clock.now
+        if cookie == DEAD_COOKIE:
+            return 3
+        if self.banned_until.get(cookie, 0) > now:
+            return 4
+        recent = [t for t in self.history.get(cookie, []) if t > now - 60] + [now]
+        self.history[cookie] = recent
+        if len(recent) > LIMIT_PER_MINUTE:
+            self.banned_until[cookie] = now + LIMIT_SECONDS
+            return 4
+        return 0
+
+
+def simulate(health_aware, seconds=600, rate=1):
+    clock = Clock()
+    account_module.time = clock
+    server = Server(clock)
+    pool = AccountPool([DEAD_COOKIE, "cookie-a", "cookie-b", "cookie-c"], [None])
+    count = 0
+    succeeded = 0
+    blocked = 0
+    attempts = 0
+    for step in range(seconds * rate):
+        clock.now = step / rate
+        count += 1
+        for _ in range(settings.RETRY_TIME):
+            if health_aware:
+                account = pool.fetch_account()
+            else:  # 原来的 AccountPool.fetch：每次取下一个账号
+                account = pool.accounts[attempts % len(pool.accounts)]
+            attempts += 1
+            error_code = server.request(account.cookie)
+            account.record_result(error_code)
+            if error_code == 0:
+                succeeded += 1
+                break
+            blocked += 1
+    return count, succeeded, blocked, pool
+
+
+def main():
+    saved_time = account_module.time
+    logging.disable(logging.WARNING)  # 不输出账号冷却的日志
+    try:
+        for name, health_aware in (("round_robin", False), ("health", True)):
+            count, succeeded, blocked, pool = simulate(health_aware)
+            print("{:>12}  {} requests  success {:6.1%}  blocked attempts {:5d}".format(
+                name, count, succeeded / count, blocked))
+            if health_aware:
+                for state in pool.state()["accounts"]:
+                    print("              {cookie:<24} total {total:5d}  success_rate {success_rate:.3f}  "
+                          "blocks {consecutive_blocks}".format(**state))
+    finally:
+        account_module.time = saved_time
+
+
+if __name__ == "__main__":
+    main()
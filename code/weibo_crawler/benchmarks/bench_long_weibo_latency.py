@@ -0,0 +1,102 @@
+"""
+:长微博重试期间的接口延迟对比
+在同一个 IOLoop 上启动一个最小的 tornado 应用：/long 获取长微博（前几次爬取失败，触发重试），/ping 立即返回。
+/long 进行期间每隔 50ms 请求一次 /ping，统计 /ping 的延迟。
+legacy 为改造前在重试间隔里调用 time.sleep 的实现，会卡住整个 IOLoop；改造后用 gen.sleep 等待，/ping 不受影响。
+weibo_web_curl 被替换为本地桩函数，不访问网络
+运行: python -m benchmarks.bench_long_weibo_latency [重试等待秒数]
+"""
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from tornado import gen, httpserver, ioloop, web
+from tornado.httpclient import AsyncHTTPClient
+from tornado.testing import bind_unused_port
+
+import settings
+from selector_parser import page_parser
+from selector_parser.page_parser import CommentParser
+
+FAILURES = 3  # 前几次爬取返回错误
+PAGE = (
+    '<html><head><meta charset="utf-8"></head><body><div class="c" id="M_"><div><span class="ctt">:这是一条很长的微博正文'
+    '</span><span class="ct">今天 12:00</span></div></div></body></html>'
+).encode("utf-8")
+
+
+def make_fake_curl():
+    calls = {"n": 0}
+
+    @gen.coroutine
+    def fake_weibo_web_curl(curl_aim, **kwargs):
+        calls["n"] += 1
+        if calls["n"] <= FAILURES:
+            return {"error_code": 5, "errmsg": "timed out"}
+        return {"error_code": 0, "response": SimpleNamespace(body=PAGE)}
+
+    return fake_weibo_web_curl
+
+
+def legacy_get_long_weibo(parser):
+    """改造前的实现：页面为空时原地 time.sleep，且不会重新爬取"""
+    for i in range(settings.LONG_WEIBO_RETRY_TIME):
+        if parser.selector is not None:
+            info = parser.selector.xpath("//div[@id='M_']")[0]
+            wb_content = page_parser.utils.handle_garbled(info)
+            wb_time = info.xpath("//span[@class='ct']/text()")[0]
+            return wb_content[wb_content.find(':') + 1:wb_content.rfind(wb_time)]
+        time.sleep(random.uniform(*settings.LONG_WEIBO_RETRY_DELAY))
+
+
+class LongHandler(web.RequestHandler):
+    @gen.coroutine
+    def get(self):
+        parser = CommentParser("K1abcdefg")
+        if self.get_argument("legacy", None):
+            content = legacy_get_long_weibo(parser)
+        else:
+            content = yield parser.get_long_weibo()
+        self.write(content or "")
+
+
+class PingHandler(web.RequestHandler):
+    def get(self):
+        self.write("pong")
+
+
+@gen.coroutine
+def measure(port, legacy):
+    page_parser.weibo_web_curl = make_fake_curl()
+    client = AsyncHTTPClient()
+    url = "http://127.0.0.1:{}".format(port)
+    long_future = client.fetch(url + "/long" + ("?legacy=1" if legacy else ""), request_timeout=120)
+    latencies = []
+    while not long_future.done():
+        start = time.perf_counter()
+        yield client.fetch(url + "/ping")
+        latencies.append(time.perf_counter() - start)
+        yield gen.sleep(0.05)
+    response = yield long_future
+    latencies.sort()
+    return response.body.decode("utf-8"), latencies
+
+
+@gen.coroutine
+def main(delay):
+    settings.LONG_WEIBO_RETRY_DELAY = (delay, delay)
+    sock, port = bind_unused_port()
+    server = httpserver.HTTPServer(web.Application([(r"/long", LongHandler), (r"/ping", PingHandler)]))
+    server.add_sockets([sock])
+    for name, legacy in (("legacy", True), ("gen.sleep", False)):
+        content, latencies = yield measure(port, legacy)
+        print("{:>9}  long weibo {!r:<14}  /ping x{:<3} p50 {:7.1f}ms  max {:7.1f}ms".format(
+            name, content[:12], len(latencies),
+            latencies[len(latencies) // 2] * 1000, latencies[-1] * 1000))
+    server.stop()
+
+
+if __name__ == "__main__":
+    retry_delay = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    ioloop.IOLoop.current().run_sync(lambda: main(retry_delay))
@@ -0,0 +1,112 @@
+"""
+:HTML 解析放到解析池前后的接口延迟对比
+在子进程中启动 search_tweets 与 statuses_show 接口（weibo_web_curl 替换为返回模拟页面的桩函数，模拟 20ms 网络耗时），
+主进程同时发出 N 个请求（默认 50 个，搜索与评论各半），统计每个请求的 p50/p99 延迟与总耗时；
+另外在请求进行期间每隔 10ms 请求一次 /ping，统计 IOLoop 的响应延迟。
+none 为原来在 IOLoop 线程上直接解析，thread/process 为 settings.PARSE_EXECUTOR 的两种解析池
+运行: python -m benchmarks.bench_parse_offload [并发数]
+"""
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from tornado import gen, httpserver, ioloop, web
+from tornado.httpclient import AsyncHTTPClient
+from tornado.testing import bind_unused_port
+
+import parse_pool
+import settings
+import weibo_curl_api
+from benchmarks.sample_pages import comment_page, fake_curl, search_page
+
+
+class PingHandler(web.RequestHandler):
+    def get(self):
+        self.write("pong")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+@gen.coroutine
+def run(port, concurrency):
+    client = AsyncHTTPClient(force_instance=True, max_clients=concurrency + 10)
+    url = "http://127.0.0.1:{}".format(port)
+    paths = ["/search_tweets?keyword=test&cursor={}".format(i) if i % 2 == 0 else
+             "/statuses_show?weibo_id=K{}&cursor=1".format(i) for i in range(concurrency)]
+    latencies = []
+
+    @gen.coroutine
+    def one(path):
+        start = time.perf_counter()
+        response = yield client.fetch(url + path, request_timeout=120)
+        latencies.append(time.perf_counter() - start)
+        return len(response.body)
+
+    start = time.perf_counter()
+    requests_future = gen.multi([one(path) for path in paths])
+    pings = []
+    while not requests_future.done():
+        ping_start = time.perf_counter()
+        yield client.fetch(url + "/ping")
+        pings.append(time.perf_counter() - ping_start)
+        yield gen.sleep(0.01)
+    sizes = yield requests_future
+    return time.perf_counter() - start, latencies, pings, sizes
+
+
+def serve(executor, port_queue):
+    """子进程（spawn 启动，避免继承父进程的事件循环）：以指定的解析池类型启动接口服务，端口通过 port_queue 返回"""
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")  # 接口内的 print 不输出
+    settings.PARSE_EXECUTOR = executor
+    weibo_curl_api.weibo_web_curl = fake_curl({
+        "search_weibo": search_page(20),
+        "weibo_comment": comment_page(100),
+    }, delay=0.02)
+    app = web.Application([
+        (r"/search_tweets", weibo_curl_api.SearchTweetsHandler),
+        (r"/statuses_show", weibo_curl_api.StatusesShowHandler),
+        (r"/ping", PingHandler),
+    ])
+    sock, port = bind_unused_port()
+    server = httpserver.HTTPServer(app)
+    server.add_sockets([sock])
+    if parse_pool.get_executor() is not None:  # 预先启动全部线程/进程
+        for future in [parse_pool.get_executor().submit(time.sleep, 0.2) for _ in range(settings.PARSE_WORKERS)]:
+            future.result()
+    loop = ioloop.IOLoop.current()
+    signal.signal(signal.SIGTERM, lambda *_: loop.add_callback_from_signal(loop.stop))
+    port_queue.put(port)
+    loop.start()
+    if parse_pool.get_executor() is not None:  # 退出前关闭解析池，避免留下子进程
+        parse_pool.get_executor().shutdown()
+
+
+def main(concurrency):
+    expected = None
+    context = multiprocessing.get_context("spawn")
+    for executor in ("none", "thread", "process"):
+        port_queue = context.Queue()
+        server = context.Process(target=serve, args=(executor, port_queue))
+        server.start()
+        try:
+            port = port_queue.get(timeout=60)
+            loop = ioloop.IOLoop.current()
+            total, latencies, pings, sizes = loop.run_sync(lambda: run(port, concurrency))
+        finally:
+            server.terminate()
+            server.join()
+        if expected is None:
+            expected = sizes
+        assert sizes == expected, "解析结果不一致"
+        print("{:>7}  {} requests  total {:6.3f}s  p50 {:7.1f}ms  p99 {:7.1f}ms  /ping max {:7.1f}ms".format(
+            executor, concurrency, total, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000,
+            max(pings) * 1000 if pings else 0))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
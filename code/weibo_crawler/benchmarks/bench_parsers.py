@@ -0,0 +1,129 @@
+"""
+:解析器基准测试
+对 fixtures 目录下每类保存的页面运行对应的解析器，报告每类页面的解析速度（pages/sec），
+并把解析结果与同名的 .json 比较，用于离线发现解析器的回归。
+fixtures 目录结构为 <页面类型>/<名称>.html，页面类型见 PARSERS；可以直接放入线上保存的页面，
+也可以用 python -m benchmarks.sample_pages 生成模拟页面。
+--update 时用当前解析器的结果重写 .json（确认解析器的改动符合预期之后再更新）
+运行: python -m benchmarks.bench_parsers [fixtures目录] [--update] [--seconds 每类测试秒数]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import parse_pool
+from selector_parser import PageParser, InfoParser
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def parse_user_page(body):
+    """用户主页：微博列表与总页数，页面中的微博不会触发额外的爬取（没有"全文"、多图与视频链接）"""
+    weibos, max_page = PageParser("fixture", parse_pool._Page(body), 0).get_one_page().result()
+    return {"weibos": [vars(weibo) for weibo in weibos], "max_page": max_page}
+
+
+def parse_info(body):
+    """资料页：用户的基本信息、学习与工作经历"""
+    return InfoParser(parse_pool._Page(body)).extract_user_info()
+
+
+# 页面类型 -> 解析函数，输入页面 bytes，输出可 json 序列化的结果
+PARSERS = {
+    "search": parse_pool.parse_search_weibo,
+    "search_users": parse_pool.parse_search_users,
+    "user_page": parse_user_page,
+    "index": lambda body: parse_pool.parse_user_index("fixture", body),
+    "comment": lambda body: parse_pool.parse_comments("fixture", body),
+    "info": parse_info,
+}
+
+
+def load_fixtures(fixtures_dir):
+    """
+    :return: {页面类型: [(html 路径, 页面 bytes)]}
+    """
+    fixtures = dict()
+    for kind in sorted(os.listdir(fixtures_dir)):
+        kind_dir = os.path.join(fixtures_dir, kind)
+        if kind not in PARSERS or not os.path.isdir(kind_dir):
+            continue
+        for name in sorted(os.listdir(kind_dir)):
+            if name.endswith(".html"):
+                path = os.path.join(kind_dir, name)
+                with open(path, "rb") as f:
+                    fixtures.setdefault(kind, list()).append((path, f.read()))
+    return fixtures
+
+
+def dump(result):
+    return json.dumps(result, ensure_ascii=False, sort_keys=True, indent=1)
+
+
+def check(kind, pages, update):
+    """
+    解析每个页面并与 .json 中保存的结果比较
+    :return: 结果不一致或缺少 .json 的页面路径列表
+    """
+    mismatched = list()
+    for path, body in pages:
+        result = dump(PARSERS[kind](body))
+        expected_path = path[:-len(".html")] + ".json"
+        if update:
+            with open(expected_path, "w", encoding="utf-8") as f:
+                f.write(result + "\n")
+            continue
+        if not os.path.exists(expected_path):
+            mismatched.append(path + "（缺少 .json，先用 --update 生成）")
+            continue
+        with open(expected_path, encoding="utf-8") as f:
+            if f.read().rstrip("\n") != result:
+                mismatched.append(path)
+    return mismatched
+
+
+def measure(kind, pages, seconds):
+    """
+    在 seconds 秒内循环解析该类的全部页面
+    :return: (解析的页面数, 耗时)
+    """
+    parse = PARSERS[kind]
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for _, body in pages:
+            parse(body)
+        count += len(pages)
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count, elapsed
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="解析器基准测试")
+    arg_parser.add_argument("fixtures", nargs="?", default=DEFAULT_FIXTURES, help="fixtures 目录")
+    arg_parser.add_argument("--update", action="store_true", help="用当前解析结果重写 .json")
+    arg_parser.add_argument("--seconds", type=float, default=2.0, help="每类页面的测试时长（秒）")
+    args = arg_parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print("{} 下没有 fixtures，先运行 python -m benchmarks.sample_pages".format(args.fixtures))
+        return 1
+    failed = False
+    for kind, pages in fixtures.items():
+        mismatched = check(kind, pages, args.update)
+        count, elapsed = measure(kind, pages, args.seconds)
+        print("{:>12}  {:2d} pages  {:8.1f} pages/sec  {:6.2f} ms/page  {}".format(
+            kind, len(pages), count / elapsed, elapsed / count * 1000,
+            "updated" if args.update else ("MISMATCH" if mismatched else "ok")))
+        for path in mismatched:
+            print("              结果与保存的不一致: {}".format(path))
+        failed = failed or bool(mismatched)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
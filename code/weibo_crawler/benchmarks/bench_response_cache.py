@@ -0,0 +1,87 @@
+"""
+:响应缓存前后向微博发送的请求数对比
+fetch_web_page 被替换为本地桩函数（模拟 200ms 网络耗时），不访问网络。模拟三种场景：
+两个任务同时爬取同一个话题的前 10 页搜索结果；界面先 /tag/search 看第 1 页、随后 add_task 爬取前 10 页；
+20 个并发请求查询 5 个用户的主页与信息页。off 为关闭缓存，on 为开启缓存
+运行: python -m benchmarks.bench_response_cache
+"""
+import time
+from types import SimpleNamespace
+
+from tornado import gen, ioloop
+
+import settings
+import web_curl
+from response_cache import response_cache
+from web_curl import SpiderAim
+
+DELAY = 0.2
+PAGES = 10
+
+
+def make_fake_fetch(calls):
+    @gen.coroutine
+    def fake_fetch_web_page(curl_aim, retry_time=settings.RETRY_TIME, with_cookie=True, **kwargs):
+        calls.append(curl_aim.name)
+        yield gen.sleep(DELAY)
+        body = "{} {}".format(curl_aim.name, sorted(kwargs.items())).encode("utf-8")
+        return {"error_code": 0, "response": SimpleNamespace(body=body, code=200, effective_url=None)}
+
+    return fake_fetch_web_page
+
+
+@gen.coroutine
+def crawl_tag(keyword):
+    for page in range(1, PAGES + 1):
+        yield web_curl.weibo_web_curl(SpiderAim.search_weibo, keyword=keyword, page_num=page, is_hot=False)
+
+
+@gen.coroutine
+def two_tasks_same_tag():
+    yield [crawl_tag("话题"), crawl_tag("话题")]
+
+
+@gen.coroutine
+def preview_then_task():
+    yield web_curl.weibo_web_curl(SpiderAim.search_weibo, keyword="话题", page_num=1, is_hot=False)
+    yield crawl_tag("话题")
+
+
+@gen.coroutine
+def users_burst():
+    @gen.coroutine
+    def user_show(user_id):
+        yield web_curl.weibo_web_curl(SpiderAim.users_show, user_id=user_id)
+        yield web_curl.weibo_web_curl(SpiderAim.users_info, user_id=user_id)
+
+    yield [user_show(str(1000 + i % 5)) for i in range(20)]
+
+
+SCENARIOS = (
+    ("two_tasks", two_tasks_same_tag),
+    ("preview", preview_then_task),
+    ("users", users_burst),
+)
+
+
+def main():
+    saved = web_curl.fetch_web_page, settings.RESPONSE_CACHE_ENABLED, settings.RESPONSE_CACHE_REDIS
+    settings.RESPONSE_CACHE_REDIS = False
+    try:
+        for name, scenario in SCENARIOS:
+            for enabled in (False, True):
+                calls = []
+                web_curl.fetch_web_page = make_fake_fetch(calls)
+                settings.RESPONSE_CACHE_ENABLED = enabled
+                ioloop.IOLoop.current().run_sync(response_cache.purge)
+                start = time.perf_counter()
+                ioloop.IOLoop.current().run_sync(scenario)
+                print("{:>10} {:>3}  upstream fetches {:3d}  total {:6.2f}s".format(
+                    name, "on" if enabled else "off", len(calls), time.perf_counter() - start))
+        print("cache stats: {}".format(response_cache.stats()))
+    finally:
+        web_curl.fetch_web_page, settings.RESPONSE_CACHE_ENABLED, settings.RESPONSE_CACHE_REDIS = saved
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+:基准测试用的模拟页面
+按各解析器使用的 XPath 构造 s.weibo.com 搜索页/找人页与 weibo.cn 评论页/用户主页/资料页，结构与线上页面一致（卡片/评论节点外包裹导航、脚本等无关节点），
+内容由随机数种子决定，便于比较解析结果。
+直接运行时把各类页面写入 fixtures 目录，供 bench_parsers 使用
+运行: python -m benchmarks.sample_pages [fixtures目录]
+"""
+import os
+import random
+
+from tornado import gen
+
+FILLER = "".join(
+    '<div class="m-nav"><ul>{}</ul></div><script>var $CONFIG_{} = {{"uid": "{}", "page": "search"}};</script>'.format(
+        "".join('<li><a href="/nav/{0}">导航{0}</a></li>'.format(j) for j in range(20)), i, i)
+    for i in range(30)
+)
+
+
+def _search_card(rand, i, retweet=False):
+    user_id = 1000000000 + rand.randrange(10 ** 9)
+    mid = 4900000000000000 + rand.randrange(10 ** 12)
+    topics = "".join('<a href="//s.weibo.com/weibo?q=%23话题{0}%23">#话题{0}#</a>'.format(rand.randrange(50))
+                     for _ in range(rand.randint(0, 2)))
+    at_users = "".join('<a href="//weibo.com/n/用户{0}">@用户{0}</a>'.format(rand.randrange(500))
+                       for _ in range(rand.randint(0, 2)))
+    text = "这是第{}条测试微博的正文内容，".format(i) * rand.randint(2, 8)
+    pics = ""
+    if rand.random() < 0.5:
+        pics = '<div class="media media-piclist"><ul>{}</ul></div>'.format(
+            "".join('<li><img src="//wx{}.sinaimg.cn/orj360/abc{}.jpg"/></li>'.format(k % 4, k)
+                    for k in range(rand.randint(1, 9))))
+    forward = ""
+    if retweet:
+        forward = (
+            '<div class="card-comment"><div node-type="feed_list_forwardContent">'
+            '<a href="//weibo.com/{uid}" nick-name="原博主{n}">@原博主{n}</a>'
+            '<p class="txt">被转发的原微博正文{n}</p></div>'
+            '<p class="from"><a href="//weibo.com/{uid}/N{n}abcd?refer=1">2025年03月30日 08:15</a>'
+            '<a>微博 weibo.com</a></p>'
+            '<ul class="act s-fr"><li><a>转发 {r}</a></li><li><a>评论 {c}</a></li>'
+            '<li><a action-type="feed_list_like" action-data="mid=4{n}"><em>{l}</em></a></li></ul></div>'
+        ).format(uid=user_id + 1, n=i, r=rand.randrange(999), c=rand.randrange(999), l=rand.randrange(999))
+    return (
+        '<div class="card-wrap" action-type="feed_list_item" mid="{mid}"><div class="card"><div class="card-feed">'
+        '<div class="avator"><a href="//weibo.com/{uid}"><img src="https://tvax1.sinaimg.cn/crop/{uid}.jpg"/></a></div>'
+        '<div class="content"><div class="info"><div></div><div><a href="//weibo.com/{uid}?refer_flag=1" '
+        'nick-name="用户{uid}">用户{uid}</a></div></div>'
+        '<p class="txt" node-type="feed_list_content">{text}{topics}{at_users}</p>{pics}{forward}'
+        '<p class="from"><a href="//weibo.com/{uid}/M{mid}?refer_flag=1">2025年03月31日 09:49</a>'
+        '<a rel="nofollow">iPhone客户端</a></p></div></div>'
+        '<div class="card-act"><ul><li><a action-type="feed_list_forward">转发 {r}</a></li>'
+        '<li><a action-type="feed_list_comment">评论 {c}</a></li>'
+        '<li><a action-type="feed_list_like"><em>{l}</em></a></li></ul></div></div></div>'
+    ).format(mid=mid, uid=user_id, text=text, topics=topics, at_users=at_users, pics=pics, forward=forward,
+             r=rand.randrange(9999), c=rand.randrange(9999), l=rand.randrange(9999))
+
+
+def search_page(cards=20, seed=0):
+    """
+    :param cards: 微博卡片数
+    :return: 搜索页 html（bytes）
+    """
+    rand = random.Random(seed)
+    body = "".join(_search_card(rand, i, retweet=rand.random() < 0.3) for i in range(cards))
+    return (
+        '<html><head><meta charset="utf-8"><title>微博搜索</title></head><body>{}'
+        '<div id="pl_feedlist_index">{}</div>{}</body></html>'
+    ).format(FILLER, body, FILLER).encode("utf-8")
+
+
+def comment_page(comments=100, seed=0):
+    """
+    :param comments: 评论数
+    :return: weibo.cn 评论页 html（bytes）
+    """
+    rand = random.Random(seed)
+    items = []
+    for i in range(comments):
+        user_id = 1000000000 + rand.randrange(10 ** 9)
+        items.append(
+            '<div class="c" id="C_{cid}"><a href="/u/{uid}">评论用户{uid}</a>{kt}:'
+            '<span class="ctt">第{i}条评论{text}</span>&nbsp;<span class="cc"><a href="/attitude/{cid}">赞[{like}]</a></span>'
+            '<span class="cc"><a href="/comment/reply/{cid}">回复</a></span>'
+            '<span class="ct">2024-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:00&nbsp;来自iPhone客户端</span></div>'.format(
+                cid=4900000000000000 + i, uid=user_id, i=i, text="，评论内容" * rand.randint(1, 6),
+                kt='<span class="kt">[热门]</span>' if rand.random() < 0.1 else "", like=rand.randrange(999),
+                month=rand.randint(1, 12), day=rand.randint(1, 28), hour=rand.randrange(24), minute=rand.randrange(60)))
+    return (
+        '<html><head><meta charset="utf-8"><title>评论列表</title></head><body>'
+        '<div class="n"><a href="/">首页</a></div>'
+        '<div class="c" id="M_"><div><a href="/u/1669879400">博主</a>:<span class="ctt">原微博正文</span>'
+        '&nbsp;<span class="ct">03月31日 09:49&nbsp;来自微博 weibo.com</span></div></div>'
+        '<div class="c"><span class="pms">评论[{n}]</span></div>{items}'
+        '<div class="pa" id="pagelist"><form><div><input name="mp" type="hidden" value="50"/></div></form></div>'
+        '</body></html>'
+    ).format(n=comments, items="".join(items)).encode("utf-8")
+
+
+def _user_header(rand, user_id):
+    """weibo.cn 用户主页顶部的用户信息"""
+    return (
+        '<div class="u"><table><tr><td><a href="/{uid}/avatar"><img src="https://tvax1.sinaimg.cn/crop/{uid}.jpg"/></a></td>'
+        '<td><div class="ut"><span class="ctt">测试用户{uid}&nbsp;</span><a href="/{uid}/info">资料</a>&nbsp;'
+        '<a href="/{uid}/operation">操作</a></div></td></tr></table>'
+        '<div class="tip2"><span class="tc">微博[{w}]</span>&nbsp;<a href="/{uid}/follow">关注[{f}]</a>&nbsp;'
+        '<a href="/{uid}/fans">粉丝[{fans}]</a>&nbsp;<a href="/at/weibo?uid={uid}">@他的</a></div></div>'
+    ).format(uid=user_id, w=rand.randrange(99999), f=rand.randrange(2000), fans=rand.randrange(10 ** 6))
+
+
+def _topics_and_at(rand):
+    return "".join(
+        '<a href="/search/mblog?keyword=%23话题{0}%23">#话题{0}#</a>'.format(rand.randrange(50))
+        for _ in range(rand.randint(0, 2))
+    ) + "".join('<a href="/n/用户{0}">@用户{0}</a>'.format(rand.randrange(500)) for _ in range(rand.randint(0, 2)))
+
+
+def _footer(rand, weibo_id):
+    return (
+        '&nbsp;<a href="/attitude/{id}/add">赞[{l}]</a>&nbsp;<a href="/repost/{id}">转发[{r}]</a>&nbsp;'
+        '<a href="https://weibo.cn/comment/{id}#cmtfrm" class="cc">评论[{c}]</a>&nbsp;'
+        '<a href="/fav/addFav/{id}">收藏</a>&nbsp;'
+        '<span class="ct">2024-{m:02d}-{d:02d} {h:02d}:{mi:02d}:00&nbsp;来自iPhone客户端</span>'
+    ).format(id=weibo_id, l=rand.randrange(999), r=rand.randrange(999), c=rand.randrange(999),
+             m=rand.randint(1, 12), d=rand.randint(1, 28), h=rand.randrange(24), mi=rand.randrange(60))
+
+
+def _user_weibo(rand, i):
+    """weibo.cn 用户主页中的一条微博，原创（带或不带单张图片）或转发"""
+    weibo_id = "N{:08d}".format(rand.randrange(10 ** 8))
+    text = "第{}条测试微博，".format(i) * rand.randint(1, 6)
+    if rand.random() < 0.3:
+        original_id = "O{:08d}".format(rand.randrange(10 ** 8))
+        original_user = 2000000000 + rand.randrange(10 ** 8)
+        return (
+            '<div class="c" id="M_{id}"><div><span class="cmt">转发了&nbsp;<a href="https://weibo.cn/u/{ouid}">原博主{ouid}</a>'
+            '&nbsp;的微博:</span><span class="ctt">被转发的原微博，{text}{tags}</span>&nbsp;</div>'
+            '<div><span class="cmt">赞[{ol}]</span>&nbsp;<span class="cmt">原文转发[{or_}]</span>&nbsp;'
+            '<a href="https://weibo.cn/comment/{oid}#cmtfrm" class="cc">原文评论[{oc}]</a>'
+            '<!----></div>'
+            '<div><span class="cmt">转发理由:</span>转发理由{i}{reason_tags}{footer}</div></div>'
+            '<div class="s"></div>'
+        ).format(id=weibo_id, ouid=original_user, text=text, tags=_topics_and_at(rand), ol=rand.randrange(999),
+                 or_=rand.randrange(999), oid=original_id, oc=rand.randrange(999), i=i,
+                 reason_tags=_topics_and_at(rand), footer=_footer(rand, weibo_id))
+    if rand.random() < 0.4:
+        return (
+            '<div class="c" id="M_{id}"><div><span class="ctt">{text}{tags}</span></div>'
+            '<div><a href="/mblog/pic/{id}?rl=0"><img src="http://wx{k}.sinaimg.cn/wap180/pic{id}.jpg" alt="图片" class="ib"/></a>'
+            '&nbsp;<a href="/mblog/oripic?id={id}">原图</a>{footer}</div></div>'
+            '<div class="s"></div>'
+        ).format(id=weibo_id, text=text, tags=_topics_and_at(rand), k=rand.randrange(4), footer=_footer(rand, weibo_id))
+    return (
+        '<div class="c" id="M_{id}"><div><span class="ctt">{text}{tags}</span>{footer}</div></div>'
+        '<div class="s"></div>'
+    ).format(id=weibo_id, text=text, tags=_topics_and_at(rand), footer=_footer(rand, weibo_id))
+
+
+def user_page(weibos=10, seed=0):
+    """
+    :param weibos: 微博条数
+    :return: weibo.cn 用户主页（微博列表）html（bytes），也可作为 IndexParser 的主页
+    """
+    rand = random.Random(seed)
+    user_id = 1000000000 + rand.randrange(10 ** 9)
+    return (
+        '<html><head><meta charset="utf-8"><title>测试用户{uid}的微博</title></head><body>'
+        '<div class="n"><a href="/">首页</a></div>{header}'
+        '<div class="tip2"><a href="/{uid}/profile?filter=0">全部</a></div>{items}'
+        '<div class="pa" id="pagelist"><form><div><input name="mp" type="hidden" value="{mp}"/></div></form></div>'
+        '<div class="c">设置:皮肤.图片.条数.隐私</div><div class="c">彩版|触屏|语音</div>'
+        '</body></html>'
+    ).format(uid=user_id, header=_user_header(rand, user_id), items="".join(_user_weibo(rand, i) for i in range(weibos)),
+             mp=rand.randint(2, 200)).encode("utf-8")
+
+
+def info_page(seed=0):
+    """
+    :return: weibo.cn 用户资料页 html（bytes）
+    """
+    rand = random.Random(seed)
+    user_id = 1000000000 + rand.randrange(10 ** 9)
+    return (
+        '<html><head><meta charset="utf-8"><title>测试用户{uid}的资料</title></head><body>'
+        '<div class="n"><a href="/">首页</a></div>'
+        '<div class="c"><img src="https://tvax1.sinaimg.cn/crop/{uid}.jpg" alt="头像"/></div>'
+        '<div class="c">会员等级：{level}级&nbsp;<a href="/member/pay">立即开通</a></div>'
+        '<div class="tip">基本信息</div>'
+        '<div class="c">昵称:测试用户{uid}<br/>认证:测试认证{uid}<br/>性别:{gender}<br/>地区:北京 海淀区<br/>'
+        '生日:1990-{m:02d}-{d:02d}<br/>简介:这是一段简介<br/>标签:<a href="/search/?keyword=测试">测试</a></div>'
+        '<div class="tip">学习经历</div><div class="c">·测试大学&nbsp;2008年<br/></div>'
+        '<div class="tip">工作经历</div><div class="c">·测试公司&nbsp;2012年<br/></div>'
+        '<div class="tip">其他信息</div><div class="c">互联网:https://weibo.com/u/{uid}<br/></div>'
+        '</body></html>'
+    ).format(uid=user_id, level=rand.randint(1, 7), gender=rand.choice(["男", "女"]), m=rand.randint(1, 12),
+             d=rand.randint(1, 28)).encode("utf-8")
+
+
+def search_users_page(users=20, seed=0):
+    """
+    :param users: 用户数
+    :return: s.weibo.com 找人页 html（bytes）
+    """
+    rand = random.Random(seed)
+    cards = []
+    for i in range(users):
+        user_id = 1000000000 + rand.randrange(10 ** 9)
+        title = '<a href="//verified.weibo.com/verify" title="微博个人认证"><i class="icon-vip"></i></a>' \
+            if rand.random() < 0.5 else ""
+        extra = "".join(rand.sample([
+            '<p>教育信息：测试大学</p>', '<p>职业信息：测试公司</p>', '<p>简介：这是第{}个用户</p>'.format(i),
+            '<p>标签：<a href="/tag/1">测试</a><a href="/tag/2">标签</a></p>', '<p>微博个人认证 测试认证</p>',
+        ], rand.randint(0, 3)))
+        cards.append(
+            '<div class="card card-user-b s-brt1 card-user-b-padding"><div class="avator">'
+            '<a href="//weibo.com/u/{uid}"><img src="https://tvax1.sinaimg.cn/crop/{uid}.jpg"/></a></div>'
+            '<div class="info"><div><a href="//weibo.com/u/{uid}" class="name">测试<em class="s-color-red">用户</em>{i}</a>'
+            '{title}<a href="javascript:void(0);" uid="{uid}" action-type="follow">关注</a></div>'
+            '<p><i class="icon-sex icon-sex-{sex}"></i>北京 海淀区<a href="//weibo.com/u/{uid}">weibo.com/u/{uid}</a></p>'
+            '{extra}<p><span>关注<a href="//weibo.com/{uid}/follow">{f}</a></span>'
+            '<span>粉丝<a href="//weibo.com/{uid}/fans">{fans}万</a></span>'
+            '<span>微博<a href="//weibo.com/{uid}/profile">{w}</a></span></p></div></div>'.format(
+                uid=user_id, i=i, title=title, sex=rand.choice(["male", "female"]), extra=extra,
+                f=rand.randrange(2000), fans=rand.randrange(500), w=rand.randrange(99999)))
+    return (
+        '<html><head><meta charset="utf-8"><title>找人</title></head><body>{}'
+        '<div id="pl_user_feedList">{}</div>{}</body></html>'
+    ).format(FILLER, "".join(cards), FILLER).encode("utf-8")
+
+
+# 各类页面的生成函数，键为 benchmarks/fixtures 下的目录名
+PAGE_BUILDERS = {
+    "search": lambda seed: search_page(20, seed),
+    "search_users": lambda seed: search_users_page(20, seed),
+    "user_page": lambda seed: user_page(10, seed),
+    "index": lambda seed: user_page(10, seed + 100),  # 用户主页第一页即 IndexParser 解析的主页
+    "comment": lambda seed: comment_page(100, seed),
+    "info": info_page,
+}
+
+
+def write_fixtures(fixtures_dir, count=2):
+    """
+    生成模拟页面作为 fixtures，每类 count 个，文件名为 sample_<seed>.html
+    :param fixtures_dir: fixtures 目录
+    """
+    for kind, build in PAGE_BUILDERS.items():
+        kind_dir = os.path.join(fixtures_dir, kind)
+        os.makedirs(kind_dir, exist_ok=True)
+        for seed in range(count):
+            with open(os.path.join(kind_dir, "sample_{}.html".format(seed)), "wb") as f:
+                f.write(build(seed))
+
+
+def fake_curl(pages: dict, delay: float = 0.0):
+    """
+    :param pages: {SpiderAim 名: 页面 bytes}
+    :param delay: 模拟网络耗时（秒）
+    :return: 替代 weibo_web_curl 的协程，不访问网络
+    """
+    from types import SimpleNamespace
+
+    @gen.coroutine
+    def fake_weibo_web_curl(curl_aim, **kwargs):
+        if delay:
+            yield gen.sleep(delay)
+        return {"error_code": 0, "response": SimpleNamespace(body=pages[curl_aim.name])}
+
+    return fake_weibo_web_curl
+
+
+if __name__ == "__main__":
+    import sys
+
+    write_fixtures(sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "fixtures"))
@@ -0,0 +1,158 @@
+"""
+爬虫共用的 HTTP 客户端
+AsyncHTTPClient 在启动时配置一次（curl 实现、max_clients、默认超时、连接复用策略），之后所有请求共用同一个客户端；
+curl 句柄会缓存已建立的连接，配合 TCP keep-alive，同一主机的后续请求可以跳过 TCP/TLS 握手。
+另外按主机限制同时进行的请求数，并在请求开始与结束时调用注册的统计回调
+"""
+import time
+from urllib.parse import urlsplit
+
+from tornado import gen, locks
+from tornado.httpclient import AsyncHTTPClient
+
+import settings
+
+try:
+    import pycurl
+except ImportError:
+    pycurl = None
+
+
+def _prepare_curl(curl):
+    """
+    设置 curl 句柄的连接复用策略
+    """
+    curl.setopt(pycurl.FORBID_REUSE, 0)
+    curl.setopt(pycurl.MAXCONNECTS, settings.HTTP_MAX_CONNECTS)
+    if settings.HTTP_KEEPALIVE and hasattr(pycurl, "TCP_KEEPALIVE"):
+        curl.setopt(pycurl.TCP_KEEPALIVE, 1)
+        curl.setopt(pycurl.TCP_KEEPIDLE, settings.HTTP_KEEPALIVE_IDLE)
+        curl.setopt(pycurl.TCP_KEEPINTVL, settings.HTTP_KEEPALIVE_IDLE)
+
+
+class HttpClientManager:
+    """
+    进程内唯一的 HTTP 客户端管理器
+    """
+
+    def __init__(self):
+        self.configured = False
+        self.curl = False
+        self.in_flight = 0
+        self.host_in_flight = dict()  # {主机: 进行中的请求数}
+        self.total = 0
+        self.failed = 0
+        self._host_semaphores = dict()  # {主机: Semaphore}
+        self._hooks = list()
+
+    def setup(self, max_clients=None, connect_timeout=None, request_timeout=None):
+        """
+        配置 AsyncHTTPClient，只需在启动时调用一次；缺少 pycurl 时使用 tornado 自带的客户端（此时不支持代理）
+        :param max_clients: 同时进行的请求数上限
+        :param connect_timeout: 默认的连接超时时长
+        :param request_timeout: 默认的请求超时时长
+        """
+        defaults = {
+            "connect_timeout": connect_timeout or settings.HTTP_CONNECT_TIMEOUT,
+            "request_timeout": request_timeout or settings.REQUEST_TIME_OUT,
+        }
+        max_clients = max_clients or settings.HTTP_MAX_CLIENTS
+        impl = None
+        if pycurl is not None:
+            try:
+                import tornado.curl_httpclient  # noqa: F401
+
+                impl = "tornado.curl_httpclient.CurlAsyncHTTPClient"
+                defaults["prepare_curl_callback"] = _prepare_curl
+            except ImportError:
+                impl = None
+        AsyncHTTPClient.configure(impl, max_clients=max_clients, defaults=defaults)
+        self.curl = impl is not None
+        settings.PROXY_SUPPORTED = self.curl
+        self.configured = True
+        settings.LOGGING.info(
+            "HTTP 客户端: %s, max_clients=%s, defaults=%s",
+            impl or "SimpleAsyncHTTPClient", max_clients,
+            {k: v for k, v in defaults.items() if k != "prepare_curl_callback"},
+        )
+
+    @property
+    def client(self):
+        if not self.configured:
+            self.setup()
+        return AsyncHTTPClient()
+
+    def add_hook(self, hook):
+        """
+        注册统计回调，每个请求开始与结束时以一个 dict 调用：
+        {"event": "start"/"finish", "host", "url", "in_flight", "host_in_flight", 结束时另有 "duration", "code", "error"}
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self._hooks.remove(hook)
+
+    def _emit(self, event: dict):
+        for hook in self._hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                settings.LOGGING.warning("HTTP 统计回调出错: %s", e)
+
+    def _host_semaphore(self, host):
+        if settings.HTTP_MAX_HOST_CONNECTIONS <= 0:
+            return None
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = locks.Semaphore(settings.HTTP_MAX_HOST_CONNECTIONS)
+        return semaphore
+
+    @gen.coroutine
+    def fetch(self, request, **kwargs):
+        """
+        发送请求，同一主机进行中的请求数达到上限时排队等待；异常与 AsyncHTTPClient.fetch 相同
+        :param request: HTTPRequest
+        :return: HTTPResponse
+        """
+        client = self.client
+        host = urlsplit(request.url).hostname or ""
+        semaphore = self._host_semaphore(host)
+        if semaphore is not None:
+            yield semaphore.acquire()
+        self.in_flight += 1
+        self.host_in_flight[host] = self.host_in_flight.get(host, 0) + 1
+        self.total += 1
+        start = time.monotonic()
+        event = {"host": host, "url": request.url}
+        self._emit(dict(event, event="start", in_flight=self.in_flight, host_in_flight=self.host_in_flight[host]))
+        code, error = None, None
+        try:
+            response = yield client.fetch(request, **kwargs)
+            code = response.code
+            return response
+        except Exception as e:
+            self.failed += 1
+            code, error = getattr(e, "code", None), str(e)
+            raise
+        finally:
+            self.in_flight -= 1
+            self.host_in_flight[host] -= 1
+            if semaphore is not None:
+                semaphore.release()
+            self._emit(dict(event, event="finish", in_flight=self.in_flight, host_in_flight=self.host_in_flight[host],
+                            duration=time.monotonic() - start, code=code, error=error))
+
+    def stats(self):
+        """
+        :return: 进行中的请求数及累计请求数
+        """
+        return {
+            "curl": self.curl,
+            "in_flight": self.in_flight,
+            "host_in_flight": {host: n for host, n in self.host_in_flight.items() if n},
+            "total": self.total,
+            "failed": self.failed,
+        }
+
+
+http_client_manager = HttpClientManager()
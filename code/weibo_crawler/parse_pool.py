@@ -0,0 +1,99 @@
+"""
+HTML 解析的工作池
+lxml 建树与大量 XPath 查询是纯 CPU 操作，放在 IOLoop 线程上会使所有并发请求排队。
+这里的解析任务都是模块级函数：输入响应体 bytes，输出可序列化的 dict/list，既可以交给线程池也可以交给进程池，
+通过 IOLoop.run_in_executor 执行；各接口可以单独开关，关闭时在 IOLoop 线程上直接解析，结果与原来完全相同
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from tornado import gen
+from tornado.ioloop import IOLoop
+
+import settings
+from selector_parser import (
+    IndexParser, InfoParser, CommentParser, HotCommentParser, SearchWeiboParser, SearchUsersParser
+)
+from weibo_curl_error import HTMLParseException
+
+
+class _Page:
+    """只带 body 的响应，解析器只用到 response.body"""
+
+    def __init__(self, body):
+        self.body = body
+
+
+def parse_search_weibo(body):
+    """搜索微博页 -> 微博列表，页面为空时返回 None"""
+    return SearchWeiboParser(_Page(body)).parse_page()
+
+
+def parse_search_users(body):
+    """搜索用户页 -> 用户列表"""
+    return SearchUsersParser(_Page(body)).parse_page()
+
+
+def parse_user_index(user_id, body):
+    """
+    用户主页 -> (真正的user_id, 微博页数, 主页中的微博数/关注数/粉丝数)
+    主页统计解析失败时第三项为 None，由 parse_user_show 在信息页解析之后再报错，与原来的报错顺序一致
+    """
+    idx_parser = IndexParser(user_id, _Page(body))
+    user_id = idx_parser.get_user_id()
+    max_page_num = idx_parser.get_page_num()
+    try:
+        counts = idx_parser.get_user(dict())
+    except HTMLParseException:
+        counts = None
+    return user_id, max_page_num, counts
+
+
+def parse_user_show(info_body, counts):
+    """
+    用户信息页 + parse_user_index 得到的主页统计 -> 用户信息
+    """
+    user = InfoParser(_Page(info_body)).extract_user_info()
+    if counts is None:
+        raise HTMLParseException
+    user.update(counts)
+    return user
+
+
+def parse_comments(weibo_id, body, hot=False):
+    """评论页或热评页 -> 评论列表"""
+    parser_class = HotCommentParser if hot else CommentParser
+    return parser_class(weibo_id, _Page(body)).get_all_comment()
+
+
+_executor = None
+
+
+def get_executor():
+    """
+    按 settings.PARSE_EXECUTOR 懒加载解析池，为 "none" 时返回 None
+    """
+    global _executor
+    if _executor is None and settings.PARSE_EXECUTOR != "none":
+        if settings.PARSE_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.PARSE_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.PARSE_WORKERS, thread_name_prefix="parse")
+    return _executor
+
+
+def offload_enabled(handler_name):
+    return settings.PARSE_EXECUTOR != "none" and settings.PARSE_OFFLOAD.get(handler_name, False)
+
+
+@gen.coroutine
+def run_parse(handler_name, func, *args):
+    """
+    执行解析任务，接口开启了解析池时交给解析池，否则在当前线程直接执行；解析中的异常原样抛出
+    :param handler_name: 接口名，对应 settings.PARSE_OFFLOAD 的键
+    :param func: 模块级的解析函数
+    :return: 解析结果
+    """
+    if not offload_enabled(handler_name):
+        return func(*args)
+    result = yield IOLoop.current().run_in_executor(get_executor(), func, *args)
+    return result
@@ -1,7 +1,7 @@
 import settings
 from tornado.httpclient import HTTPRequest
 import enum
-from account.account import fetch_by_url
+from account.account import fetch_account_by_url
 from urllib.parse import quote
 from utils import ensure_base62_id
 
@@ -11,12 +11,14 @@ class BaseRequestBuilder:
 
     def __init__(self):
         self.url = str()
+        self.account = None  # make_request 时选出的账号，请求结束后向它反馈结果
 
     def get_url(self):
         return self.url
 
     def make_request(self, method='GET', with_cookie=True, **req_kwargs):
-        cookie, proxy = fetch_by_url(self.get_url())
+        self.account = fetch_account_by_url(self.get_url())
+        cookie, proxy = self.account.cookie, self.account.proxy
         proxy_host, proxy_port = (proxy[0], proxy[1]) if proxy else (None, None)
 
         if with_cookie:
@@ -0,0 +1,300 @@
+"""
+爬取响应的缓存
+weibo_web_curl 成功的响应按 (爬取目标, 参数) 缓存一段时间：第一层为进程内的 LRU（按条数与响应体总大小淘汰），
+第二层为可选的 Redis（多个爬虫进程共享，重启后仍然有效）。
+redis-py 是阻塞客户端，Redis 的读写都交给 run_in_executor 在工作线程中执行，不阻塞 IOLoop；写入 Redis 不等待结果。
+同一个键正在向微博请求时，相同的请求等待这次请求的结果，不再重复请求；失败的结果不缓存，
+HTTP 200 但解析失败的页面（被拦截的页面、结构异常的页面）由接口调用 invalidate 删除
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+import settings
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+REDIS_KEY_PREFIX = "weibo:response_cache:"
+# Redis 出错后暂停使用 Redis 的时长（秒），避免每次请求都等待连接超时
+REDIS_RETRY_INTERVAL = 30
+# 执行 Redis 读操作的线程数；写操作（写入、删除）只用一个线程，保证同一个键先写入后删除的顺序
+REDIS_WORKERS = 4
+
+
+class CachedResponse:
+    """缓存的响应，解析器只用到 response.body"""
+
+    def __init__(self, body, code=200, effective_url=None):
+        self.body = body
+        self.code = code
+        self.effective_url = effective_url
+
+    def dumps(self):
+        header = json.dumps({"code": self.code, "url": self.effective_url})
+        return header.encode("utf-8") + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, data):
+        header, body = data.split(b"\n", 1)
+        header = json.loads(header.decode("utf-8"))
+        return cls(body, header["code"], header["url"])
+
+
+def make_key(aim_name, with_cookie, kwargs):
+    """
+    :param aim_name: SpiderAim 的名字
+    :param with_cookie: 请求是否携带 cookie
+    :param kwargs: 转发给 RequestBuilder 的参数
+    :return: 缓存的键，以 "<aim_name>:" 开头
+    """
+    args = "&".join("{}={}".format(name, kwargs[name]) for name in sorted(kwargs))
+    return "{}:{}:{}".format(aim_name, int(bool(with_cookie)), args)
+
+
+def _redis_get(client, key):
+    """
+    在工作线程中执行
+    :return: (响应数据, 剩余毫秒数)
+    """
+    pipe = client.pipeline()
+    pipe.get(REDIS_KEY_PREFIX + key)
+    pipe.pttl(REDIS_KEY_PREFIX + key)
+    data, pttl = pipe.execute()
+    return data, pttl
+
+
+def _redis_purge(client, prefix):
+    """
+    在工作线程中执行，删除键以 prefix 开头的 Redis 缓存
+    """
+    redis_keys = list(client.scan_iter(match=REDIS_KEY_PREFIX + prefix + "*", count=500))
+    if redis_keys:
+        client.delete(*redis_keys)
+
+
+class ResponseCache:
+    """
+    进程内唯一的响应缓存
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # {键: (过期时间, CachedResponse)}，按最近使用排序
+        self.size = 0  # 内存中响应体的总大小
+        self._pending = dict()  # {键: 正在进行的请求的 Future}
+        self._redis = None
+        self._executor = None
+        self._write_executor = None
+        self._redis_disabled_until = 0.0
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bypassed = 0
+
+    def _get_redis(self):
+        """
+        :return: Redis 客户端，未开启 Redis 缓存、未安装 redis 或最近出错时为 None
+        """
+        if not settings.RESPONSE_CACHE_REDIS or redis is None:
+            return None
+        if time.time() < self._redis_disabled_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis(
+                host=os.getenv("REDIS_HOST", "127.0.0.1"),
+                port=int(os.getenv("REDIS_PORT", "6379")),
+                db=settings.RESPONSE_CACHE_REDIS_DB,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5,
+            )
+        return self._redis
+
+    def _run_redis(self, func, *args):
+        """
+        在 Redis 工作线程中执行阻塞的 Redis 读操作
+        :return: Future
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=REDIS_WORKERS, thread_name_prefix="response_cache")
+        return IOLoop.current().run_in_executor(self._executor, func, *args)
+
+    def _run_redis_write(self, func, *args):
+        """
+        在唯一的 Redis 写线程中按提交顺序执行阻塞的 Redis 写操作
+        :return: Future
+        """
+        if self._write_executor is None:
+            self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response_cache_write")
+        return IOLoop.current().run_in_executor(self._write_executor, func, *args)
+
+    def _redis_failed(self, e):
+        settings.LOGGING.warning("response cache redis error, disabled for %ss: %s", REDIS_RETRY_INTERVAL, e)
+        self._redis_disabled_until = time.time() + REDIS_RETRY_INTERVAL
+
+    def _remove(self, key):
+        _, response = self._entries.pop(key)
+        self.size -= len(response.body)
+
+    def _put_memory(self, key, response, expire_at):
+        if len(response.body) > settings.RESPONSE_CACHE_MAX_BYTES:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expire_at, response)
+        self.size += len(response.body)
+        while len(self._entries) > settings.RESPONSE_CACHE_MAX_ENTRIES or self.size > settings.RESPONSE_CACHE_MAX_BYTES:
+            self._remove(next(iter(self._entries)))
+
+    def _get_memory(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] > time.time():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self._remove(key)
+        return None
+
+    @gen.coroutine
+    def get(self, key):
+        """
+        先查内存再查 Redis，Redis 命中时写回内存；内存命中或没有开启 Redis 时不切换线程
+        :return: CachedResponse，没有缓存或已过期时为 None
+        """
+        response = self._get_memory(key)
+        if response is not None:
+            return response
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            data, pttl = yield self._run_redis(_redis_get, client, key)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None
+        if data is None or pttl is None or pttl <= 0:
+            return None
+        response = CachedResponse.loads(data)
+        self._put_memory(key, response, time.time() + pttl / 1000)
+        self.redis_hits += 1
+        return response
+
+    def put(self, key, response, ttl):
+        """
+        缓存一个响应，写入内存后立即返回，Redis 在后台写入
+        :param response: tornado 的 HTTPResponse 或 CachedResponse
+        :param ttl: 缓存时长（秒）
+        """
+        if not isinstance(response, CachedResponse):
+            response = CachedResponse(response.body, response.code, response.effective_url)
+        self._put_memory(key, response, time.time() + ttl)
+        client = self._get_redis()
+        if client is not None:
+            IOLoop.current().spawn_callback(
+                self._run_redis_background, client.setex, REDIS_KEY_PREFIX + key, int(ttl), response.dumps())
+
+    def invalidate(self, key):
+        """
+        删除一个键的缓存，Redis 在后台删除
+        :param key: make_key 生成的键
+        """
+        if key in self._entries:
+            self._remove(key)
+        client = self._get_redis()
+        if client is not None:
+            IOLoop.current().spawn_callback(self._run_redis_background, client.delete, REDIS_KEY_PREFIX + key)
+
+    @gen.coroutine
+    def _run_redis_background(self, func, *args):
+        """
+        不等待结果的 Redis 写操作，出错时只暂停使用 Redis
+        """
+        try:
+            yield self._run_redis_write(func, *args)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    @gen.coroutine
+    def purge(self, prefix=""):
+        """
+        删除键以 prefix 开头的缓存（如 "search_weibo:"），prefix 为空时清空全部缓存
+        :return: 删除的内存缓存条数
+        """
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        client = self._get_redis()
+        if client is not None:
+            try:
+                yield self._run_redis_write(_redis_purge, client, prefix)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        return len(keys)
+
+    @gen.coroutine
+    def fetch(self, key, ttl, fetch, use_cache=True):
+        """
+        有未过期的缓存时直接返回；同一个键正在请求时等待那次请求的结果；否则调用 fetch 请求并缓存成功的响应
+        :param key: make_key 生成的键
+        :param ttl: 缓存时长（秒）
+        :param fetch: 无参数的协程函数，返回 weibo_web_curl 格式的结果
+        :param use_cache: 为 False 时不读缓存（仍然会用新的响应更新缓存）
+        :return: weibo_web_curl 格式的结果
+        """
+        if use_cache:
+            response = yield self.get(key)
+            if response is not None:
+                return {'error_code': 0, 'response': response}
+        else:
+            self.bypassed += 1
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            result = yield pending
+            return result
+
+        self.misses += 1
+        future = Future()
+        self._pending[key] = future
+        try:
+            result = yield fetch()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 没有等待者时不报 "exception was never retrieved"
+            raise
+        finally:
+            self._pending.pop(key, None)
+        if not result.get('error_code'):
+            self.put(key, result['response'], ttl)
+        future.set_result(result)
+        return result
+
+    def stats(self):
+        """
+        :return: 缓存的统计信息，供 response_cache 接口展示
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "pending": len(self._pending),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "redis": self._get_redis() is not None,
+        }
+
+
+response_cache = ResponseCache()
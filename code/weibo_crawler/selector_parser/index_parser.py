@@ -1,9 +1,23 @@
+from lxml import etree
+
 from settings import LOGGING
 from weibo_curl_error import CookieInvalidException, HTMLParseException
 from .base_parser import BaseParser
 import utils
 import re
 
+# 预编译的 XPath，每个表达式只编译一次
+_USER_LINKS = etree.XPath("//div[@class='u']//a")
+_STRING = etree.XPath('string(.)')
+_HREF = etree.XPath('@href')
+_TIP2_TEXT = etree.XPath("//div[@class='tip2']/*/text()")
+_MAX_PAGE_INPUT = etree.XPath("//input[@name='mp']")
+_TITLE = etree.XPath('//title/text()')
+_HEAD_IMG = etree.XPath('//div[@class="c"]/img[@alt="头像"]')
+_BASIC_INFO = etree.XPath("//div[@class='c'][3]/text()")
+_TIP_TEXT = etree.XPath("//div[@class='tip'][$n]/text()")
+_C_TEXT = etree.XPath("//div[@class='c'][$n]/text()")
+
 class IndexParser(BaseParser):
     def __init__(self, user_id, response):
         super().__init__(response)
@@ -12,12 +26,12 @@ class IndexParser(BaseParser):
     def get_user_id(self):
         """获取用户id，使用者输入的user_id不一定是正确的，可能是个性域名等，需要获取真正的user_id"""
         user_id = self.user_id
-        url_list = self.selector.xpath("//div[@class='u']//a")
+        url_list = _USER_LINKS(self.selector)
         for url in url_list:
-            if (url.xpath('string(.)')) == u'资料':
-                if url.xpath('@href') and url.xpath('@href')[0].endswith(
-                        '/info'):
-                    link = url.xpath('@href')[0]
+            if _STRING(url) == u'资料':
+                href = _HREF(url)
+                if href and href[0].endswith('/info'):
+                    link = href[0]
                     user_id = link[1:-5]
                     break
         self.user_id = user_id
@@ -27,7 +41,7 @@ class IndexParser(BaseParser):
         """获取用户信息、微博数、关注数、粉丝数"""
         self.user = user_info
         try:
-            user_info = self.selector.xpath("//div[@class='tip2']/*/text()")
+            user_info = _TIP2_TEXT(self.selector)
             self.user['id'] = self.user_id
             row_data = re.findall("\\[(.*?)]", ''.join(user_info), re.I|re.M)
             self.user['weibo_num'] = utils.str2value(row_data[0])
@@ -42,11 +56,11 @@ class IndexParser(BaseParser):
     def get_page_num(self):
         """获取微博总页数"""
         try:
-            if not self.selector.xpath("//input[@name='mp']"):
+            max_page_input = _MAX_PAGE_INPUT(self.selector)
+            if not max_page_input:
                 page_num = 1
             else:
-                page_num = int(self.selector.xpath("//input[@name='mp']")
-                               [0].attrib['value'])
+                page_num = int(max_page_input[0].attrib['value'])
             return page_num
         except Exception as e:
             utils.report_log(e)
@@ -59,7 +73,7 @@ class InfoParser(BaseParser):
     def extract_user_info(self):
         """提取用户信息"""
         user = USER_TEMPLATE.copy()
-        nickname = self.selector.xpath('//title/text()')[0]
+        nickname = _TITLE(self.selector)[0]
         nickname = nickname[:-3]
         # 检查cookie
         if nickname == u'登录 - 新' or nickname == u'新浪':
@@ -69,12 +83,12 @@ class InfoParser(BaseParser):
         user['nickname'] = nickname
         # 获取头像
         try:
-            user['head'] = self.selector.xpath('//div[@class="c"]/img[@alt="头像"]')[0].get('src')
+            user['head'] = _HEAD_IMG(self.selector)[0].get('src')
         except:
             user['head'] = ''
         # 获取基本信息
         try:
-            basic_info = self.selector.xpath("//div[@class='c'][3]/text()")
+            basic_info = _BASIC_INFO(self.selector)
             zh_list = [u'性别', u'地区', u'生日', u'简介', u'认证', u'达人']
             en_list = [
                 'gender', 'location', 'birthday', 'description',
@@ -85,20 +99,15 @@ class InfoParser(BaseParser):
                     user[en_list[zh_list.index(i.split(':', 1)[0])]] = i.split(':', 1)[1].replace('\u3000', '')
 
 
-            if self.selector.xpath(
-                    "//div[@class='tip'][2]/text()")[0] == u'学习经历':
-                user['education'] = self.selector.xpath(
-                    "//div[@class='c'][4]/text()")[0][1:].replace(
+            second_tip = _TIP_TEXT(self.selector, n=2)[0]
+            if second_tip == u'学习经历':
+                user['education'] = _C_TEXT(self.selector, n=4)[0][1:].replace(
                     u'\xa0', u' ')
-                if self.selector.xpath(
-                        "//div[@class='tip'][3]/text()")[0] == u'工作经历':
-                    user['work'] = self.selector.xpath(
-                        "//div[@class='c'][5]/text()")[0][1:].replace(
+                if _TIP_TEXT(self.selector, n=3)[0] == u'工作经历':
+                    user['work'] = _C_TEXT(self.selector, n=5)[0][1:].replace(
                         u'\xa0', u' ')
-            elif self.selector.xpath(
-                    "//div[@class='tip'][2]/text()")[0] == u'工作经历':
-                user['work'] = self.selector.xpath(
-                    "//div[@class='c'][4]/text()")[0][1:].replace(
+            elif second_tip == u'工作经历':
+                user['work'] = _C_TEXT(self.selector, n=4)[0][1:].replace(
                     u'\xa0', u' ')
             return user
         except Exception as e:
@@ -2,7 +2,6 @@ import random
 from datetime import datetime, timedelta
 import re
 import sys
-from time import sleep
 from lxml import etree
 from tornado.curl_httpclient import CurlError
 from tornado import gen
@@ -16,6 +15,58 @@ import settings
 from .base_parser import BaseParser
 from weibo_curl_error import HTMLParseException, CookieInvalidException, PageContentEmptyException, WeiboNotFoundException
 
+# 预编译的 XPath，每个表达式只编译一次
+# 页面级的查询
+_USER_NODE = etree.XPath('//div[@class="u"]')
+_MAX_PAGE_INPUT = etree.XPath("//input[@name='mp']")
+_C_DIVS = etree.XPath("//div[@class='c']")
+_ALL_IMG_SRC = etree.XPath('//img/@src')
+_COMMENT_DIVS = etree.XPath('/html/body/div[@class="c"]')
+_TITLE = etree.XPath('//title/text()')
+_M_NODE = etree.XPath("//div[@id='M_']")
+_M_CMT = etree.XPath('//*[@id="M_"]/div/span[@class="cmt"]')
+_M_USER = etree.XPath('//*[@id="M_"]/div[1]/a')
+# 以一条微博 <div class="c"> 为上下文的查询
+_ID = etree.XPath('@id')
+_HREF = etree.XPath('@href')
+_DIVS = etree.XPath('div')
+_CTT = etree.XPath("div/span[@class='ctt']")
+_CMT = etree.XPath("div/span[@class='cmt']")
+_CMT_A = etree.XPath('div/span[@class="cmt"]/a')
+_CT = etree.XPath("div/span[@class='ct']")
+_CT_TEXT = etree.XPath(".//span[@class='ct']/text()")
+_KT_TEXT = etree.XPath(".//span[@class='kt']/text()")
+_DIV_A = etree.XPath('div/a')
+_DIV_A_HREF = etree.XPath('div/a/@href')
+_DIV_A_TEXT = etree.XPath('div//a/text()')
+_LAST_DIV_A_HREF = etree.XPath('div[last()]/a/@href')
+_CC_HREF = etree.XPath("div/a[@class='cc']/@href")
+_FOOTER_NODES = etree.XPath('.//span[@class="cmt"] | .//a[@class="cc"]')
+_IMG_SRC = etree.XPath('.//img/@src')
+_A_HREF = etree.XPath('.//a/@href')
+_A = etree.XPath('.//a')
+# 以微博内某个节点为上下文的查询
+_CHILDREN = etree.XPath('*')
+_CHILD_A = etree.XPath('a')
+_CHILD_SPAN = etree.XPath('span')
+_CHILD_IMG_SRC = etree.XPath('img/@src')
+_TEXT = etree.XPath('text()')
+_CHILD_A_TEXT = etree.XPath('a/text()')
+_CTT_A = etree.XPath("span[@class='ctt']/a")
+_CTT_A_TEXT = etree.XPath("span[@class='ctt']/a/text()")
+_UT_TEXT = etree.XPath('div[@class="ut"]/text()')
+_TIP2 = etree.XPath('div[@class="tip2"]')
+_ANY_TIP2 = etree.XPath('.//div[@class="tip2"]')
+_FIRST_CTT_TEXT = etree.XPath('.//span[@class="ctt"][1]/text()')
+
+
+def _max_page(selector):
+    """页面中的总页数，没有翻页时为1"""
+    max_page_input = _MAX_PAGE_INPUT(selector)
+    if not max_page_input:
+        return 1
+    return int(max_page_input[0].attrib['value'])
+
 
 class Weibo:
     """一条微博的信息"""
@@ -52,19 +103,19 @@ class PageParser(BaseParser):
     def get_user_info_except_first_page(self):
         """获取除第一页外每页中顶部用户的一些信息，包括用户名、微博数、关注数、粉丝数"""
         user = dict()
-        user_node = self.selector.xpath('.//div[@class="u"]')[0]
-        screen_name = ''.join(user_node.xpath('./div[@class="ut"]/text()'))
+        user_node = _USER_NODE(self.selector)[0]
+        screen_name = ''.join(_UT_TEXT(user_node))
         user['screen_name'] = screen_name.strip()[:-3]
-        tip_node = user_node.xpath('./div[@class="tip2"]')[0]
+        tip_node = _TIP2(user_node)[0]
         self.__extract_tips_from_tip_node(tip_node, user)
         return user
 
     def get_user_info_when_first_page(self):
         """获取除第一页外每页中顶部用户的一些信息，包括用户名、微博数、关注数、粉丝数"""
         user = dict()
-        user_node = self.selector.xpath('//div[@class="u"]')[0]
-        user['screen_name'] = user_node.xpath('.//span[@class="ctt"][1]/text()')[0]
-        tip_node = user_node.xpath('.//div[@class="tip2"]')[0]
+        user_node = _USER_NODE(self.selector)[0]
+        user['screen_name'] = _FIRST_CTT_TEXT(user_node)[0]
+        tip_node = _ANY_TIP2(user_node)[0]
         self.__extract_tips_from_tip_node(tip_node, user)
         return user
 
@@ -77,8 +128,8 @@ class PageParser(BaseParser):
         """
         pattern = re.compile(r'\d+')
 
-        for sub_node in tip_node.xpath("./*"):
-            nodetext = sub_node.xpath('./text()')[0]
+        for sub_node in _CHILDREN(tip_node):
+            nodetext = _TEXT(sub_node)[0]
             k = nodetext[:2]
             v = pattern.search(nodetext).group()
             user[k] = int(v)
@@ -88,16 +139,12 @@ class PageParser(BaseParser):
     def get_one_page(self):
         """获取第page页的全部微博"""
         # 获取微博总页数
-        if not self.selector.xpath("//input[@name='mp']"):
-            max_page = 1
-        else:
-            max_page = int(self.selector.xpath("//input[@name='mp']")
-                           [0].attrib['value'])
+        max_page = _max_page(self.selector)
         weibo_id_list = list()  # 存储微博的id
         weibos = list()         # 存储所有微博的信息
         try:
-            all_weibo_info = self.selector.xpath("//div[@class='c']")
-            is_exist = all_weibo_info[0].xpath("div/span[@class='ctt']")
+            all_weibo_info = _C_DIVS(self.selector)
+            is_exist = _CTT(all_weibo_info[0])
             if is_exist:
                 for i in range(0, len(all_weibo_info) - 2):
                     try:
@@ -117,7 +164,7 @@ class PageParser(BaseParser):
     @staticmethod
     def is_original(info):
         """判断微博是否为原创微博"""
-        is_original = info.xpath("div/span[@class='cmt']")
+        is_original = _CMT(info)
         if len(is_original) > 3:
             return False
         else:
@@ -129,7 +176,7 @@ class PageParser(BaseParser):
         try:
             weibo_content = utils.handle_garbled(info)
             weibo_content = weibo_content[:weibo_content.rfind(u'赞')]
-            a_text = info.xpath('div//a/text()')
+            a_text = _DIV_A_TEXT(info)
             if u'全文' in a_text:
                 # 构造 CommentParser
                 comment_resp = None
@@ -142,7 +189,7 @@ class PageParser(BaseParser):
                         raise CurlError
 
                 commentParser = CommentParser(weibo_id, comment_resp)
-                wb_content = commentParser.get_long_weibo()
+                wb_content = yield commentParser.get_long_weibo()
                 if wb_content:
                     weibo_content = wb_content
             # 获取topics和at_users
@@ -163,8 +210,8 @@ class PageParser(BaseParser):
         at_users = list()
         topic_pattern = re.compile(r'(?<=#).+(?=#)')
         at_user_pattern = re.compile(r'(?<=@).+')
-        for a_node in node.xpath('.//a'):
-            a_node_text = ''.join(a_node.xpath('./text()'))
+        for a_node in _A(node):
+            a_node_text = ''.join(_TEXT(a_node))
             topic = topic_pattern.search(a_node_text)
             if topic:
                 topic = topic.group()
@@ -183,7 +230,7 @@ class PageParser(BaseParser):
                 ':') + 1:weibo_content.rfind(u'赞')]
             weibo_content = weibo_content[:weibo_content.rfind(u'赞')]
             # 检查当前是否已经为全部微博内容
-            a_text = info.xpath('div//a/text()')
+            a_text = _DIV_A_TEXT(info)
             if u'全文' in a_text:
                 # 构造 CommentParser
                 comment_resp = None
@@ -196,7 +243,7 @@ class PageParser(BaseParser):
                         raise CurlError
 
                 commentParser = CommentParser(weibo_id, comment_resp)
-                wb_content = commentParser.get_long_retweet(rev_type=dict)
+                wb_content = yield commentParser.get_long_retweet(rev_type=dict)
                 if wb_content:
                     weibo_content = wb_content
 
@@ -206,28 +253,28 @@ class PageParser(BaseParser):
                 retweet_id = weibo_content.get('retweet_id')
                 weibo_content = weibo_content.get('retweet')
             else:
-                original_div = utils.handle_garbled(info.xpath('div')[-1])
+                original_div = utils.handle_garbled(_DIVS(info)[-1])
                 retweet_reason = original_div[original_div.find(
                     ':') + 1: original_div.rindex(u'赞')]
                 retweet_id = self.get_retweet_id(info)
 
             # 提取原始用户
-            original_user_node = info.xpath('./div/span[@class="cmt"]/a')[0]
-            original_user = ''.join(original_user_node.xpath("./text()"))
+            original_user_node = _CMT_A(info)[0]
+            original_user = ''.join(_TEXT(original_user_node))
             original_user_id = original_user_node.get('href')
             if original_user_id is not None:
                 original_user_id = original_user_id[original_user_id.rfind(
                     r'/') + 1:]
             # 获取原始微博的footers
-            original_footer_div = info.xpath(r'./div')[-2]
+            divs = _DIVS(info)
+            original_footer_div = divs[-2]
 
-            footer_nodes = original_footer_div.xpath(
-                r'.//span[@class="cmt"] | .//a[@class="cc"]')[-3:]
+            footer_nodes = _FOOTER_NODES(original_footer_div)[-3:]
             original_like_num = 0
             original_retweet_num = 0
             original_comment_num = 0
             for i, footer_node in enumerate(footer_nodes):
-                num = ''.join(footer_node.xpath('./text()'))
+                num = ''.join(_TEXT(footer_node))
                 try:
                     num = int(num[num.find('[') + 1: num.rfind(']')])
                 except BaseException:
@@ -240,8 +287,8 @@ class PageParser(BaseParser):
                     original_comment_num = num
 
             # 获取话题
-            original_div = info.xpath('./div')[0]
-            retweet_div = info.xpath('./div')[-1]
+            original_div = divs[0]
+            retweet_div = divs[-1]
             retweet_at_users, retweet_topics = PageParser.__get_atusers_and_topics(
                 retweet_div)
             original_at_users, original_topics = PageParser.__get_atusers_and_topics(
@@ -267,7 +314,7 @@ class PageParser(BaseParser):
     @gen.coroutine
     def get_weibo_content(self, info, is_original, weibo):
         """获取微博内容"""
-        weibo.weibo_id = info.xpath('@id')[0][2:]
+        weibo.weibo_id = _ID(info)[0][2:]
         if is_original:
             weibo.text, weibo.topics, weibo.at_users = yield self.get_original_weibo(info, weibo.weibo_id)
         else:
@@ -279,7 +326,7 @@ class PageParser(BaseParser):
         article_url = ''
         text = utils.handle_garbled(info)
         if text.startswith(u'发布了头条文章'):
-            url = info.xpath('.//a/@href')
+            url = _A_HREF(info)
             if url and url[0].startswith('https://weibo.cn/sinaurl'):
                 article_url = url[0]
         return article_url
@@ -288,17 +335,16 @@ class PageParser(BaseParser):
     def get_publish_place(info):
         """获取微博发布位置"""
         try:
-            div_first = info.xpath('div')[0]
-            a_list = div_first.xpath('a')
+            div_first = _DIVS(info)[0]
+            a_list = _CHILD_A(div_first)
             publish_place = ''
             for a in a_list:
-                if ('place.weibo.com' in a.xpath('@href')[0]
-                        and a.xpath('text()')[0] == u'显示地图'):
-                    weibo_a = div_first.xpath("span[@class='ctt']/a")
+                if ('place.weibo.com' in _HREF(a)[0]
+                        and _TEXT(a)[0] == u'显示地图'):
+                    weibo_a = _CTT_A(div_first)
                     if len(weibo_a) >= 1:
                         publish_place = weibo_a[-1]
-                        if (u'视频' == div_first.xpath(
-                                "span[@class='ctt']/a/text()")[-1][-2:]):
+                        if (u'视频' == _CTT_A_TEXT(div_first)[-1][-2:]):
                             if len(weibo_a) >= 2:
                                 publish_place = weibo_a[-2]
                             else:
@@ -314,7 +360,7 @@ class PageParser(BaseParser):
     def get_publish_time(info):
         """获取微博发布时间"""
         try:
-            str_time = info.xpath("div/span[@class='ct']")
+            str_time = _CT(info)
             str_time = utils.handle_garbled(str_time[0])
             publish_time = str_time.split(u'来自')[0]
             if u'刚刚' in publish_time:
@@ -347,7 +393,7 @@ class PageParser(BaseParser):
     def get_publish_tool(info):
         """获取微博发布工具"""
         try:
-            str_time = info.xpath("div/span[@class='ct']")
+            str_time = _CT(info)
             str_time = utils.handle_garbled(str_time[0])
             if len(str_time.split(u'来自')) > 1:
                 publish_tool = str_time.split(u'来自')[1]
@@ -364,7 +410,7 @@ class PageParser(BaseParser):
         try:
             footer = {}
             pattern = r'\d+'
-            str_footer = info.xpath('div')[-1]
+            str_footer = _DIVS(info)[-1]
             str_footer = utils.handle_garbled(str_footer)
             str_footer = str_footer[str_footer.rfind(u'赞'):]
             weibo_footer = re.findall(pattern, str_footer, re.M)
@@ -387,7 +433,7 @@ class PageParser(BaseParser):
         """
         获得转发微博的微博id
         """
-        retweet_url = info.xpath("div/a[@class='cc']/@href")[0]
+        retweet_url = _CC_HREF(info)[0]
         # 获取 retweet_id
         retweet_id = retweet_url.split('/')[-1]
         sep_pos = retweet_id.rfind('?')
@@ -405,7 +451,7 @@ class PageParser(BaseParser):
         """获取微博原始图片url"""
         try:
             if weibo_id is None:
-                weibo_id = info.xpath('@id')[0][2:]
+                weibo_id = _ID(info)[0][2:]
             picture_urls = {}
             if is_original:
                 original_pictures = yield PageParser.extract_picture_urls(info, weibo_id)
@@ -417,7 +463,7 @@ class PageParser(BaseParser):
 
                 retweet_pictures = yield PageParser.extract_picture_urls(info, retweet_id)
                 picture_urls['retweet_pictures'] = retweet_pictures
-                a_list = info.xpath('div[last()]/a/@href')
+                a_list = _LAST_DIV_A_HREF(info)
                 original_picture = ''
                 for a in a_list:
                     if a.endswith(('.gif', '.jpeg', '.jpg', '.png')):
@@ -435,13 +481,13 @@ class PageParser(BaseParser):
         try:
             video_url = ''
             if is_original:
-                div_first = info.xpath('div')[0]
-                a_list = div_first.xpath('.//a')
+                div_first = _DIVS(info)[0]
+                a_list = _A(div_first)
                 video_link = u'无'
                 for a in a_list:
-                    if 'm.weibo.cn/s/video/show?object_id=' in a.xpath(
-                            '@href')[0]:
-                        video_link = a.xpath('@href')[0]
+                    href = _HREF(a)[0]
+                    if 'm.weibo.cn/s/video/show?object_id=' in href:
+                        video_link = href
                         break
                 if video_link != u'无':
                     video_link = video_link.replace(
@@ -461,7 +507,7 @@ class PageParser(BaseParser):
     @staticmethod
     def is_pinned_weibo(info):
         """判断微博是否为置顶微博"""
-        kt = info.xpath(".//span[@class='kt']/text()")
+        kt = _KT_TEXT(info)
         if kt and kt[0] == u'置顶':
             return True
         else:
@@ -476,7 +522,7 @@ class PageParser(BaseParser):
             is_original = self.is_original(info)
             weibo.original = is_original  # 是否原创微博
             if (not self.filter) or is_original:
-                weibo.weibo_id = info.xpath('@id')[0][2:]
+                weibo.weibo_id = _ID(info)[0][2:]
                 yield self.get_weibo_content(info, is_original, weibo)  # 微博内容
 
                 weibo.article_url = self.get_article_url(info)  # 头条文章url
@@ -510,7 +556,7 @@ class PageParser(BaseParser):
             first_pic = '/mblog/pic/' + weibo_id
             all_pic = '/mblog/picAll/' + weibo_id
             picture_urls = list()
-            a_list = info.xpath('div/a/@href')
+            a_list = _DIV_A_HREF(info)
             all_href = ''.join(a_list)
             if first_pic in all_href:  # 检查是否有单张的缩略图
                 if all_pic in all_href:  # 检查该条微博是否有多图
@@ -526,13 +572,14 @@ class PageParser(BaseParser):
                             '/thumb180/',
                             '/large/') for p in preview_picture_list]
                 else:
-                    if info.xpath('.//img/@src'):
-                        for link in info.xpath('div/a'):
-                            if len(link.xpath('@href')) > 0:
-                                if first_pic in link.xpath('@href')[0]:
-                                    if len(link.xpath('img/@src')) > 0:
-                                        preview_picture = link.xpath(
-                                            'img/@src')[0]
+                    if _IMG_SRC(info):
+                        for link in _DIV_A(info):
+                            href = _HREF(link)
+                            if len(href) > 0:
+                                if first_pic in href[0]:
+                                    img_src = _CHILD_IMG_SRC(link)
+                                    if len(img_src) > 0:
+                                        preview_picture = img_src[0]
                                         picture_urls = [
                                             preview_picture.replace(
                                                 '/wap180/', '/large/')]
@@ -554,7 +601,7 @@ class MblogPicAllParser(BaseParser):
         super().__init__(response)
 
     def extract_preview_picture_list(self):
-        return self.selector.xpath('//img/@src')
+        return _ALL_IMG_SRC(self.selector)
 
 
 class BaseCommentParser(BaseParser):
@@ -567,7 +614,7 @@ class BaseCommentParser(BaseParser):
     def get_all_comment(self):
         """获取评论"""
         comment_list = list()
-        all_div = self.selector.xpath('/html/body/div[@class="c"]')
+        all_div = _COMMENT_DIVS(self.selector)
         for div in all_div:
             id_value = div.get('id')
             if id_value is not None and id_value.find('C_') != -1:
@@ -593,15 +640,15 @@ class BaseCommentParser(BaseParser):
     @staticmethod
     def _parse_one_comment(node):
         comment = CommentParser.COMMENT_TEMPLATE.copy()
-        span_nodes = node.xpath('./span')
+        span_nodes = _CHILD_SPAN(node)
         for span_node in span_nodes:
             klass = span_node.get('class')
             if klass == 'kt':
                 comment['is_hot'] = True
             elif klass == 'ctt':
-                comment['content'] = ''.join(span_node.xpath('./text()'))
+                comment['content'] = ''.join(_TEXT(span_node))
             elif klass == 'cc':
-                text = ''.join(span_node.xpath('./a/text()'))
+                text = ''.join(_CHILD_A_TEXT(span_node))
                 pos = text.find('赞')
                 if pos != -1:
                     comment['like_num'] = text[pos + 2: -1]
@@ -638,8 +685,8 @@ class BaseCommentParser(BaseParser):
                     publish_time = publish_time[:16]
                 comment['publish_time'] = publish_time
 
-        user_node = node.xpath('./a')[0]
-        comment['screen_name'] = user_node.xpath('./text()')[0]
+        user_node = _CHILD_A(node)[0]
+        comment['screen_name'] = _TEXT(user_node)[0]
         user_href = user_node.get('href')
         comment['user_id'] = user_href[user_href.rfind(r'/') + 1:]
         return comment
@@ -669,7 +716,7 @@ class CommentParser(BaseCommentParser):
             is_login_page = is_login_page or "请输入验证码" in body_text
             
             # 检查页面title
-            title_nodes = self.selector.xpath("//title/text()")
+            title_nodes = _TITLE(self.selector)
             page_title = title_nodes[0].strip() if title_nodes else ""
             is_login_page = is_login_page or page_title in ("新浪通行证", "登录 - 新浪微博", "登录", "Login")
             
@@ -679,13 +726,13 @@ class CommentParser(BaseCommentParser):
             
             # 尝试获取微博主体节点
             try:
-                self.info_node = self.selector.xpath("//div[@id='M_']")[0]
+                self.info_node = _M_NODE(self.selector)[0]
                 self.page_status = "ok"
             except IndexError:
                 # 没有找到微博主体节点，但不是登录页
                 # 检查是否有任何评论相关内容
                 has_comment_content = "评论" in body_text or "转发" in body_text
-                has_weibo_content = len(self.selector.xpath("//div[@class='c']")) > 0
+                has_weibo_content = len(_C_DIVS(self.selector)) > 0
                 
                 if has_comment_content or has_weibo_content:
                     # 页面有内容但没有M_节点，可能是页面结构变化
@@ -706,7 +753,7 @@ class CommentParser(BaseCommentParser):
             if not comment_curl_result['error_code']:
                 self.selector = etree.HTML(
                     comment_curl_result['response'].body)
-                self.info_node = self.selector.xpath("//div[@id='M_']")[0]
+                self.info_node = _M_NODE(self.selector)[0]
             else:
                 self.selector = None
 
@@ -717,9 +764,9 @@ class CommentParser(BaseCommentParser):
         is_original = self.is_original()
         weibo_detail['original'] = is_original
         if is_original:
-            weibo_content = self.get_long_weibo()
+            weibo_content = yield self.get_long_weibo()
         else:
-            weibo_content = self.get_long_retweet(rev_type=type(dict))
+            weibo_content = yield self.get_long_retweet(rev_type=type(dict))
         weibo_detail['weibo_content'] = weibo_content
 
         weibo_detail['user_id'], weibo_detail['user_name'] = self.get_user()
@@ -734,37 +781,41 @@ class CommentParser(BaseCommentParser):
             self.info_node)
         weibo_detail['user_id'], weibo_detail['user_name'] = self.get_user()
         # 获取评论总页数
-        if not self.selector.xpath("//input[@name='mp']"):
-            max_page = 1
-        else:
-            max_page = int(self.selector.xpath("//input[@name='mp']")
-                           [0].attrib['value'])
-        weibo_detail['max_page'] = max_page
+        weibo_detail['max_page'] = _max_page(self.selector)
         return weibo_detail
 
+    @gen.coroutine
     def get_long_weibo(self):
-        """获取长原创微博"""
-
+        """
+        获取长原创微博；页面还没有取到时用 gen.sleep 等待后通过 weibo_web_curl 重新爬取，
+        等待期间不阻塞 IOLoop，其他请求照常处理
+        """
         try:
-            for i in range(5):
+            for i in range(settings.LONG_WEIBO_RETRY_TIME):
+                if self.selector is None and i > 0:
+                    yield gen.sleep(random.uniform(*settings.LONG_WEIBO_RETRY_DELAY))
+                    try:
+                        yield self._build_selector()
+                    except IndexError:
+                        self.selector = None
 
                 if self.selector is not None:
-                    info = self.selector.xpath("//div[@id='M_']")[0]
+                    info = _M_NODE(self.selector)[0]
                     wb_content = utils.handle_garbled(info)
-                    wb_time = info.xpath("//span[@class='ct']/text()")[0]
+                    wb_time = _CT_TEXT(info)[0]
                     weibo_content = wb_content[wb_content.find(':') +
                                                1:wb_content.rfind(wb_time)]
                     if weibo_content is not None:
                         return weibo_content
-                sleep(random.randint(6, 10))
         except Exception as e:
             utils.report_log(e)
             raise HTMLParseException
 
+    @gen.coroutine
     def get_long_retweet(self, rev_type=str):
         """获取长转发微博"""
         try:
-            wb_content = self.get_long_weibo()
+            wb_content = yield self.get_long_weibo()
             retweet_content = wb_content[:wb_content.find(u'原文转发')]  # 转发内容的原文
             retweet_reason = wb_content[wb_content.find(u'转发理由:') + 5:]  # 转发理由
 
@@ -816,12 +867,12 @@ class CommentParser(BaseCommentParser):
         if self.selector is None:
             return True
         else:
-            res = self.selector.xpath('//*[@id="M_"]/div/span[@class="cmt"]')
+            res = _M_CMT(self.selector)
             return True if len(res) == 0 else False
 
     def get_user(self) -> tuple:
         """获取用户的id和用户名"""
-        user_node = self.selector.xpath('//*[@id="M_"]/div[1]/a')[0]
+        user_node = _M_USER(self.selector)[0]
         user_id = user_node.get('href')
         user_id = user_id[user_id.rfind(r'/') + 1:]
         user_name = user_node.text
@@ -839,9 +890,9 @@ class CommentParser(BaseCommentParser):
         at_users = list()
         topic_pattern = re.compile('(?<=#).*?(?=#)')
         at_pattern = re.compile('(?<=@).*')
-        a_nodes = info_node.xpath('.//a')
+        a_nodes = _A(info_node)
         for a_node in a_nodes:
-            text = ''.join(a_node.xpath('./text()'))
+            text = ''.join(_TEXT(a_node))
             topic = topic_pattern.search(text)
             if topic is not None:
                 topic = topic.group()
@@ -1,9 +1,23 @@
 import re
 
+from lxml import etree
+
 import utils
 from .base_parser import BaseParser
 from weibo_curl_error import HTMLParseException
 
+# 预编译的 XPath，除 _USER_NODES 外都以一个用户卡片或卡片内的节点为上下文
+_USER_NODES = etree.XPath('//div[@id="pl_user_feedList"]/div')
+_HEAD_IMG = etree.XPath('.//div[@class="avator"]/a/img')
+_INFO = etree.XPath('div[@class="info"]')
+_HEADERS = etree.XPath('div[1]/a')
+_ALL_TEXT = etree.XPath('.//text()')
+_P = etree.XPath('p')
+_I = etree.XPath('i')
+_TEXT = etree.XPath('text()')
+_SPAN = etree.XPath('span')
+_A_TEXT = etree.XPath('a/text()')
+
 class SearchUsersParser(BaseParser):
     """搜索用户页面的解析器"""
 
@@ -46,7 +60,7 @@ class SearchUsersParser(BaseParser):
     def _get_all_user(self):
         """获取全部用户信息"""
         user_list = list()
-        user_nodes = self.selector.xpath('//div[@id="pl_user_feedList"]/div')
+        user_nodes = _USER_NODES(self.selector)
         for node in user_nodes:
             user = self._parse_one_user(node)
             # print(user)
@@ -61,12 +75,12 @@ class SearchUsersParser(BaseParser):
         user = SearchUsersParser.make_a_user()
         # 获取用户头像
         try:
-            user['head'] = user_node.xpath('.//div[@class="avator"]/a/img')[0].get('src')
+            user['head'] = _HEAD_IMG(user_node)[0].get('src')
         except:
             user['head'] = ''
         # 获取其他信息
-        info_selector = user_node.xpath('./div[@class="info"]')[0]
-        headers = info_selector.xpath('./div[1]/a')
+        info_selector = _INFO(user_node)[0]
+        headers = _HEADERS(info_selector)
 
         if len(headers) > 2:  # 拥有头衔的情况
             header_node = headers[1]
@@ -91,32 +105,32 @@ class SearchUsersParser(BaseParser):
                     user_id = user_id.group()
         user['user_id'] = user_id
 
-        user['nickname'] = ''.join(headers[0].xpath(".//text()"))
+        user['nickname'] = ''.join(_ALL_TEXT(headers[0]))
 
-        all_p_node = info_selector.xpath('./p')
+        all_p_node = _P(info_selector)
         first_p = all_p_node[0]
-        gender_info = first_p.xpath('./i')[0].get('class')
+        gender_info = _I(first_p)[0].get('class')
         user['gender'] = 0 if gender_info.rfind('female') != -1 else 1  # 0为女性，1位男性
-        user['location'] = ''.join(first_p.xpath('./text()')).strip()
+        user['location'] = ''.join(_TEXT(first_p)).strip()
 
         footer = None
         other_p_nodes = list()
         for p_node in all_p_node:
             if p_node is first_p:
                 continue
-            elif len(p_node.xpath('./span')) == 3:
+            elif len(_SPAN(p_node)) == 3:
                 footer = p_node
             else:
                 other_p_nodes.append(p_node)
 
         if footer is not None:
-            spans = footer.xpath('./span')
-            user['following'] = spans[0].xpath('./a/text()')[0]
-            user['followers'] = spans[1].xpath('./a/text()')[0]
-            user['weibo_num'] = spans[2].xpath('./a/text()')[0]
+            spans = _SPAN(footer)
+            user['following'] = _A_TEXT(spans[0])[0]
+            user['followers'] = _A_TEXT(spans[1])[0]
+            user['weibo_num'] = _A_TEXT(spans[2])[0]
 
         for node in other_p_nodes:
-            info = ''.join(node.xpath('.//text()'))
+            info = ''.join(_ALL_TEXT(node))
             info_type = info[0: 2]
 
             if info_type == '教育':
@@ -126,7 +140,7 @@ class SearchUsersParser(BaseParser):
             elif info_type == '简介':
                 user['description'] = info
             elif info_type == '标签':
-                user['tags'] = node.xpath('./a/text()')
+                user['tags'] = _A_TEXT(node)
             else:
                 user['verified_reason'] = info
 
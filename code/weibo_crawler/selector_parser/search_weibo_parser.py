@@ -1,10 +1,68 @@
 import re
 from urllib.parse import unquote
 
+from lxml import etree
+
 import utils
 from weibo_curl_error import CookieInvalidException, HTMLParseException
 from .base_parser import BaseParser
 
+# 预编译的 XPath，每个表达式只编译一次；除前两个页面级查询外，都以一张微博卡片或卡片内的节点为上下文
+_NO_RESULT = etree.XPath('//div[@class="card card-no-result s-pt20b40"]')
+_CARDS = etree.XPath("//div[@class='card-wrap']")
+_INFO = etree.XPath("div[@class='card']/div[@class='card-feed']/div[@class='content']/div[@class='info']")
+_HEAD_IMG = etree.XPath('.//div[@class="avator"]/a//img')
+_MID = etree.XPath('.//@mid')
+_DATA_MID = etree.XPath('.//@data-mid')
+_DATA_ID = etree.XPath('.//@data-id')
+_STATUS_HREF = etree.XPath('.//a[contains(@href, "/status/")]/@href')
+_WEIBO_HREF = etree.XPath('.//a[contains(@href, "/weibo/")]/@href')
+_USER_HREF = etree.XPath('div[2]/a/@href')
+_USER_NICK_NAME = etree.XPath('div[2]/a/@nick-name')
+_U_HREF = etree.XPath('.//a[contains(@href, "/u/")]/@href')
+_U_TEXT = etree.XPath('.//a[contains(@href, "/u/")]/text()')
+_TXT = etree.XPath('.//p[@class="txt"]')
+_CONTENT_P = etree.XPath('.//div[contains(@class, "content")]//p')
+_CARD_COMMENT = etree.XPath('.//div[@class="card-comment"]')
+_CONTENT_FULL = etree.XPath('.//p[@node-type="feed_list_content_full"]')
+_TEXT = etree.XPath('.//text()')
+_STRING = etree.XPath('string(.)')
+_FORWARD = etree.XPath('.//a[@action-type="feed_list_forward"]/text()')
+_COMMENT = etree.XPath('.//a[@action-type="feed_list_comment"]/text()')
+_LAST_LIKE = etree.XPath('(.//a[@action-type="feed_list_like"])[last()]/em/text()')
+_LAST_FROM_P = etree.XPath('(.//p[@class="from"])[last()]')
+_LAST_FROM_DIV = etree.XPath('(.//div[@class="from"])[last()]')
+_FIRST_A_HREF = etree.XPath('a[1]/@href')
+_FIRST_A_TEXT = etree.XPath('a[1]/text()')
+_SECOND_A_TEXT = etree.XPath('a[2]/text()')
+_TIME_SPAN = etree.XPath('.//span[contains(@class, "time")]/text()')
+_TIME_LINK = etree.XPath(
+    './/a[contains(text(), "分钟前") or contains(text(), "小时前") or (contains(text(), "月") and contains(text(), "日"))]'
+)
+_PIC_LIST = etree.XPath('.//div[@class="media media-piclist"]')
+_PIC_SRC = etree.XPath('ul[1]/li/img/@src')
+_VIDEO = etree.XPath('.//div[@class="thumbnail"]/a/@action-data')
+# 转发卡片 <div class="card-comment"> 内的查询
+_FORWARD_USER = etree.XPath('.//div[@node-type="feed_list_forwardContent"]/a[1]')
+_LIKE_DATA = etree.XPath('.//a[@action-type="feed_list_like"]/@action-data')
+_FROM_HREF = etree.XPath('.//p[@class="from"]/a/@href')
+_FROM_FIRST_A_TEXT = etree.XPath('.//p[@class="from"]/a[1]/text()')
+_FROM_SECOND_A_TEXT = etree.XPath('.//p[@class="from"]/a[2]/text()')
+_ACT_FORWARD = etree.XPath('.//ul[@class="act s-fr"]/li/a[1]/text()')
+_ACT_COMMENT = etree.XPath('.//ul[@class="act s-fr"]/li[2]/a[1]/text()')
+_LIKE = etree.XPath('.//a[@action-type="feed_list_like"]/em/text()')
+# 正文节点内的查询
+_A = etree.XPath('.//a')
+_WBICON = etree.XPath('i[@class="wbicon"]')
+_WBICON_TEXT = etree.XPath('i[@class="wbicon"]/text()')
+_HREF = etree.XPath('@href')
+_NICK_NAME = etree.XPath('@nick-name')
+
+
+def _xpath_or_empty(xpath, node):
+    """node 为 None 时返回空列表"""
+    return xpath(node) if node is not None else []
+
 
 class SearchWeiboParser(BaseParser):
     def __init__(self, response):
@@ -15,7 +73,7 @@ class SearchWeiboParser(BaseParser):
         解析网页
         """
         # 检查页面是否为空
-        check_empty = self.selector.xpath('//div[@class="card card-no-result s-pt20b40"]')
+        check_empty = _NO_RESULT(self.selector)
         if len(check_empty) != 0:
             return None
         try:
@@ -37,28 +95,28 @@ class SearchWeiboParser(BaseParser):
 
     def _parse_weibo(self):
         """解析网页中的微博信息"""
-        selector = self.selector
-        for sel in selector.xpath("//div[@class='card-wrap']"):
-            info = sel.xpath(
-                "div[@class='card']/div[@class='card-feed']/div[@class='content']/div[@class='info']"
-            )
+        for sel in _CARDS(self.selector):
+            info = _INFO(sel)
             if len(info) != 0:
                 weibo = dict()
                 # weibo['id'] = sel.xpath('@mid')[0]
 
                 # 获取头像
                 try:
-                    weibo['head'] = sel.xpath('.//div[@class="avator"]/a//img')[0].get('src')
+                    weibo['head'] = _HEAD_IMG(sel)[0].get('src')
                 except:
                     weibo['head'] = ''
 
                 # 获取 weibo_id（s.weibo.com 和 weibo.cn 结构可能不同，需要安全检查）
                 weibo_id = ''
                 
-                # 方法1：从 mid 属性提取（最可靠）
-                mid_attrs = sel.xpath('.//@mid')
-                if mid_attrs and mid_attrs[0]:
-                    weibo_id = str(mid_attrs[0]).lstrip('M_').lstrip('m_')
+                # 方法1：从 mid 属性提取（最可靠），卡片节点自身带有 mid 时不再扫描整张卡片
+                mid = sel.get('mid')
+                if mid is None:
+                    mid_attrs = _MID(sel)
+                    mid = mid_attrs[0] if mid_attrs else None
+                if mid:
+                    weibo_id = str(mid).lstrip('M_').lstrip('m_')
                     if weibo_id and len(weibo_id) > 5:
                         weibo['weibo_id'] = weibo_id
                     else:
@@ -66,9 +124,9 @@ class SearchWeiboParser(BaseParser):
                 
                 # 方法2：从 data-mid 或其他 data 属性提取
                 if not weibo_id:
-                    mid_attrs = sel.xpath('.//@data-mid')
+                    mid_attrs = _DATA_MID(sel)
                     if not mid_attrs:
-                        mid_attrs = sel.xpath('.//@data-id')
+                        mid_attrs = _DATA_ID(sel)
                     if mid_attrs and mid_attrs[0]:
                         weibo_id = str(mid_attrs[0]).lstrip('M_').lstrip('m_')
                         if weibo_id and len(weibo_id) > 5:
@@ -76,13 +134,17 @@ class SearchWeiboParser(BaseParser):
                         else:
                             weibo_id = ''
                 
+                # 最后一个 <p class="from">，发布时间、来源与方法3都从这里取
+                from_p = _LAST_FROM_P(sel)
+                from_p = from_p[0] if from_p else None
+
                 # 方法3：从链接中提取（需要过滤掉无效链接）
                 if not weibo_id:
-                    weibo_id_hrefs = sel.xpath('(.//p[@class="from"])[last()]/a[1]/@href')
+                    weibo_id_hrefs = _xpath_or_empty(_FIRST_A_HREF, from_p)
                     if not weibo_id_hrefs:
-                        weibo_id_hrefs = sel.xpath('.//a[contains(@href, "/status/")]/@href')
+                        weibo_id_hrefs = _STATUS_HREF(sel)
                     if not weibo_id_hrefs:
-                        weibo_id_hrefs = sel.xpath('.//a[contains(@href, "/weibo/")]/@href')
+                        weibo_id_hrefs = _WEIBO_HREF(sel)
                     
                     if weibo_id_hrefs:
                         for href in weibo_id_hrefs:
@@ -113,10 +175,10 @@ class SearchWeiboParser(BaseParser):
                 weibo['weibo_id'] = weibo_id
                 
                 # 获取 user_id
-                user_id_hrefs = info[0].xpath('div[2]/a/@href')
+                user_id_hrefs = _USER_HREF(info[0])
                 if not user_id_hrefs:
                     # 尝试备用 xpath
-                    user_id_hrefs = info[0].xpath('.//a[contains(@href, "/u/")]/@href')
+                    user_id_hrefs = _U_HREF(info[0])
                     if not user_id_hrefs:
                         weibo['user_id'] = ''
                     else:
@@ -125,9 +187,9 @@ class SearchWeiboParser(BaseParser):
                     weibo['user_id'] = user_id_hrefs[0].split('?')[0].split('/')[-1]
                 
                 # 获取 screen_name
-                screen_name_nodes = info[0].xpath('div[2]/a/@nick-name')
+                screen_name_nodes = _USER_NICK_NAME(info[0])
                 if not screen_name_nodes:
-                    screen_name_nodes = info[0].xpath('.//a[contains(@href, "/u/")]/text()')
+                    screen_name_nodes = _U_TEXT(info[0])
                     if not screen_name_nodes:
                         weibo['screen_name'] = ''
                     else:
@@ -136,21 +198,21 @@ class SearchWeiboParser(BaseParser):
                     weibo['screen_name'] = screen_name_nodes[0]
                 
                 # 获取文本内容
-                txt_sels = sel.xpath('.//p[@class="txt"]')
+                txt_sels = _TXT(sel)
                 if not txt_sels:
                     # s.weibo.com 可能用不同的 class
-                    txt_sels = sel.xpath('.//div[contains(@class, "content")]//p')
+                    txt_sels = _CONTENT_P(sel)
                     if not txt_sels:
                         # 如果找不到文本区域，跳过这条微博
                         continue
                 txt_sel = txt_sels[0]
-                retweet_sel = sel.xpath('.//div[@class="card-comment"]')
+                retweet_sel = _CARD_COMMENT(sel)
                 retweet_txt_sel = ''
-                if retweet_sel and retweet_sel[0].xpath('.//p[@class="txt"]'):
-                    retweet_txt_sel = retweet_sel[0].xpath(
-                        './/p[@class="txt"]')[0]
-                content_full = sel.xpath(
-                    './/p[@node-type="feed_list_content_full"]')
+                if retweet_sel:
+                    retweet_txt_sels = _TXT(retweet_sel[0])
+                    if retweet_txt_sels:
+                        retweet_txt_sel = retweet_txt_sels[0]
+                content_full = _CONTENT_FULL(sel)
                 is_long_weibo = False
                 is_long_retweet = False
                 if content_full:
@@ -162,13 +224,15 @@ class SearchWeiboParser(BaseParser):
                         retweet_txt_sel = content_full[1]
                         is_long_weibo = True
                         is_long_retweet = True
-                    elif retweet_sel[0].xpath('.//p[@node-type="feed_list_content_full"]'):
-                        retweet_txt_sel = retweet_sel[0].xpath('.//p[@node-type="feed_list_content_full"]')[0]
-                        is_long_retweet = True
                     else:
-                        txt_sel = content_full[0]
-                        is_long_weibo = True
-                text = txt_sel.xpath('.//text()')
+                        retweet_content_full = _CONTENT_FULL(retweet_sel[0])
+                        if retweet_content_full:
+                            retweet_txt_sel = retweet_content_full[0]
+                            is_long_retweet = True
+                        else:
+                            txt_sel = content_full[0]
+                            is_long_weibo = True
+                text = _TEXT(txt_sel)
                 if text is not None:
                     weibo['text'] = ' '.join(text)
                 else:
@@ -188,7 +252,7 @@ class SearchWeiboParser(BaseParser):
                 weibo['topics'] = self._get_topics(txt_sel)
 
                 # 获取转发数
-                reposts_count = sel.xpath('.//a[@action-type="feed_list_forward"]/text()')
+                reposts_count = _FORWARD(sel)
                 if len(reposts_count) != 0:
                     reposts_count = reposts_count[0]
                     try:
@@ -202,7 +266,7 @@ class SearchWeiboParser(BaseParser):
                 else:
                     weibo['reposts_count'] = '0'
                 # 获取评论数
-                comments_count = sel.xpath('.//a[@action-type="feed_list_comment"]/text()')
+                comments_count = _COMMENT(sel)
                 if len(comments_count) != 0:
                     comments_count = comments_count[0]
                     comments_count = re.findall(r'\d+.*', comments_count)
@@ -210,7 +274,7 @@ class SearchWeiboParser(BaseParser):
                 else:
                     weibo['comments_count'] = '0'
                 # 获取点赞数
-                attitudes_count = sel.xpath('(.//a[@action-type="feed_list_like"])[last()]/em/text()')
+                attitudes_count = _LAST_LIKE(sel)
                 if len(attitudes_count) != 0:
                     attitudes_count = attitudes_count[0]
                     weibo['attitudes_count'] = attitudes_count if attitudes_count else '0'
@@ -219,17 +283,20 @@ class SearchWeiboParser(BaseParser):
 
                 # 获取发布时间
                 # 微博页面结构可能是 <p class="from"> 或 <div class="from">
-                created_at_nodes = sel.xpath('(.//p[@class="from"])[last()]/a[1]/text()')
+                created_at_nodes = _xpath_or_empty(_FIRST_A_TEXT, from_p)
                 created_at = ''
+                from_div = None
                 if not created_at_nodes:
                     # 尝试 div.from 结构（新版微博页面）
-                    created_at_nodes = sel.xpath('(.//div[@class="from"])[last()]/a[1]/text()')
+                    from_div = _LAST_FROM_DIV(sel)
+                    from_div = from_div[0] if from_div else None
+                    created_at_nodes = _xpath_or_empty(_FIRST_A_TEXT, from_div)
                 if not created_at_nodes:
                     # 尝试其他可能的 xpath
-                    created_at_nodes = sel.xpath('.//span[contains(@class, "time")]/text()')
+                    created_at_nodes = _TIME_SPAN(sel)
                 if not created_at_nodes:
                     # 尝试直接查找包含时间格式的a标签
-                    time_links = sel.xpath('.//a[contains(text(), "分钟前") or contains(text(), "小时前") or (contains(text(), "月") and contains(text(), "日"))]')
+                    time_links = _TIME_LINK(sel)
                     if time_links:
                         created_at_nodes = [time_links[0].text]
 
@@ -241,18 +308,21 @@ class SearchWeiboParser(BaseParser):
 
                 # 获取来源
                 try:
-                    source = sel.xpath('(.//p[@class="from"])[last()]/a[2]/text()')[0]
+                    source = _xpath_or_empty(_SECOND_A_TEXT, from_p)[0]
                 except IndexError:
                     try:
                         # 尝试 div.from 结构
-                        source = sel.xpath('(.//div[@class="from"])[last()]/a[2]/text()')[0]
+                        if from_div is None:
+                            from_div = _LAST_FROM_DIV(sel)
+                            from_div = from_div[0] if from_div else None
+                        source = _xpath_or_empty(_SECOND_A_TEXT, from_div)[0]
                     except IndexError:
                         source = None
                 weibo['source'] = source if source else ''
                 pics = ''
-                is_exist_pic = sel.xpath('.//div[@class="media media-piclist"]')
+                is_exist_pic = _PIC_LIST(sel)
                 if is_exist_pic:
-                    pics = is_exist_pic[0].xpath('ul[1]/li/img/@src')
+                    pics = _PIC_SRC(is_exist_pic[0])
                     if pics:
                         # 修复 URL 格式：确保是完整的 http/https URL
                         fixed_pics = []
@@ -285,7 +355,7 @@ class SearchWeiboParser(BaseParser):
                 else:
                     pics = []
                 video_url = ''
-                is_exist_video = sel.xpath('.//div[@class="thumbnail"]/a/@action-data')
+                is_exist_video = _VIDEO(sel)
                 if is_exist_video:
                     video_url = is_exist_video[0]
                     video_url = unquote(
@@ -298,21 +368,17 @@ class SearchWeiboParser(BaseParser):
                     weibo['pics'] = ''
                     weibo['video_url'] = ''
                 weibo['retweet_id'] = ''
-                if retweet_sel and retweet_sel[0].xpath(
-                        './/div[@node-type="feed_list_forwardContent"]/a[1]'):
+                forward_user = _FORWARD_USER(retweet_sel[0]) if retweet_sel else []
+                if forward_user:
+                    retweet_node = retweet_sel[0]
                     retweet = dict()
-                    retweet['retweet_id'] = retweet_sel[0].xpath(
-                        './/a[@action-type="feed_list_like"]/@action-data'
-                    )[0][4:]
-                    retweet['weibo_id'] = retweet_sel[0].xpath(
-                        './/p[@class="from"]/a/@href')[0].split(
+                    retweet['retweet_id'] = _LIKE_DATA(retweet_node)[0][4:]
+                    retweet['weibo_id'] = _FROM_HREF(retweet_node)[0].split(
                         '/')[-1].split('?')[0]
-                    info = retweet_sel[0].xpath(
-                        './/div[@node-type="feed_list_forwardContent"]/a[1]'
-                    )[0]
-                    retweet['user_id'] = info.xpath('@href')[0].split('/')[-1]
-                    retweet['screen_name'] = info.xpath('@nick-name')[0]
-                    retweet['text'] = ' '.join(retweet_txt_sel.xpath('.//text()')).replace('\u200b', '').replace('\ue627', '')
+                    info = forward_user[0]
+                    retweet['user_id'] = _HREF(info)[0].split('/')[-1]
+                    retweet['screen_name'] = _NICK_NAME(info)[0]
+                    retweet['text'] = ' '.join(_TEXT(retweet_txt_sel)).replace('\u200b', '').replace('\ue627', '')
                     retweet['article_url'] = self._get_article_url(retweet_txt_sel)
                     retweet['location'] = self._get_location(retweet_txt_sel)
                     if retweet['location']:
@@ -325,7 +391,7 @@ class SearchWeiboParser(BaseParser):
                     retweet['topics'] = self._get_topics(retweet_txt_sel)
 
                     # 获取转发数
-                    reposts_count = retweet_sel[0].xpath('.//ul[@class="act s-fr"]/li/a[1]/text()')
+                    reposts_count = _ACT_FORWARD(retweet_node)
                     if len(reposts_count) != 0:
                         reposts_count = reposts_count[0]
                         reposts_count = re.findall(r'\d+.*', reposts_count)
@@ -333,7 +399,7 @@ class SearchWeiboParser(BaseParser):
                     else:
                         retweet['reposts_count'] = '0'
                     # 获取评论数
-                    comments_count = retweet_sel[0].xpath('.//ul[@class="act s-fr"]/li[2]/a[1]/text()')
+                    comments_count = _ACT_COMMENT(retweet_node)
                     if len(comments_count) != 0:
                         comments_count = comments_count[0]
                         comments_count = re.findall(r'\d+.*', comments_count)
@@ -341,18 +407,16 @@ class SearchWeiboParser(BaseParser):
                     else:
                         retweet['comments_count'] = '0'
                     # 获取点赞数
-                    attitudes_count = retweet_sel[0].xpath('.//a[@action-type="feed_list_like"]/em/text()')
+                    attitudes_count = _LIKE(retweet_node)
                     if len(attitudes_count) != 0:
                         attitudes_count = attitudes_count[0]
                         retweet['attitudes_count'] = attitudes_count if attitudes_count else '0'
                     else:
                         retweet['attitudes_count'] = '0'
 
-                    created_at = retweet_sel[0].xpath(
-                        './/p[@class="from"]/a[1]/text()')[0].replace(' ', '').replace('\n', '').split('前')[0]
+                    created_at = _FROM_FIRST_A_TEXT(retweet_node)[0].replace(' ', '').replace('\n', '').split('前')[0]
                     retweet['created_at'] = utils.standardize_date(created_at)
-                    source = retweet_sel[0].xpath(
-                        './/p[@class="from"]/a[2]/text()')
+                    source = _FROM_SECOND_A_TEXT(retweet_node)
                     retweet['source'] = source[0] if source else ''
                     retweet['pics'] = pics
                     retweet['video_url'] = video_url
@@ -365,43 +429,41 @@ class SearchWeiboParser(BaseParser):
     def _get_article_url(selector):
         """获取微博头条文章url"""
         article_url = ''
-        text = selector.xpath('string(.)')[0].replace(
+        text = _STRING(selector)[0].replace(
             '\u200b', '').replace('\ue627', '').replace('\n',
                                                         '').replace(' ', '')
         if text.startswith('发布了头条文章'):
-            urls = selector.xpath('.//a')
+            urls = _A(selector)
             for url in urls:
-                if url.xpath(
-                        'i[@class="wbicon"]/text()')[0] == 'O':
-                    if url.xpath('@href')[0] and url.xpath(
-                            '@href')[0].startswith('http://t.cn'):
-                        article_url = url.xpath('@href')[0]
+                if _WBICON_TEXT(url)[0] == 'O':
+                    href = _HREF(url)[0]
+                    if href and href.startswith('http://t.cn'):
+                        article_url = href
                     break
         return article_url
 
     @staticmethod
     def _get_location(selector):
         """获取微博发布位置"""
-        a_list = selector.xpath('.//a')
+        a_list = _A(selector)
         location = ''
         for a in a_list:
-            if a.xpath('./i[@class="wbicon"]') and a.xpath(
-                    './i[@class="wbicon"]/text()')[0] == '2':
-                location = a.xpath('string(.)')[1:]
+            if _WBICON(a) and _WBICON_TEXT(a)[0] == '2':
+                location = _STRING(a)[1:]
                 break
         return location
 
     @staticmethod
     def _get_at_users(selector):
         """获取微博中@的用户昵称"""
-        a_list = selector.xpath('.//a')
+        a_list = _A(selector)
         at_list = []
         for a in a_list:
-            if len(unquote(a.xpath('@href')[0])) > 14 and len(
-                    a.xpath('string(.)')) > 1:
-                if unquote(a.xpath('@href')[0])[14:] == a.xpath(
-                        'string(.)')[1:]:
-                    at_user = a.xpath('string(.)')[1:]
+            href = unquote(_HREF(a)[0])
+            text = _STRING(a)
+            if len(href) > 14 and len(text) > 1:
+                if href[14:] == text[1:]:
+                    at_user = text[1:]
                     if at_user not in at_list:
                         at_list.append(at_user)
         return at_list
@@ -409,11 +471,11 @@ class SearchWeiboParser(BaseParser):
     @staticmethod
     def _get_topics(selector):
         """获取参与的微博话题"""
-        a_list = selector.xpath('.//a')
+        a_list = _A(selector)
         topics = ''
         topic_list = []
         for a in a_list:
-            text = a.xpath('string(.)')
+            text = _STRING(a)
             if len(text) > 2 and text[0] == '#' and text[-1] == '#':
                 if text[1:-1] not in topic_list:
                     topic_list.append(text[1:-1])
@@ -77,6 +77,90 @@ def _get_use_proxy():
     return False
 
 
+def _get_http_client_config():
+    """获取 HTTP 客户端连接池配置"""
+    http_client = {
+        "max_clients": 50,
+        "connect_timeout": 10,
+        "max_host_connections": 10,
+        "keepalive": True,
+        "keepalive_idle": 60,
+        "max_connects": 20,
+    }
+    if USE_UNIFIED_CONFIG:
+        try:
+            http_client.update(get_crawler_config().get('http_client') or {})
+        except:
+            pass
+    return http_client
+
+
+def _get_parse_pool_config():
+    """获取 HTML 解析池配置"""
+    parse_pool = {
+        "executor": "thread",
+        "workers": 4,
+        "handlers": {
+            "search_tweets": True,
+            "users_search": True,
+            "users_show": True,
+            "statuses_show": True,
+        },
+    }
+    if USE_UNIFIED_CONFIG:
+        try:
+            custom = dict(get_crawler_config().get('parse_pool') or {})
+            parse_pool["handlers"].update(custom.pop("handlers", None) or {})
+            parse_pool.update(custom)
+        except:
+            pass
+    return parse_pool
+
+
+def _get_account_pool_config():
+    """获取账号池调度配置"""
+    account_pool = {
+        "requests_per_minute": 20,
+        "cooldown_base": 60,
+        "cooldown_max": 1800,
+        "success_rate_weight": 0.2,
+    }
+    if USE_UNIFIED_CONFIG:
+        try:
+            account_pool.update(get_crawler_config().get('account_pool') or {})
+        except:
+            pass
+    return account_pool
+
+
+def _get_response_cache_config():
+    """获取响应缓存配置"""
+    response_cache = {
+        "enabled": True,
+        "max_entries": 1000,
+        "max_mb": 64,
+        "redis": False,
+        "redis_db": 2,
+        "ttl": {
+            "users_show": 600,
+            "users_info": 600,
+            "users_weibo_page": 120,
+            "search_weibo": 120,
+            "search_users": 300,
+            "follow": 600,
+            "fans": 600,
+        },
+    }
+    if USE_UNIFIED_CONFIG:
+        try:
+            custom = dict(get_crawler_config().get('response_cache') or {})
+            response_cache["ttl"].update(custom.pop("ttl", None) or {})
+            response_cache.update(custom)
+        except:
+            pass
+    return response_cache
+
+
 def _get_verbose_block_log():
     """是否输出详细拦截日志"""
     if USE_UNIFIED_CONFIG:
@@ -122,6 +206,68 @@ USE_PROXY = _get_use_proxy()
 # 是否支持代理（运行时探测 pycurl/tornado curl 客户端可用性）
 PROXY_SUPPORTED = False
 
+# HTTP 客户端连接池，启动时由 http_client.http_client_manager.setup() 统一配置一次
+_HTTP_CLIENT = _get_http_client_config()
+# 同时进行的请求数上限（curl 句柄数）
+HTTP_MAX_CLIENTS = int(_HTTP_CLIENT["max_clients"])
+# 建立连接的超时时长
+HTTP_CONNECT_TIMEOUT = float(_HTTP_CLIENT["connect_timeout"])
+# 同一主机同时进行的请求数上限，0 表示不限制
+HTTP_MAX_HOST_CONNECTIONS = int(_HTTP_CLIENT["max_host_connections"])
+# 是否开启 TCP keep-alive，使 curl 句柄缓存的连接可以长时间复用
+HTTP_KEEPALIVE = bool(_HTTP_CLIENT["keepalive"])
+# 连接空闲多少秒后开始发送 keep-alive 探测
+HTTP_KEEPALIVE_IDLE = int(_HTTP_CLIENT["keepalive_idle"])
+# 每个 curl 句柄最多缓存的连接数
+HTTP_MAX_CONNECTS = int(_HTTP_CLIENT["max_connects"])
+
+# HTML 解析池：解析在 IOLoop 之外执行，避免大页面的解析使并发请求排队
+_PARSE_POOL = _get_parse_pool_config()
+# 解析池类型：thread（线程池）、process（进程池）、none（在 IOLoop 线程上直接解析）
+PARSE_EXECUTOR = str(_PARSE_POOL["executor"]).lower()
+# 解析池的线程数/进程数
+PARSE_WORKERS = int(_PARSE_POOL["workers"])
+# 各接口是否使用解析池
+PARSE_OFFLOAD = dict(_PARSE_POOL["handlers"])
+
+# 账号池调度：按成功率与剩余请求额度选择账号，被拦截的账号按指数退避冷却
+_ACCOUNT_POOL = _get_account_pool_config()
+# 每个账号每分钟的请求额度，额度剩余越多越优先被选中（不是硬性上限）
+ACCOUNT_REQUESTS_PER_MINUTE = int(_ACCOUNT_POOL["requests_per_minute"])
+# 账号第一次被拦截（登录页/验证页/403/418）后的冷却时长（秒），之后每次连续被拦截翻倍
+ACCOUNT_COOLDOWN_BASE = float(_ACCOUNT_POOL["cooldown_base"])
+# 冷却时长的上限（秒）
+ACCOUNT_COOLDOWN_MAX = float(_ACCOUNT_POOL["cooldown_max"])
+# 成功率按指数加权平均计算，每次请求结果的权重
+ACCOUNT_SUCCESS_RATE_WEIGHT = float(_ACCOUNT_POOL["success_rate_weight"])
+
+# 响应缓存：weibo_web_curl 成功的响应按爬取目标与参数缓存，相同的并发请求只向微博发送一次
+_RESPONSE_CACHE = _get_response_cache_config()
+# 是否启用响应缓存
+RESPONSE_CACHE_ENABLED = bool(_RESPONSE_CACHE["enabled"])
+# 内存缓存最多保存的响应数
+RESPONSE_CACHE_MAX_ENTRIES = int(_RESPONSE_CACHE["max_entries"])
+# 内存缓存的响应体总大小上限（字节）
+RESPONSE_CACHE_MAX_BYTES = int(float(_RESPONSE_CACHE["max_mb"]) * 1024 * 1024)
+# 是否同时把响应缓存到 Redis（多个爬虫进程共享，重启后仍然有效），地址取 REDIS_HOST/REDIS_PORT 环境变量
+RESPONSE_CACHE_REDIS = bool(_RESPONSE_CACHE["redis"])
+# 响应缓存使用的 Redis 库
+RESPONSE_CACHE_REDIS_DB = int(_RESPONSE_CACHE["redis_db"])
+# 各爬取目标（SpiderAim 的名字）的缓存时长（秒），没有列出或为 0 的不缓存
+RESPONSE_CACHE_TTL = {aim: int(ttl) for aim, ttl in _RESPONSE_CACHE["ttl"].items()}
+
+# 获取长微博时页面为空的最多尝试次数
+LONG_WEIBO_RETRY_TIME = 5
+
+# 获取长微博重试前的随机等待范围（秒），用 gen.sleep 等待，不阻塞 IOLoop
+LONG_WEIBO_RETRY_DELAY = (6, 10)
+
+# users_show_batch 接口同时爬取的用户数上限（所有批量请求共享）
+USERS_SHOW_BATCH_CONCURRENCY = 5
+
+# users_show_batch 接口单次请求的最大用户数
+USERS_SHOW_BATCH_MAX = 100
+
 # 爬取结果正确时返回结果的格式
 SUCCESS = {
     'error_code': 0,
@@ -147,5 +293,9 @@ if __name__ == '__main__':
     print(f"超时时间: {REQUEST_TIME_OUT}")
     print(f"User-Agent: {HEADERS['User-Agent'][:50]}...")
     print(f"启用代理: {USE_PROXY}")
+    print(f"HTTP 连接池: {_HTTP_CLIENT}")
+    print(f"解析池: {_PARSE_POOL}")
+    print(f"账号池调度: {_ACCOUNT_POOL}")
+    print(f"响应缓存: {_RESPONSE_CACHE}")
     print(f"详细拦截日志: {VERBOSE_BLOCK_LOG}")
     print(f"详细结果日志: {VERBOSE_RESULT_LOG}")
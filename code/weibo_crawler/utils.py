@@ -4,6 +4,8 @@ from settings import LOGGING
 import traceback
 import re
 
+from lxml import etree
+
 
 # Base62 字符表，用于微博ID转换
 BASE62_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
@@ -113,10 +115,13 @@ def report_log(exception: Exception):
     )
 
 
+_ALL_TEXT = etree.XPath('.//text()')
+
+
 def handle_garbled(info):
     """处理乱码"""
     try:
-        _info = (' '.join(info.xpath('.//text()')).replace(u'\u200b', '').encode(
+        _info = (' '.join(_ALL_TEXT(info)).replace(u'\u200b', '').encode(
             sys.stdout.encoding, 'ignore').decode(sys.stdout.encoding))
         return _info
     except Exception as e:
@@ -1,11 +1,13 @@
 from tornado import gen
 from tornado.curl_httpclient import CurlError
-from tornado.httpclient import AsyncHTTPClient, HTTPError
+from tornado.httpclient import HTTPError
 from enum import Enum, unique
 import re
 
 import settings
 import request_builder
+from http_client import http_client_manager
+from response_cache import make_key, response_cache
 from weibo_curl_error import WeiboCurlError
 
 
@@ -23,36 +25,75 @@ class SpiderAim(Enum):
     search_weibo = request_builder.SearchWeiboReqBuilder
     search_users = request_builder.SearchUsersReqBuilder
 
- 
-# AsyncHTTPClient.configure("tornado.curl_httpclient.CurlAsyncHTTPClient")
+
+def http_code_to_error_code(http_code):
+    """
+    :return: http code 对应的错误码，302/403 为 Cookie 失效（3），418 为 ip 失效（4），其他为 1
+    """
+    if http_code == 302 or http_code == 403:
+        return 3
+    if http_code == 418:
+        return 4
+    return 1
+
 
 @gen.coroutine
 def weibo_web_curl(curl_aim: SpiderAim,
+                   retry_time=settings.RETRY_TIME, with_cookie=True, use_cache=True, **kwargs):
+    """
+    根据爬取的目标获得response，settings.RESPONSE_CACHE_TTL 中配置了缓存时长的目标先查响应缓存，
+    相同的并发请求只向微博发送一次
+    :param curl_aim: 爬取的目标，其值必须为Aim枚举值
+    :param retry_time: 最多尝试发送request的次数
+    :param use_cache: 为 False 时不读缓存，直接请求微博（新的响应仍然写入缓存）
+    :param kwargs: 需要转发给RequestBuilder的初始化参数
+    :return: 与 fetch_web_page 相同
+    """
+    ttl = settings.RESPONSE_CACHE_TTL.get(curl_aim.name, 0)
+    if not settings.RESPONSE_CACHE_ENABLED or ttl <= 0:
+        result = yield fetch_web_page(curl_aim, retry_time, with_cookie, **kwargs)
+        return result
+    key = make_key(curl_aim.name, with_cookie, kwargs)
+    result = yield response_cache.fetch(
+        key, ttl, lambda: fetch_web_page(curl_aim, retry_time, with_cookie, **kwargs), use_cache)
+    # 等待同一次请求的调用方共用 result，这里复制一份再带上缓存的键
+    return dict(result, cache_key=key)
+
+
+def invalidate_cached_response(curl_result):
+    """
+    响应解析失败（被拦截的页面、结构异常的页面）时删除它的缓存，之后相同的请求重新访问微博
+    :param curl_result: weibo_web_curl 的返回结果，没有经过缓存的结果不做处理
+    """
+    key = curl_result.get('cache_key')
+    if key is not None:
+        response_cache.invalidate(key)
+
+
+@gen.coroutine
+def fetch_web_page(curl_aim: SpiderAim,
                    retry_time=settings.RETRY_TIME, with_cookie=True, **kwargs):
     """
-    根据爬取的目标对相对应的网站发送request请求并获得response
+    根据爬取的目标对相对应的网站发送request请求并获得response（不经过缓存）
     :param curl_aim: 爬取的目标，其值必须为Aim枚举值
     :param retry_time: 最多尝试发送request的次数
     :param kwargs: 需要转发给RequestBuilder的初始化参数
     :return: 当参数use_bs4为True时返回bs4解析的soup，False时返回etree解析后的selector
+    每次尝试的结果都会反馈给所用的账号（account.record_result），被拦截（登录页/验证页、403、418）的账号进入冷却，
+    重试时会换一个不在冷却中的账号；重试次数用完后才返回错误
     """
     global response
-    # 使用 curl httpclient 以支持 proxy_host/proxy_port
-    try:
-        AsyncHTTPClient.configure("tornado.curl_httpclient.CurlAsyncHTTPClient")
-    except Exception:
-        # 如果环境缺少 pycurl，继续用默认客户端（此时 proxy_host 不可用）
-        pass
-    client = AsyncHTTPClient()
     # 将 curl_aim 转换成 RequestBuilder 类
     RequestBuilder = curl_aim.value
     # 构建请求并发送
     for epoch in range(retry_time):  # 最多进行retry_time次的请求尝试
-        request = RequestBuilder(
-            **kwargs).make_request(with_cookie=with_cookie)  # 获得 http request
+        can_retry = epoch < retry_time - 1
+        builder = RequestBuilder(**kwargs)
+        request = builder.make_request(with_cookie=with_cookie)  # 获得 http request
+        account = builder.account
 
         try:
-            response = yield client.fetch(request)  # 发出请求获取响应
+            response = yield http_client_manager.fetch(request)  # 发出请求获取响应
             # print(response.body)
 
             # 检查是否Cookie失效/跳登录页/验证码页（s.weibo.com 经常返回登录/验证页导致解析报错）
@@ -83,6 +124,9 @@ def weibo_web_curl(curl_aim: SpiderAim,
                             page_title,
                             (request.headers.get("Cookie") or "")[:80],
                         )
+                    account.record_result(3, "login/verification page")
+                    if can_retry:
+                        continue  # 换一个账号重试
                     return {"error_code": 3, "errmsg": "Invalid cookie or blocked by verification."}
 
                 # 原有 title 判断保留（更严格）
@@ -93,24 +137,31 @@ def weibo_web_curl(curl_aim: SpiderAim,
                             request.url,
                             page_title,
                         )
+                    account.record_result(3, "login page")
+                    if can_retry:
+                        continue
                     return {"error_code": 3, "errmsg": "Invalid cookie."}
             except Exception:
                 pass
         except CurlError as e:  # 连接超时
-            if epoch < settings.RETRY_TIME:
+            account.record_result(5, str(e))
+            if can_retry:
                 continue
             return {'error_code': 5, 'errmsg': str(e)}
         except HTTPError as e:  # 其他HTTP错误
-            if epoch < settings.RETRY_TIME:
+            account.record_result(http_code_to_error_code(e.code), str(e))
+            if can_retry:
                 continue
             return {'error_code': 1, 'errmsg': str(e)}
 
         # 根据 http code 返回对应的信息
         http_code = response.code
+        account.record_result(0 if http_code == 200 else http_code_to_error_code(http_code),
+                              'Http status code: {}'.format(http_code))
         if http_code == 200:
             return {'error_code': 0, 'response': response}
         # 非200时进行重试
-        if epoch < settings.RETRY_TIME:
+        if can_retry:
             continue
         # 若重试多次仍然错误，就返回报错
         if http_code == 302 or http_code == 403:  # Cookie 失效
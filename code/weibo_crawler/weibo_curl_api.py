@@ -1,5 +1,5 @@
 import tornado.ioloop
-from tornado import web, gen, httpserver
+from tornado import web, gen, httpserver, locks
 import tornado.options
 from tornado.options import define, options
 import json
@@ -11,9 +11,12 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from selector_parser import *
 import settings
-from web_curl import SpiderAim, weibo_web_curl, curl_result_to_api_result
+from web_curl import SpiderAim, weibo_web_curl, curl_result_to_api_result, invalidate_cached_response
 from weibo_curl_error import WeiboCurlError, CookieInvalidException, HTMLParseException, PageContentEmptyException
-from account.account import account_pool_mobile, update_pools
+from account.account import account_pool_mobile, update_pools, publish_cookies, pool_state
+from http_client import http_client_manager
+from response_cache import response_cache
+import parse_pool
 from utils import report_log
 import pymongo
 
@@ -42,6 +45,12 @@ class BaseHandler(tornado.web.RequestHandler):
             input_dict[i] = self.get_argument(i)
         return input_dict
 
+    def use_cache(self):
+        """
+        查询参数 refresh=1 时不读响应缓存，直接请求微博
+        """
+        return self.get_argument("refresh", "0").lower() not in ("1", "true")
+
     def get_json(self):
         """
         将获取post时的json
@@ -94,6 +103,7 @@ class SearchTweetsHandler(BaseHandler):
                 keyword=keyword,
                 page_num=cursor,
                 is_hot=is_hot,
+                use_cache=self.use_cache(),
             )
             if not search_weibo_curl_result["error_code"]:
                 self.response = search_weibo_curl_result["response"]
@@ -102,15 +112,18 @@ class SearchTweetsHandler(BaseHandler):
                 self.write(error_res)
                 return
 
-            # 构建解析器并获取微博信息
-            searchWeiboParser = SearchWeiboParser(self.response)
+            # 解析微博信息
             try:
-                weibo_list = searchWeiboParser.parse_page()
+                weibo_list = yield parse_pool.run_parse(
+                    "search_tweets", parse_pool.parse_search_weibo, self.response.body
+                )
             except HTMLParseException:
+                invalidate_cached_response(search_weibo_curl_result)
                 self.write(WeiboCurlError.HTML_PARSE_ERROR)
                 return
 
             if weibo_list is None:
+                invalidate_cached_response(search_weibo_curl_result)
                 self.write(WeiboCurlError.PAGE_NOT_FOUND)  # 页面找不到
                 return
 
@@ -212,6 +225,7 @@ class StatusesShowHandler(BaseHandler):
 
         # 根据 hot 参数来确定获取 comment_list 的方式
         if not hot:
+            # 评论页已经由 commonParser 解析过（parse_one_weibo 需要在 IOLoop 上补爬组图等），直接复用，不再重复解析
             comment_list = commonParser.get_all_comment()
         else:
             hot_comment_curl_result = yield weibo_web_curl(
@@ -225,9 +239,9 @@ class StatusesShowHandler(BaseHandler):
                 return
 
             try:
-                comment_list = HotCommentParser(
-                    weibo_id, self.hot_comment_response
-                ).get_all_comment()
+                comment_list = yield parse_pool.run_parse(
+                    "statuses_show", parse_pool.parse_comments, weibo_id, self.hot_comment_response.body, True
+                )
             except HTMLParseException:
                 self.write(WeiboCurlError.HTML_PARSE_ERROR)
                 return
@@ -286,6 +300,7 @@ class SearchUsersHandler(BaseHandler):
             gender=gender,
             age_limit=age_limit,
             page_num=cursor,
+            use_cache=self.use_cache(),
         )
         if not search_users_curl_result["error_code"]:
             self.response = search_users_curl_result["response"]
@@ -293,12 +308,13 @@ class SearchUsersHandler(BaseHandler):
             error_res = curl_result_to_api_result(search_users_curl_result)
             self.write(error_res)
             return
-        # 构建解析器
-        searchUsersParser = SearchUsersParser(self.response)
         # 提取信息
         try:
-            user_list = searchUsersParser.parse_page()
+            user_list = yield parse_pool.run_parse(
+                "users_search", parse_pool.parse_search_users, self.response.body
+            )
         except HTMLParseException:
+            invalidate_cached_response(search_users_curl_result)
             self.write(WeiboCurlError.HTML_PARSE_ERROR)
             return
         # 返回信息
@@ -311,10 +327,67 @@ class SearchUsersHandler(BaseHandler):
             }
             self.write(success)
             return
+        invalidate_cached_response(search_users_curl_result)
         self.write(WeiboCurlError.UNKNOWN_ERROR)
         return
 
 
+@gen.coroutine
+def fetch_user_show(user_id, use_cache=True):
+    """
+    爬取一个用户的主页与信息页并解析为用户信息；信息页需要主页解析出的真实user_id，两次请求只能先后进行
+    :param user_id: 用户id
+    :param use_cache: 是否读取响应缓存
+    :return: 与 users_show 接口相同格式的返回结果
+    """
+    curl_results = []  # 解析失败时删除这些页面的缓存
+    try:
+        # 爬取主页的结果
+        idx_curl_result = yield weibo_web_curl(
+            SpiderAim.users_show, user_id=user_id, use_cache=use_cache
+        )
+        if idx_curl_result["error_code"]:
+            return curl_result_to_api_result(idx_curl_result)
+        curl_results.append(idx_curl_result)
+        try:
+            # 解析主页：真正的user_id、微博的页数以及微博数/关注数/粉丝数
+            user_id, max_page_num, counts = yield parse_pool.run_parse(
+                "users_show", parse_pool.parse_user_index, user_id, idx_curl_result.get("response").body
+            )
+        except CookieInvalidException:
+            invalidate_cached_response(idx_curl_result)
+            return WeiboCurlError.COOKIE_INVALID
+
+        # 爬取信息页的结果
+        info_curl_result = yield weibo_web_curl(
+            SpiderAim.users_info, user_id=user_id, use_cache=use_cache
+        )
+        if info_curl_result["error_code"]:
+            return curl_result_to_api_result(info_curl_result)
+        curl_results.append(info_curl_result)
+        user = yield parse_pool.run_parse(
+            "users_show", parse_pool.parse_user_show, info_curl_result.get("response").body, counts
+        )
+        user["max_page"] = max_page_num  # 微博的最大页数
+
+        success = settings.SUCCESS.copy()
+        try:
+            success["data"] = {"result": user, "cursor": ""}
+        except AttributeError:  # user没有__dict__属性时，说明未爬取到user
+            return WeiboCurlError.REQUEST_ARGS_ERROR  # 报告参数错误
+        return success
+
+    except HTMLParseException:
+        for curl_result in curl_results:
+            invalidate_cached_response(curl_result)
+        return WeiboCurlError.HTML_PARSE_ERROR
+    except Exception as e:
+        report_log(e)
+        for curl_result in curl_results:
+            invalidate_cached_response(curl_result)
+        return WeiboCurlError.UNKNOWN_ERROR
+
+
 class UsersShowHandler(BaseHandler):
     """
     API: 用户展示接口：根据用户id搜索用户
@@ -329,60 +402,61 @@ class UsersShowHandler(BaseHandler):
             self.write(WeiboCurlError.REQUEST_LACK_ARGS)
             return
 
-        try:
-            # 爬取主页的结果
-            idx_curl_result = yield weibo_web_curl(
-                SpiderAim.users_show, user_id=user_id
-            )
-            if not idx_curl_result["error_code"]:
-                idxParser = IndexParser(
-                    user_id, idx_curl_result.get("response")
-                )  # 构建一个主页解析器
-
-                try:
-                    user_id = idxParser.get_user_id()  # 获取到真正的user_id
-                    max_page_num = idxParser.get_page_num()  # 获取微博的页数
-                except CookieInvalidException:
-                    self.write(WeiboCurlError.COOKIE_INVALID)
-                    return
-
-                # 爬取信息页的结果
-                info_curl_result = yield weibo_web_curl(
-                    SpiderAim.users_info, user_id=user_id
-                )
-                if not info_curl_result["error_code"]:
-                    infoParser = InfoParser(
-                        info_curl_result.get("response")
-                    )  # 信息页解析器
-                    user_info = infoParser.extract_user_info()
-                    user = idxParser.get_user(user_info)
-                    user["max_page"] = max_page_num  # 微博的最大页数
-                    # print(user)
-
-                    success = settings.SUCCESS.copy()
-                    try:
-                        success["data"] = {"result": user, "cursor": ""}
-                    except AttributeError:  # user没有__dict__属性时，说明未爬取到user
-                        self.write(WeiboCurlError.REQUEST_ARGS_ERROR)  # 报告参数错误
-                        return
-                    self.write(success)
-                    return
-                else:
-                    error_res = curl_result_to_api_result(info_curl_result)
-                    self.write(error_res)
-                    return
-            else:
-                error_res = curl_result_to_api_result(idx_curl_result)
-                self.write(error_res)
-                return
+        result = yield fetch_user_show(user_id, self.use_cache())
+        self.write(result)
 
-        except HTMLParseException:
-            self.write(WeiboCurlError.HTML_PARSE_ERROR)
+
+class UsersShowBatchHandler(BaseHandler):
+    """
+    API: 批量用户展示接口：一次请求获取多个用户的信息
+    routing path: /weibo_curl/api/users_show_batch
+    GET 参数 user_ids 为逗号分隔的用户id；POST 请求体为 {"user_ids": [...]}
+    各用户并发爬取，同时进行的用户数受 USERS_SHOW_BATCH_CONCURRENCY 限制（所有批量请求共享）；
+    返回 {"result": {user_id: 与 users_show 接口相同格式的结果}, "cursor": ""}
+    """
+
+    semaphore = locks.Semaphore(settings.USERS_SHOW_BATCH_CONCURRENCY)
+
+    @gen.coroutine
+    def get(self):
+        user_ids = self.args2dict().get("user_ids")
+        if user_ids is None:
+            self.write(WeiboCurlError.REQUEST_LACK_ARGS)
             return
-        except Exception as e:
-            report_log(e)
-            self.write(WeiboCurlError.UNKNOWN_ERROR)
+        yield self.users_show([i.strip() for i in user_ids.split(",")])
+
+    @gen.coroutine
+    def post(self):
+        try:
+            user_ids = self.get_json().get("user_ids")
+        except (ValueError, AttributeError):
+            self.write(WeiboCurlError.REQUEST_ARGS_ERROR)
             return
+        if user_ids is None:
+            self.write(WeiboCurlError.REQUEST_LACK_ARGS)
+            return
+        if not isinstance(user_ids, list):
+            self.write(WeiboCurlError.REQUEST_ARGS_ERROR)
+            return
+        yield self.users_show([str(i).strip() for i in user_ids])
+
+    @gen.coroutine
+    def fetch_bounded(self, user_id):
+        with (yield self.semaphore.acquire()):
+            result = yield fetch_user_show(user_id, self.use_cache())
+        return result
+
+    @gen.coroutine
+    def users_show(self, user_ids):
+        # 去重并保持顺序
+        user_ids = list(dict.fromkeys(i for i in user_ids if i))
+        if not user_ids or len(user_ids) > settings.USERS_SHOW_BATCH_MAX:
+            self.write(WeiboCurlError.REQUEST_ARGS_ERROR)
+            return
+        results = yield [self.fetch_bounded(user_id) for user_id in user_ids]
+        success = settings.SUCCESS.copy()
+        success["data"] = {"result": dict(zip(user_ids, results)), "cursor": ""}
+        self.write(success)
 
 
 class UserTimelineHandler(BaseHandler):
@@ -408,7 +482,7 @@ class UserTimelineHandler(BaseHandler):
         filter = args_dict.get("filter", 0)  # 默认爬取全部微博（原创+转发）
 
         page_curl_result = yield weibo_web_curl(
-            SpiderAim.users_weibo_page, user_id=user_id, page_num=cursor
+            SpiderAim.users_weibo_page, user_id=user_id, page_num=cursor, use_cache=self.use_cache()
         )
         if not page_curl_result["error_code"]:
             pageParser = PageParser(user_id, page_curl_result["response"], filter)
@@ -424,6 +498,7 @@ class UserTimelineHandler(BaseHandler):
             else:
                 user = pageParser.get_user_info_except_first_page()
         except HTMLParseException:
+            invalidate_cached_response(page_curl_result)
             self.write(WeiboCurlError.HTML_PARSE_ERROR)
             return
         success = settings.SUCCESS.copy()
@@ -436,6 +511,7 @@ class UserTimelineHandler(BaseHandler):
                 "cursor": str(cursor + 1) if cursor < max_page else "0",
             }
         except AttributeError:  # user没有__dict__属性时，说明未爬取到user
+            invalidate_cached_response(page_curl_result)
             self.write(WeiboCurlError.REQUEST_ARGS_ERROR)  # 报告参数错误
             return
         # print(success)
@@ -465,7 +541,7 @@ class FriendsHandler(BaseHandler):
             return
         # 进行爬取
         follow_curl_result = yield weibo_web_curl(
-            SpiderAim.follow, user_id=user_id, page_num=cursor
+            SpiderAim.follow, user_id=user_id, page_num=cursor, use_cache=self.use_cache()
         )
         if not follow_curl_result["error_code"]:
             self.response = follow_curl_result["response"]
@@ -490,10 +566,12 @@ class FriendsHandler(BaseHandler):
             self.write(success)
             return
         except HTMLParseException:
+            invalidate_cached_response(follow_curl_result)
             self.write(WeiboCurlError.HTML_PARSE_ERROR)
             return
         except Exception as e:
             report_log(e)
+            invalidate_cached_response(follow_curl_result)
             self.write(WeiboCurlError.UNKNOWN_ERROR)
 
 
@@ -518,7 +596,7 @@ class FollowersHandler(BaseHandler):
             return
         # 进行爬取
         fans_curl_result = yield weibo_web_curl(
-            SpiderAim.fans, user_id=user_id, page_num=cursor
+            SpiderAim.fans, user_id=user_id, page_num=cursor, use_cache=self.use_cache()
         )
         if not fans_curl_result["error_code"]:
             self.response = fans_curl_result["response"]
@@ -543,10 +621,12 @@ class FollowersHandler(BaseHandler):
             return
 
         except HTMLParseException:
+            invalidate_cached_response(fans_curl_result)
             self.write(WeiboCurlError.HTML_PARSE_ERROR)
             return
         except Exception as e:
             report_log(e)
+            invalidate_cached_response(fans_curl_result)
             self.write(WeiboCurlError.UNKNOWN_ERROR)
 
 
@@ -569,6 +649,9 @@ class AccountUpdateHandler(BaseHandler):
             if cookies is not None and cookies_mobile is None:
                 cookies_mobile = cookies
             update_pools(new_cookies_mobile=cookies_mobile, new_proxies=proxies)
+            # 通知后端的 Cookie 缓存重新加载
+            if cookies_mobile:
+                publish_cookies(cookies_mobile)
         except ValueError:
             error = WeiboCurlError.REQUEST_ARGS_ERROR
             error["error_msg"] += "Cookies or proxies is an empty list."
@@ -586,6 +669,56 @@ class AccountUpdateHandler(BaseHandler):
         return
 
 
+class AccountPoolHandler(BaseHandler):
+    """
+    账号池状态接口
+        说明：返回每个账号的成功率、最近一分钟的请求数、剩余请求额度、冷却状态与最近一次错误，Cookie 只显示前 20 个字符
+        路由：/weibo_curl/api/account_pool
+    """
+
+    def get(self):
+        state = pool_state()
+        if state is None:
+            self.write(WeiboCurlError.ACCOUNT_POOL_EMPTY)
+            return
+        success = settings.SUCCESS.copy()
+        success["data"] = {
+            "result": state,
+            "cursor": "",
+        }
+        self.write(success)
+
+
+class ResponseCacheHandler(BaseHandler):
+    """
+    响应缓存接口
+        说明：GET 返回缓存的条数、大小与命中统计；DELETE 清除缓存，查询参数 aim 为爬取目标（如 search_weibo）时只清除该目标的缓存
+        路由：/weibo_curl/api/response_cache
+    """
+
+    def get(self):
+        success = settings.SUCCESS.copy()
+        success["data"] = {
+            "result": response_cache.stats(),
+            "cursor": "",
+        }
+        self.write(success)
+
+    @gen.coroutine
+    def delete(self):
+        aim = self.get_argument("aim", None)
+        if aim is not None and aim not in SpiderAim.__members__:
+            self.write(WeiboCurlError.REQUEST_ARGS_ERROR)
+            return
+        purged = yield response_cache.purge(aim + ":" if aim else "")
+        success = settings.SUCCESS.copy()
+        success["data"] = {
+            "result": {"purged": purged},
+            "cursor": "",
+        }
+        self.write(success)
+
+
 # 启动主程序
 if __name__ == "__main__":
     import platform
@@ -605,9 +738,13 @@ if __name__ == "__main__":
 
     _logging.getLogger("tornado.access").setLevel(_logging.ERROR)
 
+    # 全局只配置一次 HTTP 客户端（curl 实现、连接池大小、默认超时、连接复用）
+    http_client_manager.setup()
+
     app = tornado.web.Application(
         [
             (ROUTE_PREFIX + r"users_show", UsersShowHandler),
+            (ROUTE_PREFIX + r"users_show_batch", UsersShowBatchHandler),
             (ROUTE_PREFIX + r"statuses_user_timeline", UserTimelineHandler),
             (ROUTE_PREFIX + r"statuses_show", StatusesShowHandler),
             # 兼容后端/前端调用的 PC 端详情接口：先复用移动端实现，避免 404 刷屏
@@ -618,6 +755,8 @@ if __name__ == "__main__":
             # (ROUTE_PREFIX + r"search_all_tweets", SearchTweetsHandler.get_all),
             (ROUTE_PREFIX + r"users_search", SearchUsersHandler),
             (ROUTE_PREFIX + r"account_update", AccountUpdateHandler),
+            (ROUTE_PREFIX + r"account_pool", AccountPoolHandler),
+            (ROUTE_PREFIX + r"response_cache", ResponseCacheHandler),
         ]
     )
 
@@ -78,6 +78,12 @@ class WeiboCurlError:
         'error_msg': 'Comments are closed for this weibo.'
     }
 
+    # 账号池为空（没有可用的 Cookie/代理配置）
+    ACCOUNT_POOL_EMPTY = {
+        'error_code': 2014,
+        'error_msg': 'No valid cookie/proxy config found.'
+    }
+
 
 class WeiboException(Exception):
     """微博爬虫项目的异常"""